@@ -0,0 +1,153 @@
+"""Precomputed aggregate cube over the insurance dataset
+
+Charges are summed once into a dense sex x smoker x region x BMI bucket x
+age group array. Every dashboard number is then a roll-up over at most
+2 * 2 * 4 * 4 * 5 = 320 cells, independent of the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+# Dimension order and the labels of each axis
+DIMENSIONS = ('sex', 'smoker', 'region', 'bmi_bucket', 'age_group')
+SEX_LABELS = ('female', 'male')
+SMOKER_LABELS = ('no', 'yes')
+REGION_LABELS = ('northeast', 'northwest', 'southeast', 'southwest')
+BMI_BUCKET_LABELS = ('underweight', 'normal', 'overweight', 'obese')
+AGE_GROUP_LABELS = ('18-25', '26-35', '36-50', '51-65', '65+')
+LABELS = dict(zip(DIMENSIONS, (SEX_LABELS, SMOKER_LABELS, REGION_LABELS,
+                               BMI_BUCKET_LABELS, AGE_GROUP_LABELS)))
+SHAPE = tuple(len(LABELS[dim]) for dim in DIMENSIONS)
+
+# Bucket edges, matching calculate_bmi's categories and the notebook's age groups
+BMI_EDGES = np.array([18.5, 25, 30])
+AGE_EDGES = np.array([25, 35, 50, 65])
+
+
+def bmi_buckets(bmi):
+    """BMI bucket codes (BMI >= 30 counts as obese)"""
+    return np.digitize(bmi, BMI_EDGES)
+
+
+def age_groups(age):
+    """Age group codes with right-inclusive edges"""
+    return np.digitize(age, AGE_EDGES, right=True)
+
+
+def encode_labels(values, labels):
+    """Map string labels to codes, -1 for anything unknown"""
+    return pd.Categorical(values, categories=labels).codes.astype(np.int64)
+
+
+class AggregateCube:
+    """Counts and charge sums for every combination of the dashboard dimensions"""
+
+    def __init__(self, counts=None, sums=None, age_min=None, age_max=None):
+        self.counts = np.zeros(SHAPE, dtype=np.int64) if counts is None else counts
+        self.sums = np.zeros(SHAPE, dtype=np.float64) if sums is None else sums
+        self.age_min = age_min
+        self.age_max = age_max
+
+    @classmethod
+    def from_frame(cls, df):
+        cube = cls()
+        cube.add_frame(df)
+        return cube
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build from an iterator of DataFrames (e.g. read_csv with chunksize)"""
+        cube = cls()
+        for chunk in chunks:
+            cube.add_frame(chunk)
+        return cube
+
+    def add_frame(self, df):
+        """Fold a batch of rows into the cube in one bincount pass"""
+        codes = (
+            encode_labels(df['sex'], SEX_LABELS),
+            encode_labels(df['smoker'], SMOKER_LABELS),
+            encode_labels(df['region'], REGION_LABELS),
+            bmi_buckets(df['bmi'].to_numpy()),
+            age_groups(df['age'].to_numpy()),
+        )
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        flat = np.ravel_multi_index([c[valid] for c in codes], SHAPE)
+        size = self.counts.size
+        self.counts += np.bincount(flat, minlength=size).reshape(SHAPE)
+        self.sums += np.bincount(flat, weights=df['charges'].to_numpy()[valid], minlength=size).reshape(SHAPE)
+
+        ages = df['age'].to_numpy()[valid]
+        if len(ages):
+            low, high = ages.min().item(), ages.max().item()
+            self.age_min = low if self.age_min is None else min(self.age_min, low)
+            self.age_max = high if self.age_max is None else max(self.age_max, high)
+        return self
+
+    def merge(self, other):
+        """Combine with a cube built from a disjoint set of rows"""
+        self.counts += other.counts
+        self.sums += other.sums
+        if other.age_min is not None:
+            self.age_min = other.age_min if self.age_min is None else min(self.age_min, other.age_min)
+            self.age_max = other.age_max if self.age_max is None else max(self.age_max, other.age_max)
+        return self
+
+    def _select(self, filters):
+        """Open-mesh index restricting each filtered dimension to the given labels"""
+        axes = []
+        for dim, size in zip(DIMENSIONS, SHAPE):
+            wanted = filters.get(dim)
+            if wanted is None:
+                axes.append(np.arange(size))
+            else:
+                if isinstance(wanted, str):
+                    wanted = [wanted]
+                axes.append(np.array([LABELS[dim].index(label) for label in wanted], dtype=np.int64))
+        return np.ix_(*axes)
+
+    def rollup(self, by=(), **filters):
+        """Counts and sums kept along the `by` dimensions, summed over the rest"""
+        if isinstance(by, str):
+            by = (by,)
+        selector = self._select(filters)
+        counts, sums = self.counts[selector], self.sums[selector]
+        axes = tuple(i for i, dim in enumerate(DIMENSIONS) if dim not in by)
+        return counts.sum(axis=axes), sums.sum(axis=axes)
+
+    def total(self, **filters):
+        counts, _ = self.rollup(**filters)
+        return int(counts)
+
+    def mean_charges(self, **filters):
+        counts, sums = self.rollup(**filters)
+        return float(sums / counts) if counts else float('nan')
+
+    def share(self, **filters):
+        """Fraction of all rows that match the filters"""
+        total = self.counts.sum()
+        return float(self.total(**filters) / total) if total else float('nan')
+
+    def group_means(self, dim, **filters):
+        """Mean charges per label of one dimension"""
+        counts, sums = self.rollup(dim, **filters)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        return dict(zip(LABELS[dim], means.tolist()))
+
+    def insights(self):
+        """Every number shown on the home page and dashboard cards"""
+        region_means = self.group_means('region')
+        populated = {k: v for k, v in region_means.items() if not np.isnan(v)}
+        records = int(self.counts.sum())
+        return {
+            'records': records,
+            'avg_cost': float(self.sums.sum() / records) if records else float('nan'),
+            'age_min': self.age_min,
+            'age_max': self.age_max,
+            'smoker_pct': self.share(smoker='yes') * 100,
+            'smoker_multiplier': self.mean_charges(smoker='yes') / self.mean_charges(smoker='no'),
+            'male_avg': self.mean_charges(sex='male'),
+            'female_avg': self.mean_charges(sex='female'),
+            'highest_region': max(populated, key=populated.get) if populated else '',
+            'obese_pct': self.share(bmi_bucket='obese') * 100,
+        }
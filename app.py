@@ -4,12 +4,39 @@ import numpy as np
 import time
 import plotly.graph_objects as go
 import plotly.express as px
+import streamlit.components.v1 as components
 from datetime import datetime
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
 import base64
 from PIL import Image
 import io
+import os
+import hmac
+import html
+import uuid
+from session_store import UserProfile, SessionStore
+from charts import cost_scenario_figure
+from aggregates import AGE_GROUP_LABELS, BMI_BUCKET_LABELS, AggregateCube, age_groups, bmi_buckets
+from dashboard_query import DashboardIndex
+from insurance_data import dataset_version, load_insurance_frame
+from profiling import TIMER, stage, timed
+from ml_models import COST_QUANTILES, MODEL_REGION_CODES, train_cost_quantile_models, train_recommendation_models
+from model_export import MODEL_ARTIFACT_DIR, RECOMMENDATION_MODELS, export_recommendation_models
+from model_runtime import artifact_exists, artifact_metrics, artifact_version, evaluate, load_models, store_metrics
+from model_server import ModelServer
+from health_metrics import BMI_CATEGORY_COLORS, BMI_CATEGORY_LABELS, bmi_category_label
+from household_scoring import household_members, score_households
+from plan_catalog import INSURANCE_COMPANIES, STATE_CODES, STATE_REGIONS, all_plans
+from plan_ranking import RECOMMENDATION_WEIGHTS, PlanTable, eligible, priority_weights, rank_plans, score_plans, top_k
+from plan_filter import PlanIndex, constraints_from_profile, describe
+from plan_search import PlanSearch, plan_key
+from state_pricing import adjust_costs, cost_factors, model_regions
+from plan_explainer import DEFAULT_QUESTION, ExplanationError, Explainer, profile_facts
+from faq_cache import FAQS, SemanticCache
+from model_attributions import AttributionCache, drivers
+from drift_monitor import PSI_MODERATE, PSI_SIGNIFICANT, training_monitor
+from model_evaluation import evaluate_models
+from marketplace import MARKETPLACE_CACHE_DIR, MarketplaceCache
+from group_quote import quote_census
 
 # Configure the page
 st.set_page_config(
@@ -19,188 +46,65 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Initialize session state
+# Optional shared store for idle session profiles (set MEDICOST_SESSION_DB to a path or ':memory:')
+@st.cache_resource
+def get_session_store():
+    """Return the process-wide session store, or None when disabled"""
+    path = os.environ.get('MEDICOST_SESSION_DB')
+    if not path:
+        return None
+    return SessionStore(path, max_idle_seconds=int(os.environ.get('MEDICOST_SESSION_TTL', 1800)))
+
+# Browser cookie holding the session key; unlike a URL parameter it is not passed on with a copied link
+SESSION_COOKIE = 'medicost_sid'
+
+def get_session_key():
+    """Stable session key kept in a cookie so reloads and other replicas can restore the profile"""
+    if 'session_key' not in st.session_state:
+        # Keys from older links are dropped rather than trusted
+        if 'sid' in st.query_params:
+            del st.query_params['sid']
+        key = st.context.cookies.get(SESSION_COOKIE, '')
+        if len(key) != 32 or key.strip('0123456789abcdef'):
+            key = uuid.uuid4().hex
+        st.session_state.session_key = key
+        # (Re)set the cookie for as long as the store keeps an idle profile; the component
+        # frame shares the app's origin, so it can write the page's cookie
+        max_age = get_session_store().max_idle_seconds
+        components.html(f"""<script>
+            window.parent.document.cookie = "{SESSION_COOKIE}={key}; path=/; max-age={max_age}; SameSite=Strict"
+                + (window.parent.location.protocol === "https:" ? "; Secure" : "");
+        </script>""", height=0)
+    return st.session_state.session_key
+
+def load_user_profile():
+    """Restore the user's profile from the session store if one is configured"""
+    store = get_session_store()
+    if store is None:
+        return UserProfile()
+    return store.load(get_session_key()) or UserProfile()
+
+def save_user_profile():
+    """Hand the profile to the session store, if one is configured, and drop it from the session
+
+    Between runs an idle session then holds only its key; the next run loads
+    the profile back. A run cut short by st.rerun keeps it for the run that follows.
+    """
+    store = get_session_store()
+    if store is not None:
+        store.save(get_session_key(), st.session_state.user_data)
+        del st.session_state.user_data
+
+# Initialize session state; with a session store the profile is loaded back at the start of every run
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 'home'
 if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
+    st.session_state.user_data = load_user_profile()
 if 'animation_done' not in st.session_state:
     st.session_state.animation_done = False
 
-# Enhanced Insurance Companies Database
-INSURANCE_COMPANIES = {
-    'budget_friendly': [
-        {
-            'name': 'Ambetter Health',
-            'monthly': 185,
-            'deductible': 5800,
-            'coverage': 'Essential',
-            'network': 'Regional+',
-            'rating': 4.2,
-            'features': ['Telehealth included', 'Generic drug coverage', 'Preventive care'],
-            'best_for': 'Young adults, healthy individuals',
-            'copay': '$35',
-            'oop_max': '$8700'
-        },
-        {
-            'name': 'Oscar Health',
-            'monthly': 225,
-            'deductible': 4500,
-            'coverage': 'Digital First',
-            'network': 'Modern Network',
-            'rating': 4.4,
-            'features': ['Award-winning app', 'Virtual care', 'Transparent pricing'],
-            'best_for': 'Tech-savvy, urban professionals',
-            'copay': '$30',
-            'oop_max': '$8000'
-        },
-        {
-            'name': 'Molina Healthcare',
-            'monthly': 195,
-            'deductible': 5200,
-            'coverage': 'Community Care',
-            'network': 'Community Based',
-            'rating': 4.1,
-            'features': ['Community clinics', 'Medicaid expertise', 'Multi-language support'],
-            'best_for': 'Community-focused, diverse populations',
-            'copay': '$40',
-            'oop_max': '$9100'
-        }
-    ],
-    'comprehensive': [
-        {
-            'name': 'Blue Cross Blue Shield',
-            'monthly': 385,
-            'deductible': 2200,
-            'coverage': 'Comprehensive Plus',
-            'network': 'National Network',
-            'rating': 4.6,
-            'features': ['Largest network', 'Nationwide coverage', 'Specialist access'],
-            'best_for': 'Frequent travelers, comprehensive needs',
-            'copay': '$25',
-            'oop_max': '$6000'
-        },
-        {
-            'name': 'Aetna CVS Health',
-            'monthly': 420,
-            'deductible': 1800,
-            'coverage': 'Premium Care',
-            'network': 'Premium Network',
-            'rating': 4.5,
-            'features': ['Wellness programs', 'Chronic care management', 'Premium providers'],
-            'best_for': 'Health-conscious, chronic conditions',
-            'copay': '$20',
-            'oop_max': '$5500'
-        },
-        {
-            'name': 'Cigna HealthSpring',
-            'monthly': 365,
-            'deductible': 2500,
-            'coverage': 'Complete Care',
-            'network': 'Global Network',
-            'rating': 4.3,
-            'features': ['International coverage', 'Mental health focus', 'Integrated care'],
-            'best_for': 'International needs, mental health priority',
-            'copay': '$30',
-            'oop_max': '$6500'
-        }
-    ],
-    'family': [
-        {
-            'name': 'Kaiser Permanente',
-            'monthly': 780,
-            'deductible': 3200,
-            'coverage': 'Family Complete',
-            'network': 'Integrated HMO',
-            'rating': 4.7,
-            'features': ['Own hospitals', 'Coordinated care', 'Family wellness'],
-            'best_for': 'Families wanting integrated care',
-            'copay': '$20',
-            'oop_max': '$12000'
-        },
-        {
-            'name': 'UnitedHealthcare',
-            'monthly': 850,
-            'deductible': 2800,
-            'coverage': 'Family Choice Plus',
-            'network': 'Extensive PPO',
-            'rating': 4.4,
-            'features': ['Flexible networks', 'Pediatric specialists', 'Family discounts'],
-            'best_for': 'Large families, flexibility priority',
-            'copay': '$25',
-            'oop_max': '$14000'
-        },
-        {
-            'name': 'Anthem BlueCross',
-            'monthly': 920,
-            'deductible': 2200,
-            'coverage': 'Family Premium',
-            'network': 'Premium PPO',
-            'rating': 4.5,
-            'features': ['Premium providers', 'Maternity care', 'Child wellness'],
-            'best_for': 'Premium family care, growing families',
-            'copay': '$15',
-            'oop_max': '$10000'
-        }
-    ],
-    'senior': [
-        {
-            'name': 'Humana Medicare Advantage',
-            'monthly': 125,
-            'deductible': 1200,
-            'coverage': 'Senior Plus',
-            'network': 'Medicare Network',
-            'rating': 4.6,
-            'features': ['Medicare expertise', 'Senior benefits', 'Prescription included'],
-            'best_for': '65+ Medicare-eligible seniors',
-            'copay': '$10',
-            'oop_max': '$3500'
-        },
-        {
-            'name': 'Aetna Medicare',
-            'monthly': 145,
-            'deductible': 1000,
-            'coverage': 'Senior Complete',
-            'network': 'Medicare Plus',
-            'rating': 4.4,
-            'features': ['Chronic condition support', 'Wellness programs', 'Coordinated care'],
-            'best_for': 'Seniors with chronic conditions',
-            'copay': '$15',
-            'oop_max': '$3000'
-        },
-        {
-            'name': 'Wellcare Medicare',
-            'monthly': 95,
-            'deductible': 1500,
-            'coverage': 'Essential Senior',
-            'network': 'Value Network',
-            'rating': 4.2,
-            'features': ['Budget-friendly', 'Essential coverage', 'Prescription focus'],
-            'best_for': 'Budget-conscious seniors',
-            'copay': '$20',
-            'oop_max': '$4000'
-        }
-    ]
-}
-
-# US States and their regions
-STATE_REGIONS = {
-    'Alabama': 'Southeast', 'Alaska': 'Northwest', 'Arizona': 'Southwest', 'Arkansas': 'South',
-    'California': 'West', 'Colorado': 'West', 'Connecticut': 'Northeast', 'Delaware': 'Northeast',
-    'Florida': 'Southeast', 'Georgia': 'Southeast', 'Hawaii': 'West', 'Idaho': 'Northwest',
-    'Illinois': 'Midwest', 'Indiana': 'Midwest', 'Iowa': 'Midwest', 'Kansas': 'Midwest',
-    'Kentucky': 'South', 'Louisiana': 'South', 'Maine': 'Northeast', 'Maryland': 'Northeast',
-    'Massachusetts': 'Northeast', 'Michigan': 'Midwest', 'Minnesota': 'Midwest', 'Mississippi': 'South',
-    'Missouri': 'Midwest', 'Montana': 'Northwest', 'Nebraska': 'Midwest', 'Nevada': 'West',
-    'New Hampshire': 'Northeast', 'New Jersey': 'Northeast', 'New Mexico': 'Southwest', 'New York': 'Northeast',
-    'North Carolina': 'Southeast', 'North Dakota': 'Midwest', 'Ohio': 'Midwest', 'Oklahoma': 'South',
-    'Oregon': 'Northwest', 'Pennsylvania': 'Northeast', 'Rhode Island': 'Northeast', 'South Carolina': 'Southeast',
-    'South Dakota': 'Midwest', 'Tennessee': 'South', 'Texas': 'South', 'Utah': 'West',
-    'Vermont': 'Northeast', 'Virginia': 'Southeast', 'Washington': 'Northwest', 'West Virginia': 'Southeast',
-    'Wisconsin': 'Midwest', 'Wyoming': 'West'
-}
-
 # Professional CSS with cohesive blue-green theme
+@timed('layout.css')
 def load_professional_css():
     st.markdown("""
     <style>
@@ -845,23 +749,12 @@ def load_professional_css():
     </style>
     """, unsafe_allow_html=True)
 
+@timed('page.dashboard')
 def show_dashboard():
     """Dashboard with key metrics and insights"""
     
-    # Sample data - replace with your actual data loading
-    import pandas as pd
-    import numpy as np
-    
-    # Generate sample data (replace this with: df = pd.read_csv('your_data.csv'))
-    np.random.seed(42)
-    df = pd.DataFrame({
-        'age': np.random.randint(18, 65, 1338),
-        'charges': np.random.normal(13270, 5000, 1338),
-        'smoker': np.random.choice(['yes', 'no'], 1338, p=[0.21, 0.79]),
-        'sex': np.random.choice(['male', 'female'], 1338),
-        'bmi': np.random.normal(30, 6, 1338),
-        'region': np.random.choice(['northeast', 'southeast', 'southwest', 'northwest'], 1338)
-    })
+    # Dashboard numbers come from the precomputed aggregate cube
+    insights = get_dashboard_cube(dataset_version()).insights()
     
     # Platform Overview Cards
     st.markdown('<h2 class="section-title">Platform Overview</h2>', unsafe_allow_html=True)
@@ -873,14 +766,14 @@ def show_dashboard():
         <div class="metric-card">
             <h3 style="color: #2563eb; margin: 0; font-size: 1.2rem;">Dataset Size</h3>
             <p style="font-size: 2.5rem; font-weight: 800; color: #0C4A6E; margin: 0.5rem 0;">
-                {len(df):,}
+                {insights['records']:,}
             </p>
             <p style="color: #64748B; margin: 0; font-size: 0.9rem;">Records Analyzed</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_cost = df['charges'].mean()
+        avg_cost = insights['avg_cost']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="color: #10B981; margin: 0; font-size: 1.2rem;">Avg Cost</h3>
@@ -892,18 +785,22 @@ def show_dashboard():
         """, unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
+        # Held-out metrics stored with the model artifact
+        metrics = cost_model_metrics()
+        accuracy = f"{metrics['r2']:.1%}" if metrics else "n/a"
+        detail = f"R² Score · RMSE ${metrics['rmse']:,.0f} · MAE ${metrics['mae']:,.0f}" if metrics else "R² Score"
+        st.markdown(f"""
         <div class="metric-card">
             <h3 style="color: #F59E0B; margin: 0; font-size: 1.2rem;">ML Accuracy</h3>
             <p style="font-size: 2.5rem; font-weight: 800; color: #92400E; margin: 0.5rem 0;">
-                94.6%
+                {accuracy}
             </p>
-            <p style="color: #64748B; margin: 0; font-size: 0.9rem;">R² Score</p>
+            <p style="color: #64748B; margin: 0; font-size: 0.9rem;">{detail}</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col4:
-        age_range = f"{df['age'].min()}-{df['age'].max()}"
+        age_range = f"{insights['age_min']}-{insights['age_max']}"
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="color: #8B5CF6; margin: 0; font-size: 1.2rem;">Age Range</h3>
@@ -915,7 +812,7 @@ def show_dashboard():
         """, unsafe_allow_html=True)
     
     with col5:
-        smoker_pct = (df['smoker'] == 'yes').mean() * 100
+        smoker_pct = insights['smoker_pct']
         st.markdown(f"""
         <div class="metric-card">
             <h3 style="color: #EF4444; margin: 0; font-size: 1.2rem;">Smokers</h3>
@@ -929,12 +826,12 @@ def show_dashboard():
     # Key Insights
     st.markdown('<h3 class="subsection-title">Key Insights</h3>', unsafe_allow_html=True)
     
-    # Calculate insights
-    smoker_multiplier = df[df['smoker'] == 'yes']['charges'].mean() / df[df['smoker'] == 'no']['charges'].mean()
-    male_avg = df[df['sex'] == 'male']['charges'].mean()
-    female_avg = df[df['sex'] == 'female']['charges'].mean()
-    highest_region = df.groupby('region')['charges'].mean().idxmax()
-    obese_pct = (df['bmi'] >= 30).mean() * 100
+    # Insights are roll-ups of the cube, no scans over the rows
+    smoker_multiplier = insights['smoker_multiplier']
+    male_avg = insights['male_avg']
+    female_avg = insights['female_avg']
+    highest_region = insights['highest_region']
+    obese_pct = insights['obese_pct']
     
     col1, col2 = st.columns(2)
     
@@ -963,7 +860,58 @@ def show_dashboard():
             <strong>Health Alert:</strong> {obese_pct:.1f}% of population has BMI ≥30 (obese)
         </div>
         """, unsafe_allow_html=True)
+    
+    # Drill-down filters, answered from the sorted dashboard index
+    st.markdown('<h3 class="subsection-title">Explore the Data</h3>', unsafe_allow_html=True)
+    
+    dashboard_index = get_dashboard_index(dataset_version())
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        regions = st.multiselect("Region", ["Northeast", "Northwest", "Southeast", "Southwest"], key="dash_region")
+    with col2:
+        age_range = st.slider("Age Range", 18, 100, (18, 100), key="dash_age")
+    with col3:
+        smoker_filter = st.selectbox("Smoking Status", ["All", "Smokers", "Non-smokers"], key="dash_smoker")
+    with col4:
+        bmi_classes = st.multiselect("BMI Class", ["Underweight", "Normal", "Overweight", "Obese"], key="dash_bmi")
+    
+    filters = {}
+    if regions:
+        filters['region'] = [r.lower() for r in regions]
+    if smoker_filter != "All":
+        filters['smoker'] = 'yes' if smoker_filter == "Smokers" else 'no'
+    if bmi_classes:
+        filters['bmi_class'] = [b.lower() for b in bmi_classes]
+    
+    result = dashboard_index.query(age_range=age_range, group_by='region', **filters)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Matching Records", f"{result['count']:,}")
+    with col2:
+        st.metric("Avg Annual Cost", f"${result['mean_charges']:,.0f}" if result['count'] else "–")
+    with col3:
+        st.metric("Total Charges", f"${result['total_charges']:,.0f}")
+    
+    if result['count']:
+        region_costs = pd.DataFrame({
+            'Avg Cost': [g['mean_charges'] for g in result['groups'].values()]
+        }, index=[r.title() for r in result['groups']])
+        st.bar_chart(region_costs.dropna())
+
+
+# Dashboard aggregates, rebuilt only when the dataset version changes
+@st.cache_resource(max_entries=2)
+def get_dashboard_cube(version):
+    """Build the aggregate cube for one dataset version"""
+    return AggregateCube.from_chunks(load_insurance_frame(chunksize=500_000))
 
+# Drill-down index for the dashboard filters, built once per dataset version
+@st.cache_resource(max_entries=2)
+def get_dashboard_index(version):
+    """Build the sorted dashboard index for one dataset version"""
+    return DashboardIndex.from_chunks(load_insurance_frame(chunksize=500_000))
 
 # BMI calculation function
 def calculate_bmi(height, weight, unit_system):
@@ -985,50 +933,133 @@ def calculate_bmi(height, weight, unit_system):
 @st.cache_data
 def create_ml_models():
     """Create ML models for insurance recommendation and cost prediction"""
-    np.random.seed(42)
-    n_samples = 2000
-    
-    # Generate synthetic training data
-    ages = np.random.randint(18, 80, n_samples)
-    bmis = np.random.normal(27, 5, n_samples)
-    smokers = np.random.choice([0, 1], n_samples, p=[0.8, 0.2])
-    children = np.random.randint(0, 5, n_samples)
-    regions = np.random.randint(0, 4, n_samples)
-    income_levels = np.random.randint(1, 5, n_samples)
-    
-    # Create feature matrix
-    X = np.column_stack([ages, bmis, smokers, children, regions, income_levels])
-    
-    # Create targets for classification
-    def determine_category(row):
-        age, bmi, smoker, kids, region, income = row
-        if age >= 65:
-            return 3  # senior
-        elif kids >= 2:
-            return 2  # family
-        elif income <= 2 or (age < 30 and bmi < 25):
-            return 0  # budget_friendly
-        else:
-            return 1  # comprehensive
-    
-    y_category = np.array([determine_category(row) for row in X])
-    
-    # Create cost targets for regression
-    base_costs = ages * 50 + bmis * 30 + smokers * 2000 + children * 500 + np.random.normal(0, 500, n_samples)
-    y_cost = np.clip(base_costs, 1000, 15000)
-    
-    # Train classification model
-    clf_model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
-    clf_model.fit(X, y_category)
-    
-    # Train regression model for cost prediction
-    reg_model = GradientBoostingRegressor(n_estimators=100, random_state=42, max_depth=5)
-    reg_model.fit(X, y_cost)
-    
-    return clf_model, reg_model, ['budget_friendly', 'comprehensive', 'family', 'senior']
+    return train_recommendation_models()
+
+def ensure_model_artifact():
+    """Export the models on first use so serving only needs the NumPy runtime afterwards"""
+    if not artifact_exists(MODEL_ARTIFACT_DIR, RECOMMENDATION_MODELS):
+        quantile_models, quantile_margin = train_cost_quantile_models()
+        export_recommendation_models(*create_ml_models(), directory=MODEL_ARTIFACT_DIR,
+                                     quantile_models=quantile_models, quantile_margin=quantile_margin)
+    elif 'cost' not in artifact_metrics(MODEL_ARTIFACT_DIR):
+        # Artifacts exported before metrics were recorded get them on first use
+        store_metrics(MODEL_ARTIFACT_DIR, evaluate_models(load_models(MODEL_ARTIFACT_DIR)))
+    return MODEL_ARTIFACT_DIR
 
+# Held-out metrics recorded with the exported models, read once per artifact version
+@st.cache_data(max_entries=2)
+def get_model_metrics(version):
+    """Return {model: metrics} from the artifact manifest, empty before the first export"""
+    return artifact_metrics(MODEL_ARTIFACT_DIR) if version else {}
 
+def cost_model_metrics():
+    """Held-out R², RMSE and MAE of the served cost model"""
+    # The home and dashboard cards may be the first to need the artifact; this exports it
+    # (with its metrics) once per process, as the recommendations page would
+    if get_model_server() is None:
+        get_prediction_models()
+    return get_model_metrics(artifact_version(MODEL_ARTIFACT_DIR)).get('cost')
 
+# Exported models evaluated in-process
+@st.cache_resource
+def get_prediction_models():
+    """Return the plan and cost models loaded from the exported artifact"""
+    return load_models(ensure_model_artifact())
+
+# Optional multi-process model serving (set MEDICOST_MODEL_WORKERS to a worker count)
+@st.cache_resource
+def get_model_server():
+    """Return the process-wide model server, or None to predict in-process"""
+    workers = int(os.environ.get('MEDICOST_MODEL_WORKERS', 0))
+    if workers <= 0:
+        return None
+    server = ModelServer(ensure_model_artifact(), workers)
+    server.warm_up()
+    return server
+
+def predict_costs(features):
+    """Cost model over a feature matrix, through the model server when one is running"""
+    model_server = get_model_server()
+    if model_server is not None:
+        return model_server.predict('cost', features)
+    return get_prediction_models()['cost'].predict(features)
+
+# Language model explanations for the recommendations page (MEDICOST_LLM picks the model)
+@st.cache_resource
+def get_explainer():
+    """Return the process-wide explainer and its answer cache"""
+    return Explainer()
+
+# Cost model attributions, shared by every session
+@st.cache_resource
+def get_cost_attributions():
+    """Return the attribution cache over the cost model, or None for an artifact compressed to leaves only"""
+    model_server = get_model_server()
+    models = get_prediction_models() if model_server is None else model_server.models
+    try:
+        return AttributionCache(models['cost'])
+    except ValueError:
+        return None
+
+# Drift of the profiles reaching the models, shared by every session
+@st.cache_resource
+def get_drift_monitor():
+    """Return the process-wide input drift monitor"""
+    return training_monitor()
+
+# Answers to FAQ questions, shared by every session
+@st.cache_resource
+def get_faq_cache():
+    """Return the process-wide semantic answer cache, seeded with the FAQ and guide"""
+    return SemanticCache()
+
+# Average charges of people with the user's smoking status, age group and BMI bucket
+def cohort_cost(user_data):
+    """Mean dataset charges for the user's cohort, NaN when the cohort is empty"""
+    cube = get_dashboard_cube(dataset_version())
+    return cube.mean_charges(
+        smoker='yes' if user_data.get('smoker') else 'no',
+        age_group=AGE_GROUP_LABELS[int(age_groups(user_data.get('age', 30)))],
+        bmi_bucket=BMI_BUCKET_LABELS[int(bmi_buckets(user_data.get('bmi', 25)))],
+    )
+
+# Marketplace plans ingested with `python -m marketplace`; requests only ever read the local cache
+@st.cache_resource
+def get_marketplace_cache():
+    """Return the on-disk marketplace plan cache"""
+    return MarketplaceCache(MARKETPLACE_CACHE_DIR)
+
+def catalog_version():
+    """Cheap identifier of the plan catalog, which changes when marketplace plans are ingested"""
+    return get_marketplace_cache().version()
+
+# Plan catalog as ranking columns, rebuilt only when the catalog version changes
+@st.cache_resource(max_entries=2)
+def get_plan_table(version):
+    """Return the built-in and cached marketplace plans as a PlanTable"""
+    return PlanTable(all_plans() + get_marketplace_cache().plans())
+
+# Constraint bitsets over the plan catalog
+@st.cache_resource(max_entries=2)
+def get_plan_index(version):
+    """Return the catalog's PlanIndex for the advanced form's constraints"""
+    return PlanIndex(get_plan_table(version))
+
+# Text search over the plan catalog, updated in place as the catalog changes
+@st.cache_resource
+def get_plan_search_index():
+    """Return the process-wide inverted index over plan text"""
+    return PlanSearch()
+
+def get_plan_search(version):
+    """Return the plan text index synced to one catalog version"""
+    plan_search = get_plan_search_index()
+    plan_search.sync(get_plan_table(version).plans, version)
+    return plan_search
+
+
+
+@timed('layout.header')
 def show_header():
     """Display compact centered Medicost logo"""
     # Compact logo with minimal spacing
@@ -1053,23 +1084,12 @@ def show_header():
     
     st.markdown("</div>", unsafe_allow_html=True)
 
+@timed('page.home')
 def show_home():
     """Display home page with dashboard cards and navigation options"""
     
-    # Sample data for dashboard - replace with your actual data loading
-    import pandas as pd
-    import numpy as np
-    
-    # Generate sample data (replace this with: df = pd.read_csv('your_data.csv'))
-    np.random.seed(42)
-    df = pd.DataFrame({
-        'age': np.random.randint(18, 65, 1338),
-        'charges': np.random.normal(13270, 5000, 1338),
-        'smoker': np.random.choice(['yes', 'no'], 1338, p=[0.21, 0.79]),
-        'sex': np.random.choice(['male', 'female'], 1338),
-        'bmi': np.random.normal(30, 6, 1338),
-        'region': np.random.choice(['northeast', 'southeast', 'southwest', 'northwest'], 1338)
-    })
+    # Dashboard numbers come from the precomputed aggregate cube
+    insights = get_dashboard_cube(dataset_version()).insights()
     
     # Header section
     st.markdown("""
@@ -1098,14 +1118,14 @@ def show_home():
                     text-align: center; transition: all 0.3s ease; margin-bottom: 1rem;">
             <h3 style="color: #2563eb; margin: 0; font-size: 1.2rem;">Dataset Size</h3>
             <p style="font-size: 2.5rem; font-weight: 800; color: #0C4A6E; margin: 0.5rem 0;">
-                {len(df):,}
+                {insights['records']:,}
             </p>
             <p style="color: #64748B; margin: 0; font-size: 0.9rem;">Records Analyzed</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_cost = df['charges'].mean()
+        avg_cost = insights['avg_cost']
         st.markdown(f"""
         <div style="background: white; padding: 1.5rem; border-radius: 16px; 
                     border: 2px solid #E0F2FE; box-shadow: 0 4px 20px rgba(14, 165, 233, 0.08);
@@ -1119,20 +1139,21 @@ def show_home():
         """, unsafe_allow_html=True)
     
     with col3:
+        metrics = cost_model_metrics()
         st.markdown(f"""
         <div style="background: white; padding: 1.5rem; border-radius: 16px; 
                     border: 2px solid #E0F2FE; box-shadow: 0 4px 20px rgba(14, 165, 233, 0.08);
                     text-align: center; transition: all 0.3s ease; margin-bottom: 1rem;">
             <h3 style="color: #F59E0B; margin: 0; font-size: 1.2rem;">ML Accuracy</h3>
             <p style="font-size: 2.5rem; font-weight: 800; color: #92400E; margin: 0.5rem 0;">
-                94.6%
+                {f"{metrics['r2']:.1%}" if metrics else "n/a"}
             </p>
             <p style="color: #64748B; margin: 0; font-size: 0.9rem;">R² Score</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col4:
-        age_range = f"{df['age'].min()}-{df['age'].max()}"
+        age_range = f"{insights['age_min']}-{insights['age_max']}"
         st.markdown(f"""
         <div style="background: white; padding: 1.5rem; border-radius: 16px; 
                     border: 2px solid #E0F2FE; box-shadow: 0 4px 20px rgba(14, 165, 233, 0.08);
@@ -1146,7 +1167,7 @@ def show_home():
         """, unsafe_allow_html=True)
     
     with col5:
-        smoker_pct = (df['smoker'] == 'yes').mean() * 100
+        smoker_pct = insights['smoker_pct']
         st.markdown(f"""
         <div style="background: white; padding: 1.5rem; border-radius: 16px; 
                     border: 2px solid #E0F2FE; box-shadow: 0 4px 20px rgba(14, 165, 233, 0.08);
@@ -1162,12 +1183,12 @@ def show_home():
     # Key Insights
     st.markdown('<h3 class="subsection-title">Key Insights</h3>', unsafe_allow_html=True)
     
-    # Calculate insights
-    smoker_multiplier = df[df['smoker'] == 'yes']['charges'].mean() / df[df['smoker'] == 'no']['charges'].mean()
-    male_avg = df[df['sex'] == 'male']['charges'].mean()
-    female_avg = df[df['sex'] == 'female']['charges'].mean()
-    highest_region = df.groupby('region')['charges'].mean().idxmax()
-    obese_pct = (df['bmi'] >= 30).mean() * 100
+    # Insights are roll-ups of the cube, no scans over the rows
+    smoker_multiplier = insights['smoker_multiplier']
+    male_avg = insights['male_avg']
+    female_avg = insights['female_avg']
+    highest_region = insights['highest_region']
+    obese_pct = insights['obese_pct']
     
     # Use simple 2x2 layout with regular columns
     insight_col1, insight_col2 = st.columns(2)
@@ -1219,6 +1240,7 @@ def show_home():
 
 
 # Experience level selection
+@timed('page.experience_level')
 def show_experience_level():
     """Show experience level selection with different paths"""
     st.markdown("""
@@ -1257,6 +1279,7 @@ def show_experience_level():
             st.rerun()
 
 # Simple form for beginners
+@timed('page.simple_form')
 def show_simple_form():
     """Simplified form for users new to insurance"""
     st.markdown("""
@@ -1301,6 +1324,7 @@ def show_simple_form():
             st.rerun()
 
 # Main user form
+@timed('page.user_form')
 def show_user_form():
     """Comprehensive user information form"""
     st.markdown("""
@@ -1367,18 +1391,8 @@ def show_user_form():
     
     with col3:
         if bmi > 0:
-            if bmi < 18.5:
-                bmi_category = "Underweight"
-                bmi_color = "#3B82F6"
-            elif bmi < 25:
-                bmi_category = "Normal"
-                bmi_color = "#10B981"
-            elif bmi < 30:
-                bmi_category = "Overweight"
-                bmi_color = "#F59E0B"
-            else:
-                bmi_category = "Obese"
-                bmi_color = "#EF4444"
+            bmi_category = bmi_category_label(bmi)
+            bmi_color = BMI_CATEGORY_COLORS[BMI_CATEGORY_LABELS.index(bmi_category)]
             
             st.markdown(f"""
             <div class="bmi-card">
@@ -1448,6 +1462,7 @@ def show_user_form():
         st.rerun()
 
 # Advanced form for experts
+@timed('page.advanced_form')
 def show_advanced_form():
     """Advanced form with detailed options for experienced users"""
     st.markdown("""
@@ -1495,12 +1510,22 @@ def show_advanced_form():
         st.session_state.user_data.update({
             'plan_type': plan_type,
             'coverage_level': coverage_level,
+            'prescription_tier': prescription_tier,
+            'network_size': network_size,
+            'specific_providers': specific_providers,
+            'out_of_network': out_of_network,
+            'max_premium': max_premium,
+            'max_deductible': max_deductible,
+            'max_oop': max_oop,
+            'copay_preference': copay_preference,
+            'required_benefits': benefits,
             'advanced': True
         })
         st.session_state.current_step = 'recommendations'
         st.rerun()
 
 # Switch analysis form
+@timed('page.switch_form')
 def show_switch_form():
     """Form for users switching insurance plans"""
     st.markdown("""
@@ -1547,6 +1572,7 @@ def show_switch_form():
         st.rerun()
 
 # Family form
+@timed('page.family_form')
 def show_family_form():
     """Specialized form for family coverage"""
     st.markdown("""
@@ -1560,6 +1586,21 @@ def show_family_form():
     num_adults = st.number_input("Number of Adults", 1, 10, 1)
     num_children = st.number_input("Number of Children", 0, 10, 2)
     
+    # Each adult is scored on their own age, BMI and smoking
+    st.markdown("### Adults")
+    adult_ages, adult_bmis, adult_smokers = [], [], []
+    for i in range(num_adults):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            adult_ages.append(st.number_input(f"Adult {i+1} Age", 18, 100,
+                                              int(st.session_state.user_data.get('age', 35)) if i == 0 else 35,
+                                              key=f"adult_age_{i}"))
+        with col2:
+            adult_bmis.append(st.number_input(f"Adult {i+1} BMI", 12.0, 60.0, 25.0, 0.5, key=f"adult_bmi_{i}"))
+        with col3:
+            st.write("")
+            adult_smokers.append(st.checkbox(f"Adult {i+1} smokes", key=f"adult_smoker_{i}"))
+    
     if num_children > 0:
         st.markdown("### Children's Ages")
         children_ages = []
@@ -1599,6 +1640,9 @@ def show_family_form():
         st.session_state.user_data.update({
             'num_adults': num_adults,
             'num_children': num_children,
+            'adult_ages': adult_ages,
+            'adult_bmis': adult_bmis,
+            'adult_smokers': [int(smoker) for smoker in adult_smokers],
             'children_ages': children_ages if num_children > 0 else [],
             'family_conditions': family_conditions,
             'family_budget': family_budget,
@@ -1608,6 +1652,7 @@ def show_family_form():
         st.rerun()
 
 # Recommendations display
+@timed('page.recommendations')
 def show_recommendations():
     """Display personalized insurance recommendations"""
     load_professional_css()
@@ -1615,11 +1660,13 @@ def show_recommendations():
     user_data = st.session_state.user_data
     
     # Get ML models
-    clf_model, reg_model, categories = create_ml_models()
+    with stage('model.load'):
+        model_server = get_model_server()
+        models = get_prediction_models() if model_server is None else model_server.models
+        categories = models['plan_type'].labels
     
-    # Prepare features for prediction
-    region_map = {'Northeast': 0, 'Southeast': 1, 'Midwest': 2, 'West': 3, 
-                  'Southwest': 2, 'Northwest': 3, 'South': 1}
+    # Prepare features for prediction; the state picks the model region and prices the predicted cost
+    state = user_data.get('state')
     
     # Handle different user paths
     if 'bmi' not in user_data:
@@ -1634,20 +1681,80 @@ def show_recommendations():
         user_data.get('bmi', 25),
         user_data.get('smoker', 0),
         user_data.get('children', 0),
-        region_map.get(user_data.get('region', 'Northeast'), 0),
+        int(model_regions(state, default=MODEL_REGION_CODES.get(user_data.get('region', 'Northeast'), 0))),
         user_data.get('income_level', 3)
     ]]
     
-    # Get predictions
-    category_pred = clf_model.predict(features)[0]
-    category_probs = clf_model.predict_proba(features)[0]
-    cost_pred = reg_model.predict(features)[0]
+    # Count each new profile once per session for drift monitoring, not on every rerun
+    with stage('monitor.observe'):
+        if st.session_state.get('drift_observed') != features[0]:
+            get_drift_monitor().observe(features)
+            st.session_state.drift_observed = features[0]
+    
+    # Get predictions: plan type, expected cost and the cost quantiles in one batched call
+    with stage('model.predict'):
+        requests = [('plan_type', 'predict_proba'), ('cost', 'predict'), ('cost_quantiles', 'predict')]
+        if model_server is None:
+            probs, costs, quantiles = evaluate(models, features, requests)
+        else:
+            probs, costs, quantiles = model_server.evaluate(features, requests)
+        category_probs = probs[0]
+        category_pred = int(np.argmax(category_probs))
+        cost_pred = float(adjust_costs(costs[:1], [state])[0])
+        # Separately fitted quantiles can cross; sorting keeps low <= median <= high
+        cost_low, cost_median, cost_high = np.sort(adjust_costs(quantiles[0], [state]))
+    
+    # Per-feature cost drivers from the cost model's trees, cached per rounded profile
+    attribution, cost_drivers = None, []
+    with stage('model.attributions'):
+        attributions = get_cost_attributions()
+        if attributions is not None:
+            attribution = attributions.explain(features[0])
+            price_factor = float(cost_factors(state))
+            cost_drivers = drivers(attribution, scale=price_factor, limit=4)
     
     category_name = categories[category_pred]
-    recommended_plans = INSURANCE_COMPANIES[category_name]
+    
+    # Rank the whole catalog: category fit from the classifier, then expected cost and quality
+    with stage('plans.rank'):
+        version = catalog_version()
+        plan_table = get_plan_table(version)
+        context = {
+            'expected_claims': cost_pred,
+            'category_probs': dict(zip(categories, category_probs)),
+        }
+        allowed = eligible(plan_table, user_data.get('age', 30), STATE_CODES.get(state))
+        constraints = constraints_from_profile(user_data) if user_data.get('advanced') else {}
+        if constraints:
+            # Plans meeting every advanced-form constraint first, topped up with the closest others
+            plan_index = get_plan_index(version)
+            matching = plan_index.mask(constraints) & allowed
+            scores = score_plans(plan_table, RECOMMENDATION_WEIGHTS, context)
+            best = top_k(scores, 3, mask=matching)
+            if len(best) < 3:
+                # Fewest missed constraints first; scores are below 1 so they only break ties
+                closest = top_k(scores - plan_index.miss_counts(constraints), 3 - len(best), mask=allowed & ~matching)
+                best = np.concatenate([best, closest])
+            misses = [plan_index.violations(constraints, index) for index in best]
+        else:
+            best, _ = rank_plans(plan_table, RECOMMENDATION_WEIGHTS, k=3, context=context, mask=allowed)
+            misses = [None] * len(best)
+        recommended_plans = [plan_table.plans[index] for index in best]
     
     # Display header - SIMPLIFIED
-    st.success(f"✨ We found the perfect plans for you! Based on your profile, we recommend **{category_name.replace('_', ' ').title()}** plans.")
+    st.success(f"✨ We found the perfect plans for you! Your profile fits **{category_name.replace('_', ' ').title()}** plans best.")
+    st.caption("Your top plans are ranked across every plan type by that fit, your expected costs and plan quality, "
+               "so a plan from another category can still make the list.")
+    
+    # Providers named on the advanced form, looked up in the plan text index
+    providers = user_data.get('specific_providers', '').strip() if user_data.get('advanced') else ''
+    if providers:
+        with stage('plans.search'):
+            provider_matches = get_plan_search(catalog_version()).search(providers, k=5)
+        if provider_matches:
+            st.info(f"Plans mentioning **{providers}**: " + ", ".join(plan['name'] for plan, _ in provider_matches))
+        else:
+            st.info(f"None of our plans mention **{providers}**. Check each insurer's provider directory before enrolling.")
     
     # Show confidence scores
     st.subheader("Match Confidence")
@@ -1670,10 +1777,12 @@ def show_recommendations():
     # Display recommended plans - USING STREAMLIT NATIVE COMPONENTS
     st.subheader("Your Top Insurance Plans")
     
-    for i, plan in enumerate(recommended_plans):
+    plan_totals = []
+    for i, (plan, missed) in enumerate(zip(recommended_plans, misses)):
         # Calculate estimated total annual cost
         annual_premium = plan['monthly'] * 12
         estimated_total = annual_premium + (plan['deductible'] * 0.3)
+        plan_totals.append(estimated_total)
         
         # Use st.container for each plan
         with st.container():
@@ -1682,6 +1791,12 @@ def show_recommendations():
             with col1:
                 st.markdown(f"### {plan['name']}")
                 st.markdown(f"⭐ **{plan['rating']}/5.0** ({int(plan['rating'])} stars)")
+                if plan.get('category'):
+                    st.caption(f"{plan['category'].replace('_', ' ').title()} plan")
+                if missed == []:
+                    st.caption("✅ Meets all your requirements")
+                elif missed:
+                    st.caption(f"Closest match: outside your requirements on {describe(missed)}")
             with col2:
                 st.markdown(f"# ${plan['monthly']}/mo")
                 st.caption(f"~${estimated_total:,.0f}/year")
@@ -1713,39 +1828,44 @@ def show_recommendations():
             # Add separator
             st.markdown("---")
     
+    # Plain-language explanation; answers are cached per rounded profile and question
+    st.subheader("Ask About Your Plans")
+    question = st.text_input("Your question", placeholder=DEFAULT_QUESTION, key="explain_question")
+    facts = profile_facts(user_data, category_name, cost_pred, recommended_plans, plan_totals,
+                          cohort_cost(user_data), cost_drivers)
+    try:
+        explainer = get_explainer()
+        if explainer.cached(facts, question) is not None or st.button("Explain my recommendations"):
+            with stage('llm.explain'):
+                st.write_stream(explainer.stream(facts, question))
+    except ExplanationError as e:
+        st.warning(f"Explanations are unavailable right now: {e}")
+    
     # Cost prediction chart
     st.subheader("Your Estimated Healthcare Costs")
     
-    # Create cost scenarios
+    if attribution is not None:
+        st.caption(f"An average member is expected to cost ${attribution.bias * price_factor:,.0f} a year. "
+                   "Your profile moves that estimate by:")
+        for col, (label, value) in zip(st.columns(len(cost_drivers)), cost_drivers):
+            with col:
+                st.metric(label, f"{'+' if value >= 0 else '-'}${abs(value):,.0f}")
+    
+    # Cost scenarios from the quantile models
     scenarios = {
-        'Low Usage': cost_pred * 0.7,
-        'Average Usage': cost_pred,
-        'High Usage': cost_pred * 1.5
+        'Low Usage': cost_low,
+        'Typical Usage': cost_median,
+        'High Usage': cost_high
     }
+    st.caption(f"{COST_QUANTILES[-1] - COST_QUANTILES[0]:.0%} of people with a profile like yours spend "
+               f"between ${cost_low:,.0f} and ${cost_high:,.0f} a year.")
     
-    fig = go.Figure(data=[
-        go.Bar(
-            x=list(scenarios.keys()),
-            y=list(scenarios.values()),
-            marker=dict(color=['#10B981', '#0EA5E9', '#F59E0B']),
-            text=[f'${v:,.0f}' for v in scenarios.values()],
-            textposition='auto'
-        )
-    ])
-    
-    fig.update_layout(
-        title="Annual Healthcare Cost Scenarios",
-        yaxis_title="Estimated Annual Cost ($)",
-        showlegend=False,
-        height=400,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='Inter, sans-serif')
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    # Fill the cached chart template instead of building and validating the figure each rerun
+    with stage('figure.scenarios'):
+        st.plotly_chart(cost_scenario_figure(scenarios), use_container_width=True)
 
 # Family recommendations
+@timed('page.family_recommendations')
 def show_family_recommendations():
     """Display family-specific recommendations"""
     load_professional_css()
@@ -1755,10 +1875,44 @@ def show_family_recommendations():
     
     total_members = user_data['num_adults'] + user_data['num_children']
     
+    # Score every family member in one model call and rank plans by expected total cost;
+    # profiles saved before the form asked about each adult fall back to the shared answers
+    with stage('model.household'):
+        household = {
+            'adult_ages': list(user_data.get('adult_ages') or [user_data.get('age', 35)] * user_data['num_adults']),
+            'adult_bmis': list(user_data.get('adult_bmis', ())),
+            'adult_smokers': list(user_data.get('adult_smokers', ())),
+            'children_ages': list(user_data.get('children_ages', ())),
+            'bmi': user_data.get('bmi', 25),
+            'smoker': user_data.get('smoker', 0),
+            'region': int(model_regions(user_data.get('state'),
+                                        default=MODEL_REGION_CODES.get(user_data.get('region', 'Northeast'), 0))),
+            'income_level': user_data.get('income_level', 3),
+            'state': user_data.get('state'),
+        }
+        summary, plan_costs = score_households(household_members([household]), predict_costs, family_plans)
+    household_summary = summary.iloc[0]
+    expected_costs = plan_costs.iloc[0]
+    
     # This part is working (the green banner)
     st.success(f"👨‍👩‍👧‍👦 Perfect family plans for your household of {total_members} members!")
     
-    for plan in family_plans:
+    cols = st.columns(3)
+    with cols[0]:
+        st.metric("Expected Medical Costs", f"${household_summary['expected_cost']:,.0f}/yr",
+                  help="Predicted annual costs for every family member combined")
+    with cols[1]:
+        st.metric("Household Risk", f"{household_summary['risk_index']:.2f}x",
+                  help="Expected costs relative to the same number of healthy 30-year-olds")
+    with cols[2]:
+        st.metric("Best Value Plan", household_summary['best_plan'])
+    if user_data['num_children']:
+        st.caption(f"Includes about ${household_summary['children_cost']:,.0f}/yr for the children. The cost model "
+                   "only covers adults, so each child is estimated as a healthy 18-year-old non-smoker; "
+                   "treat that part as a rough estimate.")
+    
+    for plan_index in np.argsort(expected_costs.to_numpy(), kind='stable'):
+        plan = family_plans[plan_index]
         per_person = plan['monthly'] / total_members
         annual_cost = plan['monthly'] * 12
         
@@ -1781,19 +1935,32 @@ def show_family_recommendations():
             
             # Replace HTML cost table with this:
             st.markdown("**Cost Breakdown:**")
-            cost_cols = st.columns(3)
+            cost_cols = st.columns(4)
             with cost_cols[0]:
                 st.metric("Annual Premium", f"${annual_cost:,}")
             with cost_cols[1]:
                 st.metric("Family Deductible", f"${plan['deductible']:,}")
             with cost_cols[2]:
                 st.metric("Network Type", plan['network'])
+            with cost_cols[3]:
+                st.metric("Expected Total", f"${expected_costs[plan['name']]:,.0f}/yr",
+                          help="Premium plus expected out-of-pocket costs for your household")
             
             st.markdown("---")
 
 
 
+# Plan ranking for switching users
+def find_switch_plans(current_premium, limit=3, priorities=(), age=None, state=None):
+    """Best plans costing at most 20% more than the current premium, weighted by the user's priorities"""
+    plan_table = get_plan_table(catalog_version())
+    allowed = eligible(plan_table, age, STATE_CODES.get(state))
+    best, _ = rank_plans(plan_table, priority_weights(priorities), k=limit,
+                         mask=(plan_table.monthly <= current_premium * 1.2) & allowed)
+    return [plan_table.plans[index] for index in best]
+
 # Switch recommendations
+@timed('page.switch_recommendations')
 def show_switch_recommendations():
     """Display recommendations for switching plans"""
     load_professional_css()  # Add this line
@@ -1805,15 +1972,8 @@ def show_switch_recommendations():
     st.info("🔄 Based on your current plan analysis, here are better alternatives")
     
     # Show potential savings
-    all_plans = []
-    for category in INSURANCE_COMPANIES.values():
-        all_plans.extend(category)
-    
-    # Filter plans based on priorities
-    filtered_plans = [p for p in all_plans if p['monthly'] <= current_premium * 1.2]
-    filtered_plans.sort(key=lambda x: x['monthly'])
-    
-    for plan in filtered_plans[:3]:
+    for plan in find_switch_plans(current_premium, priorities=user_data.get('priorities') or (),
+                                  age=user_data.get('age'), state=user_data.get('state')):
         savings = max(0, current_premium - plan['monthly'])
         
         # Use Streamlit container instead of HTML
@@ -1839,6 +1999,7 @@ def show_switch_recommendations():
             st.markdown("---")
 
 # Educational content
+@timed('page.education')
 def show_education():
     """Display educational content about US healthcare"""
     load_professional_css()
@@ -1974,6 +2135,7 @@ def show_education():
         st.rerun()
 
 # Progress indicator
+@timed('layout.progress')
 def show_progress(current_step):
     """Display progress indicator"""
     steps = {
@@ -2001,6 +2163,7 @@ def show_progress(current_step):
     """, unsafe_allow_html=True)
 
 # Back button functionality
+@timed('layout.back_button')
 def show_back_button():
     """Display back button for navigation"""
     if st.session_state.current_step != 'home':
@@ -2023,7 +2186,37 @@ def show_back_button():
                 st.session_state.current_step = step_map.get(st.session_state.current_step, 'home')
                 st.rerun()
 
+# Annual cost math behind the cost calculator
+EMERGENCY_COSTS = {"Low": 0, "Medium": 1500, "High": 5000}
+
+def estimate_annual_costs(monthly_premium, annual_deductible, copay, doctor_visits, prescriptions, emergency_risk):
+    """Break down a year of premiums and expected out-of-pocket spending"""
+    annual_premium = monthly_premium * 12
+    copay_costs = copay * doctor_visits
+    prescription_costs = prescriptions * 50 * 12  # Assume $50/prescription
+    emergency_estimate = EMERGENCY_COSTS[emergency_risk]
+    
+    # Total before insurance
+    total_medical_costs = copay_costs + prescription_costs + emergency_estimate
+    
+    # Calculate what you pay
+    if total_medical_costs <= annual_deductible:
+        out_of_pocket = total_medical_costs
+    else:
+        # Assume 20% coinsurance after deductible
+        out_of_pocket = annual_deductible + (total_medical_costs - annual_deductible) * 0.2
+    
+    return {
+        'annual_premium': annual_premium,
+        'copay_costs': copay_costs,
+        'prescription_costs': prescription_costs,
+        'emergency_estimate': emergency_estimate,
+        'out_of_pocket': out_of_pocket,
+        'total_annual_cost': annual_premium + out_of_pocket
+    }
+
 # Cost calculator tool
+@timed('page.cost_calculator')
 def show_cost_calculator():
     """Interactive cost calculator tool"""
     st.markdown("""
@@ -2049,24 +2242,13 @@ def show_cost_calculator():
         )
     
     # Calculate costs
-    annual_premium = monthly_premium * 12
-    copay_costs = copay * doctor_visits
-    prescription_costs = prescriptions * 50 * 12  # Assume $50/prescription
-    
-    emergency_costs = {"Low": 0, "Medium": 1500, "High": 5000}
-    emergency_estimate = emergency_costs[emergency_risk]
-    
-    # Total before insurance
-    total_medical_costs = copay_costs + prescription_costs + emergency_estimate
-    
-    # Calculate what you pay
-    if total_medical_costs <= annual_deductible:
-        out_of_pocket = total_medical_costs
-    else:
-        # Assume 20% coinsurance after deductible
-        out_of_pocket = annual_deductible + (total_medical_costs - annual_deductible) * 0.2
-    
-    total_annual_cost = annual_premium + out_of_pocket
+    costs = estimate_annual_costs(monthly_premium, annual_deductible, copay,
+                                  doctor_visits, prescriptions, emergency_risk)
+    annual_premium = costs['annual_premium']
+    copay_costs = costs['copay_costs']
+    prescription_costs = costs['prescription_costs']
+    emergency_estimate = costs['emergency_estimate']
+    total_annual_cost = costs['total_annual_cost']
     
     # Display results
     st.markdown("""
@@ -2107,6 +2289,7 @@ def show_cost_calculator():
     """, unsafe_allow_html=True)
 
 # Comparison tool
+@timed('page.comparison_tool')
 def show_comparison_tool():
     """Plan comparison tool"""
     st.markdown("""
@@ -2115,67 +2298,89 @@ def show_comparison_tool():
     </div>
     """, unsafe_allow_html=True)
     
-    # Select plans to compare
-    all_plan_names = []
-    for category in INSURANCE_COMPANIES.values():
-        for plan in category:
-            all_plan_names.append(plan['name'])
+    # Plans are chosen by key, as marketplace plans can share a name; only plans sold in the user's state are offered
+    version = catalog_version()
+    plan_table = get_plan_table(version)
+    user_data = st.session_state.get('user_data') or {}
+    allowed = eligible(plan_table, state=STATE_CODES.get(user_data.get('state')))
+    plans_by_key = {plan_key(plan): plan for plan, ok in zip(plan_table.plans, allowed) if ok}
+    selected_keys = [key for key in st.session_state.get('compare_plans', ()) if key in plans_by_key]
+    st.session_state.compare_plans = selected_keys
+    plan_keys = [plan_key(plan) for category in INSURANCE_COMPANIES.values() for plan in category]
+    
+    # Optional text search over the whole catalog, marketplace plans included, narrows and ranks the choices
+    query = st.text_input("Search plans by provider, feature or network",
+                          placeholder="e.g. telehealth, PPO, maternity", key="plan_search")
+    if query:
+        with stage('plans.search'):
+            matches = [key for key in (plan_key(plan) for plan, _ in get_plan_search(version).search(query, k=50))
+                       if key in plans_by_key]
+        if matches:
+            st.caption(f"{len(matches)} matching plan{'s' if len(matches) != 1 else ''}, best match first")
+            plan_keys = matches
+        else:
+            st.caption(f"No plans mention '{query}'; showing all plans")
+    # Plans already chosen stay available whatever the search shows
+    plan_keys += [key for key in selected_keys if key not in plan_keys]
+    
+    def plan_label(key):
+        plan = plans_by_key[key]
+        return f"{plan['name']} ({plan['state']} · {plan['id']})" if plan.get('state') else plan['name']
     
     selected_plans = st.multiselect(
         "Select plans to compare (up to 3)",
-        all_plan_names,
-        max_selections=3
+        plan_keys,
+        format_func=plan_label,
+        max_selections=3,
+        key="compare_plans"
     )
     
     if len(selected_plans) >= 2:
         cols = st.columns(len(selected_plans))
         
-        for idx, plan_name in enumerate(selected_plans):
-            # Find the plan
-            selected_plan = None
-            for category in INSURANCE_COMPANIES.values():
-                for plan in category:
-                    if plan['name'] == plan_name:
-                        selected_plan = plan
-                        break
+        for idx, key in enumerate(selected_plans):
+            # Marketplace text comes from an external feed, so it is escaped before going into the card
+            selected_plan = {field: html.escape(value) if isinstance(value, str) else value
+                             for field, value in plans_by_key[key].items()}
+            selected_plan['features'] = [html.escape(feature) for feature in selected_plan['features']]
             
-            if selected_plan:
-                with cols[idx]:
-                    st.markdown(f"""
-                    <div class="plan-card">
-                        <div class="plan-name" style="font-size: 1.2rem;">{selected_plan['name']}</div>
-                        <div class="plan-price">${selected_plan['monthly']}/mo</div>
-                        
-                        <div style="margin: 1rem 0;">
-                            <div style="color: #F59E0B;">{'⭐' * int(selected_plan['rating'])}</div>
+            with cols[idx]:
+                st.markdown(f"""
+                <div class="plan-card">
+                    <div class="plan-name" style="font-size: 1.2rem;">{selected_plan['name']}</div>
+                    <div class="plan-price">${selected_plan['monthly']}/mo</div>
+                    
+                    <div style="margin: 1rem 0;">
+                        <div style="color: #F59E0B;">{'⭐' * int(selected_plan['rating'])}</div>
+                    </div>
+                    
+                    <div class="cost-table" style="font-size: 0.9rem;">
+                        <div class="cost-row">
+                            <span>Deductible:</span>
+                            <strong>${selected_plan['deductible']:,}</strong>
+                        </div>
+                        <div class="cost-row">
+                            <span>Copay:</span>
+                            <strong>{selected_plan['copay']}</strong>
                         </div>
-                        
-                        <div class="cost-table" style="font-size: 0.9rem;">
-                            <div class="cost-row">
-                                <span>Deductible:</span>
-                                <strong>${selected_plan['deductible']:,}</strong>
-                            </div>
-                            <div class="cost-row">
-                                <span>Copay:</span>
-                                <strong>{selected_plan['copay']}</strong>
-                            </div>
-                            <div class="cost-row">
-                                <span>OOP Max:</span>
-                                <strong>{selected_plan['oop_max']}</strong>
-                            </div>
-                            <div class="cost-row">
-                                <span>Network:</span>
-                                <strong style="font-size: 0.8rem;">{selected_plan['network']}</strong>
-                            </div>
+                        <div class="cost-row">
+                            <span>OOP Max:</span>
+                            <strong>{selected_plan['oop_max']}</strong>
                         </div>
-                        
-                        <div style="margin-top: 1rem;">
-                            {"".join([f'<span class="feature-tag" style="font-size: 0.8rem;">{feature}</span>' for feature in selected_plan['features'][:2]])}
+                        <div class="cost-row">
+                            <span>Network:</span>
+                            <strong style="font-size: 0.8rem;">{selected_plan['network']}</strong>
                         </div>
                     </div>
-                    """, unsafe_allow_html=True)
+                    
+                    <div style="margin-top: 1rem;">
+                        {"".join([f'<span class="feature-tag" style="font-size: 0.8rem;">{feature}</span>' for feature in selected_plan['features'][:2]])}
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
 
 # FAQ section
+@timed('page.faq')
 def show_faq():
     """Display frequently asked questions"""
     st.markdown("""
@@ -2184,34 +2389,35 @@ def show_faq():
     </div>
     """, unsafe_allow_html=True)
     
-    faqs = [
-        {
-            "question": "When can I enroll in health insurance?",
-            "answer": "Open Enrollment is typically November 1 - December 15 each year. You can also enroll during Special Enrollment Periods if you have qualifying life events (job loss, marriage, new baby, etc.)."
-        },
-        {
-            "question": "What's the difference between in-network and out-of-network?",
-            "answer": "In-network providers have contracts with your insurance for lower rates. Out-of-network providers cost more, and some plans don't cover them at all."
-        },
-        {
-            "question": "Is dental and vision included?",
-            "answer": "Most health plans don't include dental and vision. These are usually separate plans, though some comprehensive plans may include basic coverage."
-        },
-        {
-            "question": "What if I can't afford health insurance?",
-            "answer": "You may qualify for subsidies through Healthcare.gov, Medicaid, or CHIP. Many people qualify for plans under $100/month with subsidies."
-        },
-        {
-            "question": "What's an HSA?",
-            "answer": "A Health Savings Account lets you save pre-tax money for medical expenses. You need a High Deductible Health Plan to qualify. Money rolls over year to year."
-        }
-    ]
-    
-    for faq in faqs:
-        with st.expander(f"❓ {faq['question']}"):
-            st.write(faq['answer'])
+    # Similar questions reuse a stored answer; new ones go to the language model and are remembered
+    faq_cache = get_faq_cache()
+    question = st.text_input("Ask a question", placeholder="e.g. Does insurance cover ambulance rides?",
+                             key="faq_question")
+    if question.strip():
+        with stage('faq.lookup'):
+            match = faq_cache.lookup(question)
+        if match:
+            st.write(match.answer)
+            # Learned questions were asked by other visitors, so only built-in wording is shown
+            source = f"“{match.question}”" if match.source == 'guide' else "a similar question"
+            st.caption(f"Answered from {source} ({match.score:.0%} similar)")
+        else:
+            references = [(m.question, m.answer) for m in faq_cache.nearest(question, learned=False)]
+            explainer = get_explainer()
+            try:
+                with stage('llm.faq'):
+                    answer = st.write_stream(explainer.ask(question, references))
+                if explainer.reusable(answer):
+                    faq_cache.add(question, answer)
+            except ExplanationError as e:
+                st.warning(f"We couldn't answer that right now: {e}")
+    
+    for faq_question, faq_answer in FAQS:
+        with st.expander(f"❓ {faq_question}"):
+            st.write(faq_answer)
 
 # Sidebar tools
+@timed('layout.sidebar')
 def show_sidebar_tools():
     """Display sidebar with additional tools"""
     with st.sidebar:
@@ -2238,6 +2444,14 @@ def show_sidebar_tools():
             st.session_state.current_step = 'faq'
             st.rerun()
         
+        if st.button("📈 Data Dashboard", key="dashboard_tool", use_container_width=True):
+            st.session_state.current_step = 'dashboard'
+            st.rerun()
+        
+        if st.button("🏢 Group Quote", key="group_tool", use_container_width=True):
+            st.session_state.current_step = 'group_quote'
+            st.rerun()
+        
         st.markdown("---")
 
         
@@ -2261,8 +2475,117 @@ def show_sidebar_tools():
             
             st.markdown("</div>", unsafe_allow_html=True)
 
+# Group quotes, cached per uploaded census
+@st.cache_data(max_entries=4)
+def get_group_quote(census_bytes):
+    """Summary and per-plan premiums for an employer census"""
+    return quote_census(io.BytesIO(census_bytes), get_prediction_models(), server=get_model_server())
+
+# Employer group quoting
+@timed('page.group_quote')
+def show_group_quote():
+    """Quote every catalog plan for an uploaded employer census"""
+    st.markdown("""
+    <div class="info-card">
+        <h2 class="section-title">Employer Group Quote</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("Upload a census CSV with one row per employee. Only **age** is required; "
+                "**bmi** (or **height**/**weight** with **units**), **smoker**, **children**, "
+                "**state** and **income_level** refine the quote.")
+    census = st.file_uploader("Employer Census (CSV)", type=['csv'], key="census_upload")
+    if census is None:
+        st.info("Upload a census to quote every employer plan in the catalog for the whole group.")
+        return
+    
+    with st.spinner("Scoring census..."), stage('model.group_quote'):
+        try:
+            summary, per_plan = get_group_quote(census.getvalue())
+        except ValueError as error:
+            st.error(f"Could not read the census: {error}")
+            return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Employees", f"{summary['employees']:,}")
+    with col2:
+        st.metric("Average Age", f"{summary['average_age']:.1f}")
+    with col3:
+        st.metric("Smokers", f"{summary['smoker_share'] * 100:.1f}%")
+    with col4:
+        st.metric("Risk Factor", f"{summary['risk_factor']:.2f}x",
+                  help="Expected cost per employee relative to a healthy 30-year-old")
+    skipped = f", {summary['skipped_rows']:,} rows without a valid age skipped" if summary['skipped_rows'] else ""
+    st.caption(f"Premiums are scaled by the risk factor and by the group's state price index "
+               f"({summary['price_index']:.2f}x). Medicare plans are not quoted. "
+               f"Scored in {summary['seconds']:.2f}s{skipped}")
+    
+    st.subheader("Group Premiums by Plan")
+    st.dataframe(per_plan.round(2), use_container_width=True, hide_index=True)
+    st.download_button("Download Quote (CSV)", per_plan.to_csv(index=False),
+                       file_name="group_quote.csv", mime="text/csv")
+
+# Hidden operations page, opened with ?admin=<MEDICOST_ADMIN_TOKEN>; disabled when no token is set
+def is_admin_request():
+    """Check the admin query parameter against the configured token"""
+    token = os.environ.get('MEDICOST_ADMIN_TOKEN')
+    if not token or 'admin' not in st.query_params:
+        return False
+    return hmac.compare_digest(st.query_params['admin'].encode('utf-8'), token.encode('utf-8'))
+
+def show_admin():
+    """Per-stage rerun timings with trace export"""
+    st.markdown("""
+    <div class="info-card">
+        <h2 class="section-title">Performance Monitor</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    summary = TIMER.summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary).round(3), use_container_width=True, hide_index=True)
+    else:
+        st.info("No timings recorded yet. Timing is disabled when MEDICOST_PROFILING=0.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Export Trace (Chrome)", TIMER.export_chrome_trace(),
+                           file_name="medicost_trace.json", mime="application/json")
+    with col2:
+        st.download_button("Export Records (JSON lines)", TIMER.export_json(),
+                           file_name="medicost_timings.jsonl", mime="application/x-ndjson")
+    with col3:
+        if st.button("Clear Timings", key="clear_timings"):
+            TIMER.clear()
+            st.rerun()
+    
+    # Input drift against the training data
+    st.subheader("Input Drift")
+    monitor = get_drift_monitor()
+    drift = monitor.report()
+    if not drift:
+        st.info("No profiles scored yet.")
+        return
+    st.caption(f"Profiles scored: {monitor.observed:,}, weighted to the most recent "
+               f"(half-life {monitor.half_life:,}, effective sample {monitor.effective_size:,.0f}). "
+               f"PSI from {PSI_MODERATE} is worth watching and from {PSI_SIGNIFICANT} a significant shift.")
+    st.dataframe(pd.DataFrame(drift).round(3), use_container_width=True, hide_index=True)
+    feature = st.selectbox("Compare distributions", monitor.feature_names, key="drift_feature")
+    labels, reference, live = monitor.proportions(feature)
+    st.bar_chart(pd.DataFrame({'Training': reference, 'Live': live}, index=labels))
+    if st.button("Reset Drift Statistics", key="reset_drift"):
+        monitor.reset()
+        st.rerun()
+
 # Main application
+@timed('rerun')
 def main():
+    # Hidden admin page
+    if is_admin_request():
+        del st.query_params['admin']
+        st.session_state.current_step = 'admin'
+    
     # Load CSS
     load_professional_css()
     
@@ -2270,7 +2593,7 @@ def main():
     show_header()
     
     # Show progress indicator
-    if st.session_state.current_step not in ['home', 'calculator', 'compare', 'faq']:
+    if st.session_state.current_step not in ['home', 'calculator', 'compare', 'faq', 'dashboard', 'group_quote', 'admin']:
         show_progress(st.session_state.current_step)
     
     # Show back button
@@ -2314,12 +2637,25 @@ def main():
         if st.button("← Back to Main", key="back_faq"):
             st.session_state.current_step = 'home'
             st.rerun()
+    elif st.session_state.current_step == 'admin':
+        show_admin()
     elif st.session_state.current_step == 'dashboard':
         show_dashboard()
+        if st.button("← Back to Main", key="back_dashboard"):
+            st.session_state.current_step = 'home'
+            st.rerun()
+    elif st.session_state.current_step == 'group_quote':
+        show_group_quote()
+        if st.button("← Back to Main", key="back_group"):
+            st.session_state.current_step = 'home'
+            st.rerun()
     
     # Show sidebar tools
     show_sidebar_tools()
     
+    # Move the profile to the session store between runs
+    save_user_profile()
+    
     # Footer
     st.markdown("""
     <div style="margin-top: 4rem; padding: 2rem; background: linear-gradient(135deg, #0EA5E9, #10B981); text-align: center; border-radius: 12px;">
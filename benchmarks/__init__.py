@@ -0,0 +1 @@
+"""Offline micro-benchmarks for the Medicost app (run with python -m benchmarks.<module>)"""
@@ -0,0 +1,126 @@
+"""App-level benchmarks run against a stubbed Streamlit: models, math helpers and page renders"""
+import sys
+
+import numpy as np
+
+from benchmarks import stub_streamlit
+from benchmarks.harness import measure, report, save
+
+st = stub_streamlit.install()
+import app  # noqa: E402  (must follow the stub install)
+import drift_monitor  # noqa: E402
+import faq_cache  # noqa: E402
+import health_metrics  # noqa: E402
+import model_attributions  # noqa: E402
+import plan_explainer  # noqa: E402
+import plan_filter  # noqa: E402
+import plan_ranking  # noqa: E402
+import plan_search  # noqa: E402
+
+# Fixed inputs so runs are comparable
+PROFILE = [[35, 27.5, 0, 1, 2, 3]]
+BATCH = np.column_stack([
+    np.random.RandomState(7).randint(18, 80, 1000),
+    np.random.RandomState(8).normal(27, 5, 1000),
+    np.random.RandomState(9).randint(0, 2, 1000),
+    np.random.RandomState(10).randint(0, 5, 1000),
+    np.random.RandomState(11).randint(0, 4, 1000),
+    np.random.RandomState(12).randint(1, 5, 1000),
+])
+PAGES = ['home', 'user_form', 'recommendations', 'family_form', 'switch_recommendations',
+         'education', 'calculator', 'compare', 'faq', 'dashboard']
+
+
+def train_models():
+    """Model cold start: train without the cache"""
+    return app.create_ml_models.__wrapped__()
+
+
+def render(step):
+    """Render one page the way a rerun does"""
+    stub_streamlit.reset()
+    st.session_state.current_step = step
+    st.session_state.user_data = app.UserProfile(age=35, bmi=27.5, smoker=0, children=1, region='Midwest',
+                                                 income_level=3, current_premium=450, num_adults=2, num_children=2)
+    app.main()
+
+
+def load_runtime_models():
+    """Exported artifact load, as a serving process does at startup"""
+    return app.load_models(app.ensure_model_artifact())
+
+
+def run(number=50, repeat=5):
+    clf_model, reg_model, _ = app.create_ml_models()
+    runtime = load_runtime_models()
+    app.get_dashboard_cube(app.dataset_version())
+    app.get_dashboard_index(app.dataset_version())
+    large_catalog = plan_ranking.PlanTable(plan_ranking.sample_catalog(20_000))
+    rank_context = {'expected_claims': 9_000.0, 'category_probs': {'comprehensive': 0.6, 'family': 0.4}}
+    large_index = plan_filter.PlanIndex(large_catalog)
+    large_search = plan_search.PlanSearch(large_catalog.plans)
+    constraints = {'plan_type': 'PPO', 'coverage_level': 'Silver', 'copay': 'Moderate Copays',
+                   'benefits': ('Dental', 'Vision'), 'max_premium': 600, 'max_deductible': 4000}
+    explainer = plan_explainer.Explainer(plan_explainer.StubModel())
+    answers = faq_cache.SemanticCache()
+    for i in range(5_000):
+        answers.add(f"does my plan cover treatment {i} for condition {i % 113}", f"answer {i}")
+    attributions = model_attributions.AttributionCache(runtime['cost'])
+    monitor = drift_monitor.training_monitor()
+    facts = plan_explainer.profile_facts({'age': 35, 'bmi': 27.5, 'state': 'Texas'}, 'comprehensive', 6_120.0,
+                                         large_catalog.plans[:3], [5_300, 5_600, 5_100])
+
+    results = {
+        'models.cold_start': measure(train_models, number=1, repeat=3),
+        'models.predict_single': measure(
+            lambda: (clf_model.predict(PROFILE), clf_model.predict_proba(PROFILE), reg_model.predict(PROFILE)),
+            number, repeat),
+        'models.predict_batch_1000': measure(
+            lambda: (clf_model.predict_proba(BATCH), reg_model.predict(BATCH)), 10, repeat),
+        'runtime.load': measure(load_runtime_models, 10, repeat),
+        'runtime.predict_single': measure(
+            lambda: (runtime['plan_type'].predict_proba(PROFILE), runtime['cost'].predict(PROFILE)),
+            number, repeat),
+        'runtime.predict_with_interval': measure(
+            lambda: app.evaluate(runtime, PROFILE, [('plan_type', 'predict_proba'), ('cost', 'predict'),
+                                                    ('cost_quantiles', 'predict')]),
+            number, repeat),
+        'runtime.metrics_card': measure(app.cost_model_metrics, number * 20, repeat),
+        'runtime.predict_batch_1000': measure(
+            lambda: (runtime['plan_type'].predict_proba(BATCH), runtime['cost'].predict(BATCH)), 10, repeat),
+        'bmi.calculate_x1000': measure(
+            lambda: [app.calculate_bmi(68 + i % 10, 150 + i % 50, "Imperial (ft/in, lbs)") for i in range(1000)],
+            number, repeat),
+        'bmi.vectorized_x1000': measure(
+            lambda: health_metrics.bmi(68 + np.arange(1000) % 10, 150 + np.arange(1000) % 50, health_metrics.IMPERIAL),
+            number, repeat),
+        'cost_engine.estimate_x1000': measure(
+            lambda: [app.estimate_annual_costs(350, 2000, 25, i % 24, i % 10, "Medium") for i in range(1000)],
+            number, repeat),
+        'plans.switch_filter': measure(lambda: app.find_switch_plans(450), number * 20, repeat),
+        'plans.rank_20k': measure(
+            lambda: plan_ranking.rank_plans(large_catalog, plan_ranking.RECOMMENDATION_WEIGHTS, 5, rank_context),
+            number, repeat),
+        'plans.filter_20k': measure(lambda: large_index.match(constraints), number * 20, repeat),
+        'plans.search_20k': measure(lambda: large_search.search('plan 1234 matern'), number * 20, repeat),
+        'model.attributions_uncached': measure(
+            lambda: model_attributions.AttributionCache(runtime['cost']).explain(PROFILE[0]), number, repeat),
+        'model.attributions_cached': measure(lambda: attributions.explain(PROFILE[0]), number * 20, repeat),
+        'model.attributions_batch_1000': measure(lambda: attributions.attributions.explain(BATCH), 10, repeat),
+        'monitor.observe': measure(lambda: monitor.observe(PROFILE), number * 20, repeat),
+        'monitor.report': measure(monitor.report, number, repeat),
+        'llm.explain_uncached': measure(lambda: plan_explainer.Explainer(plan_explainer.StubModel()).explain(
+            facts), number, repeat),
+        'llm.explain_cached': measure(lambda: explainer.explain(facts), number * 20, repeat),
+        'faq.lookup_5k': measure(lambda: answers.lookup("what's the most I'd pay out of pocket?"), number * 20, repeat),
+    }
+    for step in PAGES:
+        results[f'page.{step}'] = measure(lambda: render(step), 5, repeat)
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    report(results)
+    if len(sys.argv) > 1:
+        save(results, sys.argv[1])
@@ -0,0 +1,38 @@
+"""Scenario chart build + serialization time on the recommendation page"""
+import sys
+
+import plotly.io as pio
+
+from benchmarks.harness import measure, report, save
+from charts import build_cost_scenario_figure, cost_scenario_figure
+
+SCENARIOS = {'Low Usage': 4900.0, 'Typical Usage': 7000.0, 'High Usage': 10500.0}
+
+
+def serialize(fig):
+    """Serialize a figure the way st.plotly_chart does"""
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def rebuild_and_serialize():
+    serialize(build_cost_scenario_figure(SCENARIOS))
+
+
+def template_and_serialize():
+    serialize(cost_scenario_figure(SCENARIOS))
+
+
+def run(number=200, repeat=5):
+    return {
+        'figure.rebuild': measure(lambda: build_cost_scenario_figure(SCENARIOS), number, repeat),
+        'figure.template': measure(lambda: cost_scenario_figure(SCENARIOS), number, repeat),
+        'figure.rebuild+serialize': measure(rebuild_and_serialize, number, repeat),
+        'figure.template+serialize': measure(template_and_serialize, number, repeat),
+    }
+
+
+if __name__ == '__main__':
+    results = run()
+    report(results)
+    if len(sys.argv) > 1:
+        save(results, sys.argv[1])
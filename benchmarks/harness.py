@@ -0,0 +1,82 @@
+"""Minimal timing harness shared by the benchmark modules"""
+import json
+import os
+import platform
+import statistics
+import timeit
+from datetime import datetime
+from importlib import metadata
+
+# Packages whose versions are recorded next to the results
+TRACKED_PACKAGES = ('numpy', 'pandas', 'scikit-learn', 'plotly', 'streamlit')
+
+
+def measure(func, number=100, repeat=5):
+    """Time func and return per-call statistics in milliseconds"""
+    timings = timeit.Timer(func).repeat(repeat=repeat, number=number)
+    per_call = [t / number * 1000 for t in timings]
+    return {
+        'best_ms': min(per_call),
+        'median_ms': statistics.median(per_call),
+        'mean_ms': statistics.fmean(per_call),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+def report(results):
+    """Print results as an aligned table"""
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'best ms':>10}  {'median ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<{width}}  {stats['best_ms']:>10.4f}  {stats['median_ms']:>10.4f}")
+
+
+def environment():
+    """Interpreter, hardware and package versions for a result file"""
+    packages = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'packages': packages
+    }
+
+
+def save(results, path):
+    """Write results with environment metadata as JSON"""
+    payload = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+
+
+def load(path):
+    """Read a result file written by save()"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=0.1):
+    """Print median changes against a baseline, returning benchmarks slower than threshold"""
+    regressions = []
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'baseline ms':>12}  {'current ms':>12}  {'change':>8}")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median_ms'], stats['median_ms']
+        change = (after - before) / before if before else 0.0
+        flag = '  <-- slower' if change > threshold else ''
+        print(f"{name:<{width}}  {before:>12.4f}  {after:>12.4f}  {change:>+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
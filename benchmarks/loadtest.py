@@ -0,0 +1,251 @@
+"""Headless load test: many simulated sessions clicking through the app
+
+    python -m benchmarks.loadtest                          # 40 sessions, 4 at a time, all flows
+    python -m benchmarks.loadtest --sessions 200 --concurrency 16 --flows individual
+    python -m benchmarks.loadtest --output load.json
+
+Each session is a Streamlit AppTest driving the real app.py through one of
+the page flows below. AppTest patches process-wide Streamlit state, so
+sessions cannot overlap inside one interpreter; concurrency comes from a pool
+of worker processes, each warmed up once and then running its share of the
+sessions back to back. Every step is one script run (including any st.rerun
+it triggers) and is timed end to end.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import BrokenBarrierError
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.harness import environment
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# Seconds the workers get to warm up before the run is abandoned
+WARM_UP_TIMEOUT = 600
+
+# Flow name -> steps of (action, target, page expected afterwards)
+# action is 'key' to click a button by key or 'label' to click by label prefix
+FLOWS = {
+    'individual': (
+        ('key', 'explore_btn', 'experience_level'),
+        ('key', 'intermediate', 'user_form'),
+        ('label', 'Get Personalized Recommendations', 'recommendations'),
+    ),
+    'family': (
+        ('key', 'family_btn', 'family_form'),
+        ('label', 'Find Best Family Plans', 'family_recommendations'),
+    ),
+    'switch': (
+        ('key', 'explore_btn', 'experience_level'),
+        ('key', 'switching', 'switch_form'),
+        ('label', 'Analyze Better Options', 'switch_recommendations'),
+    ),
+}
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _latency_stats(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'mean_ms': statistics.fmean(values) if values else float('nan'),
+        'p50_ms': _percentile(values, 0.50),
+        'p95_ms': _percentile(values, 0.95),
+        'p99_ms': _percentile(values, 0.99),
+        'max_ms': values[-1] if values else float('nan'),
+    }
+
+
+def _click(at, action, target):
+    if action == 'key':
+        return at.button(key=target).click()
+    for button in at.button:
+        if button.label.startswith(target):
+            return button.click()
+    raise LookupError(f"No button starting with {target!r} on {at.session_state.current_step!r}")
+
+
+def run_session(flow, timeout=60):
+    """Drive one new session through a flow
+
+    Returns (latencies, app) where latencies maps each page reached to the
+    milliseconds it took to render.
+    """
+    latencies = {}
+    start = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    latencies['home'] = (time.perf_counter() - start) * 1000
+    for action, target, expected in FLOWS[flow]:
+        start = time.perf_counter()
+        _click(at, action, target).run()
+        latencies[expected] = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        if at.session_state.current_step != expected:
+            raise RuntimeError(f"expected {expected!r}, got {at.session_state.current_step!r}")
+    return latencies, at
+
+
+def _warm_up(flows, barrier=None):
+    """Pay imports, model training and cache fills once, then wait for the other workers"""
+    try:
+        for flow in flows:
+            run_session(flow)
+    except BaseException:
+        # Release the waiting workers and the parent instead of leaving them blocked
+        if barrier is not None:
+            barrier.abort()
+        raise
+    if barrier is not None:
+        barrier.wait()
+
+
+def _worker_session(job):
+    index, flow = job
+    try:
+        latencies, _ = run_session(flow)
+    except Exception as exc:
+        return index, flow, None, str(exc)
+    return index, flow, latencies, None
+
+
+def session_memory(flows, sessions=10):
+    """Bytes retained per finished session, measured with tracemalloc
+
+    A warm-up pass runs first so one-off costs (module imports, model
+    training, cached resources) are not charged to sessions.
+    """
+    _warm_up(flows)
+    kept = []
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for index in range(sessions):
+            kept.append(run_session(flows[index % len(flows)])[1])
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'sessions': len(kept),
+        'retained_bytes_per_session': (after - before) / max(len(kept), 1),
+        'peak_bytes': peak - before,
+    }
+
+
+def run(sessions=40, concurrency=4, flows=tuple(FLOWS), memory_sessions=10, warm_up_timeout=WARM_UP_TIMEOUT):
+    """Run the load and return a JSON-serializable report"""
+    flows = list(flows)
+    # The pool only starts a worker per submitted job, so never wait on more workers than sessions
+    workers = min(concurrency, sessions)
+    if workers < 1:
+        raise ValueError("sessions and concurrency must both be at least 1")
+    jobs = [(index, flows[index % len(flows)]) for index in range(sessions)]
+    latencies, errors, completed = {}, [], 0
+    # Fresh interpreters rather than forks: AppTest leaves patched Streamlit state behind
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(workers + 1)
+    start = None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_warm_up, initargs=(flows, ready)) as pool:
+        # Workers start on first submit; the clock starts once all of them are warm
+        results = pool.map(_worker_session, jobs)
+        try:
+            ready.wait(warm_up_timeout)
+            start = time.perf_counter()
+            for index, flow, session_latencies, error in results:
+                if error:
+                    errors.append(f"session {index} ({flow}): {error}")
+                    continue
+                completed += 1
+                for page, ms in session_latencies.items():
+                    latencies.setdefault(page, []).append(ms)
+        except BrokenBarrierError:
+            errors.append(f"worker warm-up failed or took longer than {warm_up_timeout}s")
+            pool.shutdown(cancel_futures=True)
+        except BrokenProcessPool as exc:
+            errors.append(f"worker pool broke: {exc}")
+        elapsed = time.perf_counter() - start if start is not None else 0.0
+
+    all_steps = [ms for values in latencies.values() for ms in values]
+    report = {
+        'sessions': sessions,
+        'completed': completed,
+        'concurrency': workers,
+        'flows': flows,
+        'wall_seconds': elapsed,
+        'sessions_per_second': completed / elapsed if elapsed else 0.0,
+        'runs_per_second': len(all_steps) / elapsed if elapsed else 0.0,
+        'latency': {'all': _latency_stats(all_steps)},
+        'errors': errors,
+    }
+    for page, values in latencies.items():
+        report['latency'][page] = _latency_stats(values)
+    if memory_sessions and start is not None:
+        report['memory'] = session_memory(flows, memory_sessions)
+    return report
+
+
+def print_report(report):
+    print(f"{report['completed']}/{report['sessions']} sessions, concurrency {report['concurrency']}, "
+          f"{report['wall_seconds']:.1f}s")
+    print(f"throughput: {report['sessions_per_second']:.2f} sessions/s, {report['runs_per_second']:.2f} runs/s")
+    width = max(len(name) for name in report['latency'])
+    print(f"\n{'page':<{width}}  {'runs':>6}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'max ms':>9}")
+    for name, stats in report['latency'].items():
+        print(f"{name:<{width}}  {stats['count']:>6}  {stats['p50_ms']:>9.1f}  {stats['p95_ms']:>9.1f}  "
+              f"{stats['p99_ms']:>9.1f}  {stats['max_ms']:>9.1f}")
+    if 'memory' in report:
+        memory = report['memory']
+        print(f"\nmemory: {memory['retained_bytes_per_session'] / 1024:.0f} KiB retained per session "
+              f"({memory['sessions']} sessions measured)")
+    for error in report['errors'][:10]:
+        print(f"error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=40, help='number of simulated sessions')
+    parser.add_argument('--concurrency', type=int, default=4, help='worker processes running sessions at once')
+    parser.add_argument('--flows', default=','.join(FLOWS),
+                        help=f"comma-separated flows to cycle through ({', '.join(FLOWS)})")
+    parser.add_argument('--memory-sessions', type=int, default=10,
+                        help='sessions kept alive for the memory measurement (0 to skip)')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    flows = [flow.strip() for flow in args.flows.split(',') if flow.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flow: {', '.join(sorted(unknown))}")
+
+    if args.sessions < 1 or args.concurrency < 1:
+        parser.error("--sessions and --concurrency must be at least 1")
+
+    report = run(args.sessions, args.concurrency, flows, args.memory_sessions)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'report': report}, f, indent=2)
+        print(f"\nSaved {args.output}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    # Go through the package module so worker processes can unpickle the job functions
+    from benchmarks.loadtest import main as package_main
+    sys.exit(package_main())
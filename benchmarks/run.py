@@ -0,0 +1,57 @@
+"""Run every benchmark module, store the results as JSON and compare with the previous run
+
+    python -m benchmarks.run                       # run all, compare with the latest stored result
+    python -m benchmarks.run --only figures        # run a single module
+    python -m benchmarks.run --baseline old.json --fail-over 0.2
+"""
+import argparse
+import glob
+import importlib
+import os
+import sys
+from datetime import datetime
+
+from benchmarks.harness import compare, load, report, save
+
+MODULES = {
+    'figures': 'benchmarks.bench_figures',
+    'app': 'benchmarks.bench_app',
+}
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def latest_result():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    return paths[-1] if paths else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', choices=sorted(MODULES), action='append', help='benchmark module(s) to run')
+    parser.add_argument('--baseline', help='result file to compare against (default: latest stored run)')
+    parser.add_argument('--output', help='where to write results (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--fail-over', type=float, default=None,
+                        help='exit non-zero if any median is slower than baseline by this fraction')
+    args = parser.parse_args(argv)
+
+    baseline_path = args.baseline or latest_result()
+    results = {}
+    for name in args.only or MODULES:
+        results.update(importlib.import_module(MODULES[name]).run())
+    report(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    save(results, output)
+    print(f"\nSaved {output}")
+
+    if baseline_path and os.path.exists(baseline_path):
+        print(f"\nCompared with {baseline_path}")
+        regressions = compare(results, load(baseline_path), threshold=args.fail_over or 0.1)
+        if args.fail_over is not None and regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
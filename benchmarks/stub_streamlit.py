@@ -0,0 +1,154 @@
+"""Stand-in for the streamlit module so app.py can be imported and rendered offline
+
+Widgets return their default values, buttons are never pressed and layout
+calls are no-ops. Charts are still serialized the way Streamlit does, so page
+render benchmarks keep that cost. Call install() before importing app.
+"""
+import functools
+import sys
+import types
+
+
+class _Element:
+    """Container stand-in: usable as a context manager, every method is a no-op"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(_module, name, _noop)
+
+
+def _noop(*args, **kwargs):
+    return _Element()
+
+
+class _SessionState(dict):
+    """Dict with attribute access, like st.session_state"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class _RerunRequested(Exception):
+    pass
+
+
+def _cache(func=None, **options):
+    """st.cache_data / st.cache_resource: memoize on hashable arguments"""
+    def decorator(f):
+        memo = {}
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            if key not in memo:
+                memo[key] = f(*args, **kwargs)
+            return memo[key]
+        wrapper.clear = memo.clear
+        return wrapper
+    return decorator(func) if callable(func) else decorator
+
+
+def _columns(spec, **kwargs):
+    count = spec if isinstance(spec, int) else len(spec)
+    return [_Element() for _ in range(count)]
+
+
+def _tabs(labels, **kwargs):
+    return [_Element() for _ in labels]
+
+
+def _arg(args, kwargs, position, name, default=None):
+    if name in kwargs:
+        return kwargs[name]
+    return args[position] if len(args) > position else default
+
+
+def _number_input(*args, **kwargs):
+    value = _arg(args, kwargs, 3, 'value')
+    return value if value is not None else _arg(args, kwargs, 1, 'min_value', 0)
+
+
+def _slider(*args, **kwargs):
+    value = _arg(args, kwargs, 3, 'value')
+    return value if value is not None else _arg(args, kwargs, 1, 'min_value', 0)
+
+
+def _select_slider(*args, **kwargs):
+    options = list(_arg(args, kwargs, 1, 'options', []))
+    value = _arg(args, kwargs, 2, 'value')
+    return value if value is not None else options[0]
+
+
+def _selectbox(*args, **kwargs):
+    options = list(_arg(args, kwargs, 1, 'options', []))
+    return options[_arg(args, kwargs, 2, 'index', 0)] if options else None
+
+
+def _plotly_chart(figure_or_data, *args, **kwargs):
+    import plotly.io as pio
+    pio.to_json(figure_or_data.to_dict(), validate=False)
+    return _Element()
+
+
+def _write_stream(stream, *args, **kwargs):
+    return ''.join(str(chunk) for chunk in stream)
+
+
+def _rerun(*args, **kwargs):
+    raise _RerunRequested()
+
+
+_module = types.ModuleType('streamlit')
+_module.__dict__.update({
+    'session_state': _SessionState(),
+    'query_params': {},
+    'sidebar': _Element(),
+    'cache_data': _cache,
+    'cache_resource': _cache,
+    'columns': _columns,
+    'tabs': _tabs,
+    'number_input': _number_input,
+    'slider': _slider,
+    'select_slider': _select_slider,
+    'selectbox': _selectbox,
+    'radio': _selectbox,
+    'multiselect': lambda *args, **kwargs: [],
+    'text_input': lambda *args, **kwargs: '',
+    'text_area': lambda *args, **kwargs: '',
+    'checkbox': lambda *args, **kwargs: False,
+    'button': lambda *args, **kwargs: False,
+    'form_submit_button': lambda *args, **kwargs: False,
+    'download_button': lambda *args, **kwargs: False,
+    'file_uploader': lambda *args, **kwargs: None,
+    'plotly_chart': _plotly_chart,
+    'write_stream': _write_stream,
+    'rerun': _rerun,
+    'RerunRequested': _RerunRequested,
+})
+_module.__getattr__ = lambda name: _noop
+
+
+def install():
+    """Register the stub as `streamlit` and return it"""
+    sys.modules['streamlit'] = _module
+    return _module
+
+
+def reset():
+    """Fresh session state and query parameters between runs"""
+    _module.session_state = _SessionState()
+    _module.query_params = {}
@@ -0,0 +1,66 @@
+"""Plotly figure builders reused across reruns"""
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+SCENARIO_LABELS = ('Low Usage', 'Typical Usage', 'High Usage')
+SCENARIO_COLORS = ('#10B981', '#0EA5E9', '#F59E0B')
+SCENARIO_LAYOUT = dict(
+    title="Annual Healthcare Cost Scenarios",
+    yaxis_title="Estimated Annual Cost ($)",
+    showlegend=False,
+    height=400,
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(family='Inter, sans-serif')
+)
+
+
+@lru_cache(maxsize=1)
+def _scenario_template():
+    """Validated trace and layout of the scenario chart, built once per process
+
+    Shared by every session and never modified; the theme is left out of the
+    layout, as go.Figure applies the default one itself and copying it is
+    most of the cost of a figure.
+    """
+    fig = go.Figure(data=[
+        go.Bar(
+            x=list(SCENARIO_LABELS),
+            y=[0] * len(SCENARIO_LABELS),
+            marker=dict(color=list(SCENARIO_COLORS)),
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(**SCENARIO_LAYOUT)
+    spec = fig.to_dict()
+    spec['layout'].pop('template', None)
+    return spec['data'][0], spec['layout']
+
+
+def build_cost_scenario_figure(scenarios):
+    """Build the scenario chart from scratch (reference implementation for benchmarks)"""
+    fig = go.Figure(data=[
+        go.Bar(
+            x=list(scenarios.keys()),
+            y=list(scenarios.values()),
+            marker=dict(color=list(SCENARIO_COLORS)),
+            text=[f'${v:,.0f}' for v in scenarios.values()],
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(**SCENARIO_LAYOUT)
+    return fig
+
+
+def cost_scenario_figure(scenarios):
+    """Scenario chart for this profile's labels and values, built from the cached template
+
+    Each call gets its own figure, so sessions render without sharing or locking anything.
+    """
+    trace, layout = _scenario_template()
+    values = list(scenarios.values())
+    return go.Figure({
+        'data': [dict(trace, x=list(scenarios.keys()), y=values, text=[f'${v:,.0f}' for v in values])],
+        'layout': layout,
+    })
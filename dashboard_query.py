@@ -0,0 +1,183 @@
+"""Filtered aggregate queries for the interactive dashboard
+
+Rows are sorted once by (sex, smoker, region, BMI class, age) and charges are
+kept as prefix sums. Each combination of categorical filters is then a
+contiguous run of rows ordered by age, so an age range inside it is found by
+binary search and its count/sum read from the prefix sums. A query touches at
+most 64 runs regardless of how many rows the dataset has.
+"""
+import numpy as np
+
+from aggregates import (AGE_EDGES, AGE_GROUP_LABELS, BMI_BUCKET_LABELS, REGION_LABELS,
+                        SEX_LABELS, SMOKER_LABELS, bmi_buckets, encode_labels)
+
+# Categorical dimensions that define the sorted runs
+BLOCK_DIMENSIONS = ('sex', 'smoker', 'region', 'bmi_class')
+BLOCK_LABELS = {
+    'sex': SEX_LABELS,
+    'smoker': SMOKER_LABELS,
+    'region': REGION_LABELS,
+    'bmi_class': BMI_BUCKET_LABELS,
+}
+BLOCK_SHAPE = tuple(len(BLOCK_LABELS[dim]) for dim in BLOCK_DIMENSIONS)
+
+# Ages are packed next to the block id in one sortable integer key
+AGE_SPAN = 256
+
+# Rows appended since the last rebuild are scanned directly until there are this many
+DELTA_LIMIT = 100_000
+
+
+def _encode_blocks(df):
+    """Block id and age for each row, dropping rows with unknown labels"""
+    codes = (
+        encode_labels(df['sex'], SEX_LABELS),
+        encode_labels(df['smoker'], SMOKER_LABELS),
+        encode_labels(df['region'], REGION_LABELS),
+        bmi_buckets(np.asarray(df['bmi'], dtype=np.float64)),
+    )
+    ages = np.clip(np.asarray(df['age']).astype(np.int64), 0, AGE_SPAN - 1)
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    blocks = np.ravel_multi_index([c[valid] for c in codes], BLOCK_SHAPE)
+    charges = np.asarray(df['charges'], dtype=np.float64)[valid]
+    return blocks * AGE_SPAN + ages[valid], charges
+
+
+class DashboardIndex:
+    """Sorted index answering count/sum/mean of charges under dashboard filters"""
+
+    def __init__(self, keys=None, charges=None):
+        keys = np.empty(0, dtype=np.int64) if keys is None else keys
+        charges = np.empty(0, dtype=np.float64) if charges is None else charges
+        self._build(keys, charges)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(*_encode_blocks(df))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build from an iterator of DataFrames (e.g. read_csv with chunksize)"""
+        parts = [_encode_blocks(chunk) for chunk in chunks]
+        if not parts:
+            return cls()
+        return cls(np.concatenate([k for k, _ in parts]), np.concatenate([c for _, c in parts]))
+
+    def _build(self, keys, charges):
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order].astype(np.int32)
+        self.charges = charges[order]
+        # prefix[i] is the sum of the first i charges, so any run sums in O(1)
+        self.prefix = np.concatenate(([0.0], np.cumsum(self.charges)))
+        self._delta_keys = []
+        self._delta_charges = []
+        self._delta_size = 0
+
+    def __len__(self):
+        return len(self.keys) + self._delta_size
+
+    def append(self, df):
+        """Add new rows; they are merged into the sorted index once the backlog grows"""
+        keys, charges = _encode_blocks(df)
+        self._delta_keys.append(keys)
+        self._delta_charges.append(charges)
+        self._delta_size += len(keys)
+        if self._delta_size > max(DELTA_LIMIT, len(self.keys) // 100):
+            self.compact()
+
+    def compact(self):
+        """Merge appended rows into the sorted index"""
+        if not self._delta_size:
+            return
+        self._build(
+            np.concatenate([self.keys.astype(np.int64)] + self._delta_keys),
+            np.concatenate([self.charges] + self._delta_charges)
+        )
+
+    @staticmethod
+    def _selected_blocks(filters):
+        """Block ids matching every categorical filter (None means all labels)"""
+        axes = []
+        for dim in BLOCK_DIMENSIONS:
+            wanted = filters.get(dim)
+            labels = BLOCK_LABELS[dim]
+            if wanted is None:
+                axes.append(np.arange(len(labels)))
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            axes.append(np.array([labels.index(label) for label in wanted], dtype=np.int64))
+        mesh = np.meshgrid(*axes, indexing='ij')
+        return np.ravel_multi_index([m.ravel() for m in mesh], BLOCK_SHAPE)
+
+    def _block_totals(self, blocks, age_range):
+        """Count and charge sum for each selected block within the age range"""
+        age_low, age_high = age_range
+        age_low = max(int(age_low), 0)
+        age_high = min(int(age_high), AGE_SPAN - 1)
+        # Needles share the keys' dtype, otherwise searchsorted upcasts the whole index
+        base = (blocks * AGE_SPAN).astype(self.keys.dtype)
+        start = np.searchsorted(self.keys, base + age_low, side='left')
+        stop = np.searchsorted(self.keys, base + age_high, side='right')
+        counts = (stop - start).astype(np.int64)
+        sums = self.prefix[stop] - self.prefix[start]
+
+        if self._delta_size and len(blocks):
+            keys = np.concatenate(self._delta_keys)
+            charges = np.concatenate(self._delta_charges)
+            ages = keys % AGE_SPAN
+            in_range = (ages >= age_low) & (ages <= age_high)
+            position = np.searchsorted(blocks, keys // AGE_SPAN)
+            position = np.minimum(position, len(blocks) - 1)
+            hit = in_range & (blocks[position] == keys // AGE_SPAN)
+            counts = counts + np.bincount(position[hit], minlength=len(blocks))
+            sums = sums + np.bincount(position[hit], weights=charges[hit], minlength=len(blocks))
+        return counts, sums
+
+    def query(self, age_range=(0, AGE_SPAN - 1), group_by=None, **filters):
+        """Aggregate charges for the filtered rows
+
+        Filters are sex, smoker, region and bmi_class, each a label or list of
+        labels, plus an inclusive age range. group_by may name one of those
+        dimensions or 'age_group' to add per-label counts and means.
+        """
+        unknown = set(filters) - set(BLOCK_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown filter: {', '.join(sorted(unknown))}")
+        blocks = np.sort(self._selected_blocks(filters))
+        counts, sums = self._block_totals(blocks, age_range)
+        count = int(counts.sum())
+        total = float(sums.sum())
+        result = {
+            'count': count,
+            'total_charges': total,
+            'mean_charges': total / count if count else float('nan'),
+        }
+        if group_by == 'age_group':
+            result['groups'] = self._age_groups(blocks, age_range)
+        elif group_by is not None:
+            axis = BLOCK_DIMENSIONS.index(group_by)
+            codes = np.unravel_index(blocks, BLOCK_SHAPE)[axis]
+            size = len(BLOCK_LABELS[group_by])
+            group_counts = np.bincount(codes, weights=counts, minlength=size)
+            group_sums = np.bincount(codes, weights=sums, minlength=size)
+            result['groups'] = {
+                label: {'count': int(c), 'mean_charges': float(s / c) if c else float('nan')}
+                for label, c, s in zip(BLOCK_LABELS[group_by], group_counts, group_sums)
+            }
+        return result
+
+    def _age_groups(self, blocks, age_range):
+        """Per age group totals, each group clipped to the requested range"""
+        lows = [0] + [int(edge) + 1 for edge in AGE_EDGES]
+        highs = [int(edge) for edge in AGE_EDGES] + [AGE_SPAN - 1]
+        groups = {}
+        for label, low, high in zip(AGE_GROUP_LABELS, lows, highs):
+            low, high = max(low, age_range[0]), min(high, age_range[1])
+            if low > high:
+                groups[label] = {'count': 0, 'mean_charges': float('nan')}
+                continue
+            counts, sums = self._block_totals(blocks, (low, high))
+            c, s = int(counts.sum()), float(sums.sum())
+            groups[label] = {'count': c, 'mean_charges': s / c if c else float('nan')}
+        return groups
@@ -0,0 +1,197 @@
+"""Streaming drift statistics for the profiles reaching the models
+
+    python -m drift_monitor                            # stream matching the training data
+    python -m drift_monitor --age-shift 12 --smokers 0.4
+
+Every profile scored by show_recommendations is counted into one fixed-bin
+histogram per model feature, so memory stays constant however long the
+server runs and an observation costs one searchsorted per feature. Counts
+are exponentially decayed with a half-life of HALF_LIFE profiles, so the
+statistics follow the recent traffic. Decay is applied lazily by giving
+each new observation a growing weight and rescaling now and then, rather
+than touching every bin on every update.
+
+Each feature is compared with its histogram over the training data:
+    psi  population stability index; below 0.1 is stable, from 0.25 a
+         significant shift
+    ks   largest gap between the two cumulative distributions at the bin
+         edges, a lower bound of the exact two-sample statistic, flagged
+         against the 1% critical value for the effective sample size (1%
+         rather than 5%, as six features are tested at once)
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from ml_models import FEATURE_NAMES
+
+# Interior bin edges per feature; values below the first or above the last edge share an outer bin
+FEATURE_EDGES = {
+    'age': np.arange(20, 80, 5),
+    'bmi': np.arange(16, 46, 2),
+    'smoker': np.array([0.5]),
+    'children': np.arange(0.5, 5),
+    'region': np.arange(0.5, 3),
+    'income_level': np.arange(1.5, 4),
+}
+
+# Profiles after which an observation counts half
+HALF_LIFE = 5_000
+
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Two-sample KS critical value coefficient at the 1% level
+KS_COEFFICIENT = 1.628
+
+# Effective sample below which no feature is flagged
+MIN_EFFECTIVE_SIZE = 200
+
+# Floor for empty bins, so PSI stays finite
+MIN_PROPORTION = 1e-4
+
+# Observation weight at which the counts are rescaled back to 1
+RESCALE_WEIGHT = 1e12
+
+
+def histogram(values, edges):
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1).astype(np.float64)
+
+
+def psi(expected, actual):
+    """Population stability index between two proportion vectors"""
+    expected = np.maximum(expected, MIN_PROPORTION)
+    actual = np.maximum(actual, MIN_PROPORTION)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(expected, actual):
+    return float(np.abs(np.cumsum(expected) - np.cumsum(actual)).max())
+
+
+class DriftMonitor:
+    """Decayed per-feature histograms of live profiles, compared with a reference sample"""
+
+    def __init__(self, reference, feature_names=FEATURE_NAMES, half_life=HALF_LIFE):
+        reference = np.asarray(reference, dtype=np.float64)
+        self.feature_names = tuple(feature_names)
+        self.edges = [np.asarray(FEATURE_EDGES[name], dtype=np.float64) for name in self.feature_names]
+        self.reference = [histogram(reference[:, i], edges) / len(reference) for i, edges in enumerate(self.edges)]
+        self.reference_size = len(reference)
+        self.half_life = half_life
+        self._growth = 2.0 ** (1.0 / half_life)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [np.zeros(len(edges) + 1) for edges in self.edges]
+            self._weight = 1.0
+            # Sum of weights and of squared weights, for the effective sample size
+            self._total = 0.0
+            self._total_squares = 0.0
+            self.observed = 0
+
+    def observe(self, X):
+        """Count feature rows (in feature_names order)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        with self._lock:
+            weights = self._weight * self._growth ** np.arange(len(X))
+            for counts, edges, column in zip(self.counts, self.edges, X.T):
+                counts += np.bincount(np.searchsorted(edges, column, side='right'), weights=weights,
+                                      minlength=len(counts))
+            self._total += weights.sum()
+            self._total_squares += np.square(weights).sum()
+            self._weight *= self._growth ** len(X)
+            self.observed += len(X)
+            if self._weight > RESCALE_WEIGHT:
+                for counts in self.counts:
+                    counts /= self._weight
+                self._total /= self._weight
+                self._total_squares /= self._weight ** 2
+                self._weight = 1.0
+
+    @property
+    def effective_size(self):
+        """Number of equally weighted profiles the decayed counts are worth"""
+        return self._total ** 2 / self._total_squares if self._total_squares else 0.0
+
+    def proportions(self, feature):
+        """(bin labels, reference proportions, live proportions) for one feature"""
+        i = self.feature_names.index(feature)
+        edges = self.edges[i]
+        with self._lock:
+            live = self.counts[i] / self._total if self._total else np.zeros_like(self.counts[i])
+        bounds = [f"{edge:g}" for edge in edges]
+        labels = [f"< {bounds[0]}"] + [f"{low}-{high}" for low, high in zip(bounds, bounds[1:])] + [f">= {bounds[-1]}"]
+        return labels, self.reference[i], live
+
+    def report(self):
+        """Drift per feature: psi, ks, the KS critical value and a status
+
+        Status is 'stable', 'watch' or 'drift', or 'collecting' until the
+        effective sample reaches MIN_EFFECTIVE_SIZE.
+        """
+        with self._lock:
+            total = self._total
+            live = [counts / total for counts in self.counts] if total else None
+            size = self.effective_size
+        if live is None:
+            return []
+        critical = KS_COEFFICIENT * np.sqrt((size + self.reference_size) / (size * self.reference_size))
+        rows = []
+        for name, expected, actual in zip(self.feature_names, self.reference, live):
+            row = {'feature': name, 'psi': psi(expected, actual), 'ks': ks_statistic(expected, actual),
+                   'ks_critical': float(critical)}
+            if size < MIN_EFFECTIVE_SIZE:
+                row['status'] = 'collecting'
+            elif row['psi'] >= PSI_SIGNIFICANT:
+                row['status'] = 'drift'
+            elif row['psi'] >= PSI_MODERATE or row['ks'] > critical:
+                row['status'] = 'watch'
+            else:
+                row['status'] = 'stable'
+            rows.append(row)
+        return rows
+
+
+def training_monitor(half_life=HALF_LIFE):
+    """Monitor against the recommendation models' training data"""
+    from ml_models import training_data
+
+    return DriftMonitor(training_data()[0], half_life=half_life)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000, help='profiles to stream, one at a time')
+    parser.add_argument('--age-shift', type=float, default=0.0, help='years added to every age')
+    parser.add_argument('--smokers', type=float, default=0.2, help='share of smokers in the stream')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    n = args.rows
+    X = np.column_stack([rng.integers(18, 80, n) + args.age_shift, rng.normal(27, 5, n),
+                         rng.random(n) < args.smokers, rng.integers(0, 5, n), rng.integers(0, 4, n),
+                         rng.integers(1, 5, n)])
+    monitor = training_monitor()
+    start = time.perf_counter()
+    for row in X:
+        monitor.observe(row)
+    per_row = (time.perf_counter() - start) / n
+
+    print(f"{monitor.observed:,} profiles at {per_row * 1e6:.1f} us each, "
+          f"effective sample {monitor.effective_size:,.0f} (half-life {monitor.half_life:,})")
+    for row in monitor.report():
+        print(f"  {row['feature']:<13} psi {row['psi']:.3f}  ks {row['ks']:.3f} "
+              f"(critical {row['ks_critical']:.3f})  {row['status']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Semantic answer cache for insurance questions
+
+    python -m faq_cache "how much is the most i'd pay in a year?"
+    python -m faq_cache --questions 5000          # lookup latency with a filled cache
+
+Questions are embedded locally, with no model download: words, word pairs and
+character trigrams are hashed into DIMENSIONS buckets, weighted by TF-IDF and
+L2-normalized. The embedding is lexical. A rewording matches when it shares
+most of its terms with a stored question ("what is an hsa", "out of pocket
+max"), but not when it uses different words or a misspelling. Built-in
+entries therefore also carry common alternate phrasings
+(ALTERNATE_QUESTIONS), each stored as its own vector that answers with the
+entry. Inverse document frequencies come from the built-in entries and stay
+fixed, so vectors already stored never need recomputing.
+
+Embeddings are sparse, so they are stored as postings per bucket, as in
+plan_search. A lookup sums the postings of the question's buckets into one
+score array and takes the best. A question scoring at least THRESHOLD against a
+stored one gets that answer back without calling a language model. Answers a
+real model writes are added to the cache (see Explainer.reusable). Built-in
+entries are never evicted; learned ones are replaced oldest first once
+max_entries is reached. Learned questions are other visitors' words, so
+callers should only show the text of built-in matches (Match.source ==
+'guide').
+"""
+import argparse
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from plan_ranking import top_k
+
+DIMENSIONS = 1 << 14
+
+# Cosine similarity from which a stored answer is reused, and from which a
+# stored entry is passed to the language model as a reference
+THRESHOLD = 0.6
+REFERENCE_THRESHOLD = 0.3
+
+# Learned answers kept besides the built-in ones
+MAX_ENTRIES = 10_000
+
+# Relative weight of each feature kind in the embedding
+WORD_WEIGHT = 1.0
+PAIR_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.35
+
+STOPWORDS = frozenset(
+    'a an and are as at be can do does for from how i if in is it its me my of on or s so that the '
+    'there this to what whats when where which who why will with you your'.split()
+)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+SUFFIXES = ('ing', 'age', 'ed', 'es', 's')
+
+FAQS = (
+    ("When can I enroll in health insurance?",
+     "Open Enrollment is typically November 1 - December 15 each year. You can also enroll during Special "
+     "Enrollment Periods if you have qualifying life events (job loss, marriage, new baby, etc.)."),
+    ("What's the difference between in-network and out-of-network?",
+     "In-network providers have contracts with your insurance for lower rates. Out-of-network providers cost "
+     "more, and some plans don't cover them at all."),
+    ("Is dental and vision included?",
+     "Most health plans don't include dental and vision. These are usually separate plans, though some "
+     "comprehensive plans may include basic coverage."),
+    ("What if I can't afford health insurance?",
+     "You may qualify for subsidies through Healthcare.gov, Medicaid, or CHIP. Many people qualify for plans "
+     "under $100/month with subsidies."),
+    ("What's an HSA?",
+     "A Health Savings Account lets you save pre-tax money for medical expenses. You need a High Deductible "
+     "Health Plan to qualify. Money rolls over year to year."),
+)
+
+# Answers drawn from the education page, searchable alongside the FAQ
+GUIDE_ANSWERS = (
+    ("What is a premium?",
+     "Your monthly payment to keep your coverage, paid whether or not you use care. It typically ranges from "
+     "$200 to $800+ a month for individuals."),
+    ("What is a deductible?",
+     "The amount you pay for care before insurance starts covering costs. It resets every year, and a higher "
+     "deductible usually means a lower premium."),
+    ("What is a copay?",
+     "A fixed amount you pay for a covered service, such as $25 for a doctor visit, after the deductible is met."),
+    ("What is coinsurance?",
+     "The percentage of costs you share with your insurer after the deductible, for example an 80/20 split "
+     "where insurance pays 80% and you pay 20%."),
+    ("What is the out-of-pocket maximum?",
+     "The most you'll pay in a year for covered services, including deductibles, copays and coinsurance. "
+     "Insurance pays 100% after you reach it."),
+    ("What is an HMO plan?",
+     "A Health Maintenance Organization plan has lower, predictable costs, but you choose a primary care "
+     "doctor, need referrals for specialists and are limited to network providers."),
+    ("What is a PPO plan?",
+     "A Preferred Provider Organization plan lets you see any doctor without a referral and covers "
+     "out-of-network care, in exchange for higher premiums and higher out-of-network costs."),
+    ("What is an EPO plan?",
+     "An Exclusive Provider Organization plan needs no referrals and has lower premiums than a PPO, but there "
+     "is no out-of-network coverage, so you must stay in network."),
+    ("What is a high deductible health plan (HDHP)?",
+     "An HDHP has lower monthly premiums and makes you eligible for an HSA with its tax benefits, but the "
+     "deductible is high ($1,400+ individual) and you pay more upfront for care."),
+    ("How do I pay for healthcare during the year?",
+     "You pay the monthly premium regardless of use. When you need care you pay the full cost until the "
+     "deductible is met, then copays or coinsurance, and insurance pays 100% after the out-of-pocket maximum."),
+    ("How can I save money on healthcare?",
+     "Use in-network providers (30-50% savings) and generic medications (80% cheaper), get preventive care "
+     "(usually free), use urgent care instead of the ER when appropriate and ask about payment plans for "
+     "large bills."),
+    ("Should I choose an HMO, PPO or HDHP?",
+     "Choose an HMO for lower costs if you don't mind a primary doctor and rarely need specialists; a PPO for "
+     "flexibility if you have preferred doctors or travel often; an HDHP if you're healthy, rarely need care "
+     "and can afford the deductible if needed."),
+    ("What should I ask before choosing a plan?",
+     "Are my doctors in-network? Are my medications covered? What's the total annual cost if I get sick? Does "
+     "it cover my specific health needs? What's the plan's quality rating?"),
+)
+
+# Other wordings of built-in questions, including common misspellings
+ALTERNATE_QUESTIONS = {
+    "When can I enroll in health insurance?": (
+        "When is open enrollment?", "How do I sign up for health insurance?"),
+    "What's an HSA?": ("What is a health savings account?",),
+    "Is dental and vision included?": ("Does my plan cover dental?", "Is vision covered?"),
+    "What is a deductible?": ("What is a deductable?", "How much is the deductable?"),
+    "What is a copay?": ("What is a copayment?",),
+    "What is coinsurance?": ("What does coinsurance mean?",),
+    "What is the out-of-pocket maximum?": (
+        "What is the max I could pay out of pocket in a year?", "What is the most I would pay in a year?"),
+    "What is a premium?": ("How is my premium calculated?", "What is my monthly premium?"),
+    "Should I choose an HMO, PPO or HDHP?": ("What is the difference between a PPO and an HMO?",),
+}
+
+Match = namedtuple('Match', 'question answer score source')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower().replace("'", ''))
+
+
+def stem(word):
+    """Crude suffix stripping so 'covered', 'covers' and 'coverage' share a feature"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _bucket(feature):
+    # crc32 rather than hash(): string hashes are salted per process
+    return zlib.crc32(feature.encode('utf-8')) & (DIMENSIONS - 1)
+
+
+def features(text):
+    """{bucket: weighted count} for the words, word pairs and character trigrams of a text"""
+    words = [stem(word) for word in tokenize(text) if word not in STOPWORDS]
+    counts = {}
+
+    def add(feature, weight):
+        bucket = _bucket(feature)
+        counts[bucket] = counts.get(bucket, 0.0) + weight
+
+    for word in words:
+        add(word, WORD_WEIGHT)
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            add(padded[i:i + 3], TRIGRAM_WEIGHT)
+    for first, second in zip(words, words[1:]):
+        add(f"{first} {second}", PAIR_WEIGHT)
+    return counts
+
+
+def inverse_frequencies(texts):
+    """Smoothed IDF per bucket over a corpus"""
+    frequencies = np.zeros(DIMENSIONS)
+    for text in texts:
+        frequencies[list(features(text))] += 1
+    return (np.log((1 + len(texts)) / (1 + frequencies)) + 1).astype(np.float32)
+
+
+class SemanticCache:
+    """Nearest-neighbour answer lookup over embedded questions"""
+
+    def __init__(self, entries=FAQS + GUIDE_ANSWERS, alternates=ALTERNATE_QUESTIONS, threshold=THRESHOLD,
+                 max_entries=MAX_ENTRIES):
+        entries = list(entries)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # IDF over the built-in questions and answers, so terms common across the guide weigh less
+        self.idf = inverse_frequencies([f"{question} {answer}" for question, answer in entries] +
+                                       [text for wordings in alternates.values() for text in wordings])
+        self._lock = threading.Lock()
+        # Bucket -> {slot: weight}; compiled to arrays on first use after a change
+        self.postings = {}
+        self._compiled = {}
+        self._entries = []
+        self._vectors = []
+        self._next_learned = 0
+        self.hits = self.misses = 0
+        for question, answer in entries:
+            for wording in (question,) + tuple(alternates.get(question, ())):
+                self._put(len(self._entries), question, answer, 'guide', self.embed(wording))
+        self.builtin = len(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def embed(self, text):
+        """Sparse unit vector for a text, as (buckets, weights) arrays"""
+        counts = features(text)
+        buckets = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        # Sublinear term frequency, so a repeated word does not dominate
+        weights = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts))) * self.idf[buckets]
+        norm = np.linalg.norm(weights)
+        return buckets, weights / norm if norm else weights
+
+    def _put(self, slot, question, answer, source, vector):
+        """Store an entry in a slot, dropping the postings of whatever was there"""
+        if slot < len(self._entries):
+            for bucket in self._vectors[slot][0].tolist():
+                del self.postings[bucket][slot]
+                self._compiled.pop(bucket, None)
+        else:
+            self._entries.append(None)
+            self._vectors.append(None)
+        buckets, weights = vector
+        for bucket, weight in zip(buckets.tolist(), weights.tolist()):
+            self.postings.setdefault(bucket, {})[slot] = weight
+            self._compiled.pop(bucket, None)
+        self._entries[slot] = (question, answer, source)
+        self._vectors[slot] = vector
+
+    def _posting_arrays(self, bucket):
+        compiled = self._compiled.get(bucket)
+        if compiled is None:
+            posting = self.postings.get(bucket, {})
+            compiled = self._compiled[bucket] = (np.fromiter(posting.keys(), dtype=np.intp, count=len(posting)),
+                                                 np.fromiter(posting.values(), dtype=np.float32, count=len(posting)))
+        return compiled
+
+    def add(self, question, answer, source='learned'):
+        """Remember an answer; past max_entries the oldest learned answer makes room"""
+        vector = self.embed(question)
+        with self._lock:
+            if len(self._entries) < self.builtin + self.max_entries:
+                slot = len(self._entries)
+            else:
+                slot = self.builtin + self._next_learned
+                self._next_learned = (self._next_learned + 1) % self.max_entries
+            self._put(slot, question, answer, source, vector)
+
+    def nearest(self, question, k=3, minimum=REFERENCE_THRESHOLD, learned=True):
+        """Up to k Matches for distinct questions scoring at least minimum, best first
+
+        Cosine similarity is accumulated over the question's buckets only,
+        so a lookup costs about the same however many answers are cached.
+        learned=False leaves out answers added after construction.
+        """
+        buckets, weights = self.embed(question)
+        with self._lock:
+            scores = np.zeros(len(self._entries), dtype=np.float32)
+            for bucket, weight in zip(buckets.tolist(), weights.tolist()):
+                slots, stored = self._posting_arrays(bucket)
+                # A slot appears once per bucket, so plain fancy indexing accumulates correctly
+                scores[slots] += stored * weight
+            mask = scores >= minimum
+            if not learned:
+                mask[self.builtin:] = False
+            # Alternate wordings share a question, so fetch extra candidates before deduplicating
+            matches = {}
+            for slot in top_k(scores, k + self.builtin, mask=mask):
+                question, answer, source = self._entries[slot]
+                if question not in matches:
+                    matches[question] = Match(question, answer, float(scores[slot]), source)
+                    if len(matches) == k:
+                        break
+            return list(matches.values())
+
+    def lookup(self, question):
+        """The best Match when it clears the threshold, else None"""
+        matches = self.nearest(question, 1, self.threshold)
+        if matches:
+            self.hits += 1
+            return matches[0]
+        self.misses += 1
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('question', nargs='?', default="what's the max I could pay out of pocket in a year")
+    parser.add_argument('--questions', type=int, default=0, help='fill the cache with this many synthetic answers')
+    args = parser.parse_args(argv)
+
+    cache = SemanticCache()
+    for i in range(args.questions):
+        cache.add(f"synthetic question {i} about plan {i % 97} coverage", f"answer {i}")
+
+    repeats = 200
+    start = time.perf_counter()
+    for _ in range(repeats):
+        matches = cache.nearest(args.question, 3, minimum=0.0)
+    per_lookup = (time.perf_counter() - start) / repeats
+
+    print(f"{len(cache):,} cached questions, {per_lookup * 1e6:.0f} us per lookup "
+          f"(answers reused from similarity {cache.threshold})")
+    for match in matches:
+        print(f"  {match.score:.2f}  {match.question}  [{match.source}]")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
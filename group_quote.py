@@ -0,0 +1,277 @@
+"""Employer group quoting from a census CSV
+
+    python -m group_quote census.csv                      # in-process
+    python -m group_quote census.csv --workers 4          # chunks spread over a model server pool
+    python -m group_quote census.csv --sample 20000       # write a synthetic census first
+
+The census is read in chunks. Each chunk is encoded into model features and
+scored by the cost and plan type models, then reduced to a few sums
+(headcount, costs, out-of-pocket per plan, recommended category counts), so
+memory stays flat however many employees the file has. With a model server,
+chunks run in its worker processes, a bounded number at a time.
+
+Census columns (case-insensitive, only age is required): age, bmi or
+height + weight (+ units, 'imperial' or 'metric' per row, anything else is
+rejected), smoker (yes/no), children, state (name or postal code) or region,
+income_level (1-4).
+States also price the predicted costs through state_pricing. The risk
+factor compares the group's unpriced costs with the reference member, as
+household_scoring does; premiums are scaled by it and by the group's state
+price index. Medicare plans are not quoted.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from health_metrics import IMPERIAL, bmi as compute_bmi
+from household_scoring import REFERENCE_MEMBER, plan_costs, plan_terms
+from ml_models import FEATURE_NAMES, MODEL_REGION_CODES, PLAN_CATEGORIES
+from model_runtime import load_models
+from model_server import worker_models
+from plan_catalog import STATE_REGIONS, all_plans
+from state_pricing import COST_FACTORS, MODEL_REGIONS, UNKNOWN_STATE, state_index
+
+CHUNK_ROWS = 5_000
+
+# Chunks queued per worker before the reader waits
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Region labels -> model region code; states are looked up in state_pricing
+REGION_CODES = {name.lower(): code for name, code in MODEL_REGION_CODES.items()}
+
+TRUE_VALUES = ('yes', 'y', 'true', '1', '1.0')
+
+# Plan categories an employer group can be offered; senior plans are Medicare
+GROUP_CATEGORIES = ('budget_friendly', 'comprehensive', 'family')
+
+
+def group_plans():
+    """Catalog plans that can be quoted to an employer group"""
+    return [plan for plan in all_plans() if plan.get('category') in GROUP_CATEGORIES]
+
+
+def encode_census(chunk, units=IMPERIAL):
+    """(features, rows, cost factors) for the rows of a census chunk with a valid age
+
+    Features are in FEATURE_NAMES order; cost factors price each row's
+    predicted cost for its state.
+    """
+    chunk = chunk.rename(columns=str.lower)
+    if 'age' not in chunk:
+        raise ValueError("Census is missing the age column")
+    age = pd.to_numeric(chunk['age'], errors='coerce')
+    chunk = chunk[age.notna()]
+    age = age[age.notna()].to_numpy(dtype=np.float64)
+    n = len(chunk)
+
+    def column(name, default):
+        if name not in chunk:
+            return np.full(n, default, dtype=np.float64)
+        return pd.to_numeric(chunk[name], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+
+    bmi = column('bmi', np.nan)
+    if 'height' in chunk and 'weight' in chunk:
+        row_units = units
+        if 'units' in chunk:
+            # Blank cells take the default; anything compute_bmi does not recognize is rejected
+            cells = chunk['units'].fillna('').astype(str).str.strip().to_numpy(dtype=str)
+            row_units = np.where(cells == '', units, cells)
+        measured = compute_bmi(column('height', 0), column('weight', 0), row_units)
+        bmi = np.where(np.isnan(bmi) & (measured > 0), measured, bmi)
+    bmi = np.where(np.isnan(bmi), REFERENCE_MEMBER['bmi'], bmi)
+
+    if 'smoker' in chunk:
+        smoker = chunk['smoker'].astype(str).str.strip().str.lower().isin(TRUE_VALUES).to_numpy(dtype=np.float64)
+    else:
+        smoker = np.zeros(n)
+
+    # A state sets the model region and prices the costs; a region label only sets the region
+    region = np.full(n, REFERENCE_MEMBER['region'], dtype=np.float64)
+    if 'region' in chunk:
+        labels = chunk['region'].astype(str).str.strip().str.lower().map(REGION_CODES)
+        region = labels.fillna(REFERENCE_MEMBER['region']).to_numpy(dtype=np.float64)
+    states = state_index(chunk['state'].to_numpy()) if 'state' in chunk else np.full(n, UNKNOWN_STATE)
+    region = np.where(states == UNKNOWN_STATE, region, MODEL_REGIONS[states])
+
+    features = {
+        'age': age,
+        'bmi': bmi,
+        'smoker': smoker,
+        'children': column('children', 0),
+        'region': region,
+        'income_level': column('income_level', REFERENCE_MEMBER['income_level']),
+    }
+    return np.column_stack([features[name] for name in FEATURE_NAMES]), n, COST_FACTORS[states]
+
+
+def _score_chunk(models, chunk, plans, units):
+    """Reduce one chunk to additive totals"""
+    rows = len(chunk)
+    X, valid, factors = encode_census(chunk, units)
+    unpriced = models['cost'].predict(X)
+    costs = unpriced * factors
+    categories = np.argmax(models['plan_type'].predict_proba(X), axis=1)
+    premium, _, _ = plan_terms(plans)
+    return {
+        'employees': valid,
+        'skipped': rows - valid,
+        'age_sum': float(X[:, FEATURE_NAMES.index('age')].sum()),
+        'smokers': float(X[:, FEATURE_NAMES.index('smoker')].sum()),
+        'cost_sum': float(costs.sum()),
+        'unpriced_cost_sum': float(unpriced.sum()),
+        'out_of_pocket': (plan_costs(costs, plans) - premium).sum(axis=0),
+        'categories': np.bincount(categories, minlength=len(PLAN_CATEGORIES)),
+    }
+
+
+def _quote_chunk(chunk, plans, units):
+    """Worker side of _score_chunk, using the models the worker mapped"""
+    return _score_chunk(worker_models(), chunk, plans, units)
+
+
+def _merge(total, part):
+    if total is None:
+        return part
+    return {key: total[key] + part[key] for key in total}
+
+
+def read_census(source, chunksize=CHUNK_ROWS):
+    return pd.read_csv(source, chunksize=chunksize)
+
+
+def quote_census(source, models, plans=None, server=None, chunksize=CHUNK_ROWS, units=IMPERIAL):
+    """Group summary and per-plan premiums for a census file or buffer
+
+    models are the loaded artifact graphs (used in-process, and for the
+    reference cost); pass a ModelServer to score chunks in its workers.
+    Returns (summary dict, per-plan DataFrame).
+    """
+    plans = group_plans() if plans is None else plans
+    start = time.perf_counter()
+    totals = None
+    if server is None:
+        for chunk in read_census(source, chunksize):
+            totals = _merge(totals, _score_chunk(models, chunk, plans, units))
+    else:
+        pending = deque()
+        limit = server.workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        for chunk in read_census(source, chunksize):
+            if len(pending) >= limit:
+                totals = _merge(totals, pending.popleft().result())
+            pending.append(server.submit(_quote_chunk, chunk, plans, units))
+        while pending:
+            totals = _merge(totals, pending.popleft().result())
+    return _group_quote(totals, models, plans, time.perf_counter() - start)
+
+
+def _group_quote(totals, models, plans, seconds):
+    employees = int(totals['employees']) if totals else 0
+    if not employees:
+        raise ValueError("Census has no rows with a valid age")
+
+    reference = np.array([[REFERENCE_MEMBER[name] for name in FEATURE_NAMES]], dtype=np.float64)
+    reference_cost = float(models['cost'].predict(reference)[0])
+    average_cost = totals['cost_sum'] / employees
+    # Health risk before state pricing, and the cost-weighted state price index on top of it
+    risk_factor = totals['unpriced_cost_sum'] / employees / reference_cost
+    price_index = totals['cost_sum'] / totals['unpriced_cost_sum']
+    category_mix = totals['categories'] / employees
+
+    premium, _, _ = plan_terms(plans)
+    group_premium = premium * employees * risk_factor * price_index
+    per_plan = pd.DataFrame({
+        'plan': [plan['name'] for plan in plans],
+        'category': [plan.get('category', '') for plan in plans],
+        'monthly_per_employee': group_premium / employees / 12,
+        'annual_group_premium': group_premium,
+        'expected_out_of_pocket': totals['out_of_pocket'],
+        'expected_total': group_premium + totals['out_of_pocket'],
+        'recommended_share': [
+            category_mix[PLAN_CATEGORIES.index(plan['category'])] if plan.get('category') in PLAN_CATEGORIES else 0.0
+            for plan in plans
+        ],
+    }).sort_values('expected_total', kind='stable').reset_index(drop=True)
+
+    summary = {
+        'employees': employees,
+        'skipped_rows': int(totals['skipped']),
+        'average_age': totals['age_sum'] / employees,
+        'smoker_share': totals['smokers'] / employees,
+        'average_expected_cost': average_cost,
+        'risk_factor': risk_factor,
+        'price_index': price_index,
+        'category_mix': dict(zip(PLAN_CATEGORIES, category_mix.tolist())),
+        'seconds': seconds,
+    }
+    return summary, per_plan
+
+
+def sample_census(n, seed=0):
+    """Synthetic census with the supported columns, for trying the pipeline"""
+    rng = np.random.default_rng(seed)
+    states = list(STATE_REGIONS)
+    return pd.DataFrame({
+        'employee_id': np.arange(1, n + 1),
+        'age': rng.integers(21, 66, n),
+        'height': rng.integers(60, 77, n),
+        'weight': rng.integers(110, 260, n),
+        'units': 'imperial',
+        'smoker': rng.choice(['no', 'yes'], n, p=[0.85, 0.15]),
+        'children': rng.integers(0, 4, n),
+        'state': rng.choice(states, n),
+        'income_level': rng.integers(1, 5, n),
+    })
+
+
+def main(argv=None):
+    from model_export import MODEL_ARTIFACT_DIR
+    from model_runtime import artifact_exists
+    from model_server import ModelServer
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('census', help='census CSV')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (0 scores in-process)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--directory', default=MODEL_ARTIFACT_DIR, help='exported model artifact')
+    parser.add_argument('--units', choices=('imperial', 'metric'), default='imperial',
+                        help='height/weight units for rows without a units column')
+    parser.add_argument('--sample', type=int, metavar='N', help='first write a synthetic census of N employees')
+    parser.add_argument('--output', help='write the per-plan table to this CSV')
+    args = parser.parse_args(argv)
+
+    if not artifact_exists(args.directory):
+        parser.error(f"No model artifact in {args.directory}; run python -m model_export first")
+    if args.sample:
+        sample_census(args.sample).to_csv(args.census, index=False)
+    if not os.path.exists(args.census):
+        parser.error(f"Census not found: {args.census}")
+
+    models = load_models(args.directory)
+    if args.workers > 0:
+        with ModelServer(args.directory, args.workers) as server:
+            server.warm_up()
+            summary, per_plan = quote_census(args.census, models, server=server, chunksize=args.chunksize,
+                                             units=args.units)
+    else:
+        summary, per_plan = quote_census(args.census, models, chunksize=args.chunksize, units=args.units)
+
+    print(f"{summary['employees']:,} employees ({summary['skipped_rows']} rows skipped) "
+          f"in {summary['seconds']:.2f}s")
+    print(f"average age {summary['average_age']:.1f}, smokers {summary['smoker_share']:.1%}, "
+          f"expected cost ${summary['average_expected_cost']:,.0f}, risk factor {summary['risk_factor']:.2f}, "
+          f"state price index {summary['price_index']:.2f}")
+    print(per_plan.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+    if args.output:
+        per_plan.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == '__main__':
+    # Go through the module name so worker processes can unpickle the job functions
+    from group_quote import main as module_main
+    sys.exit(module_main())
@@ -0,0 +1,98 @@
+"""Vectorized BMI, BMI category and age group for whole rosters
+
+Every function accepts scalars or arrays and returns NumPy arrays, so member
+lists with mixed imperial and metric rows are processed in one pass. Results
+match app.calculate_bmi exactly, including Python's round() to one decimal.
+"""
+import numpy as np
+
+from aggregates import AGE_EDGES, BMI_EDGES
+
+# Unit system labels used by the forms
+IMPERIAL = "Imperial (ft/in, lbs)"
+METRIC = "Metric (m, kg)"
+
+INCH_TO_M = 0.0254
+LB_TO_KG = 0.453592
+
+# Category codes index these labels; -1 marks a missing BMI
+BMI_CATEGORY_LABELS = ('Underweight', 'Normal', 'Overweight', 'Obese')
+BMI_CATEGORY_COLORS = ('#3B82F6', '#10B981', '#F59E0B', '#EF4444')
+
+
+def is_imperial(unit_system):
+    """True where the unit system is imperial
+
+    Accepts booleans, the form labels or 'imperial'/'metric' in any case and
+    with surrounding spaces, either one value or one per row. Any other unit
+    system raises ValueError rather than being read as metric.
+    """
+    units = np.asarray(unit_system)
+    if units.dtype == bool:
+        return units
+    # Rosters repeat a couple of labels, so each distinct one is normalized once
+    labels, index = np.unique(units.astype(str), return_inverse=True)
+    labels = np.char.lower(np.char.strip(labels))
+    imperial = np.char.startswith(labels, 'imperial')
+    unknown = labels[~(imperial | np.char.startswith(labels, 'metric'))]
+    if len(unknown):
+        raise ValueError(f"Unknown unit system: {', '.join(map(repr, unknown[:5].tolist()))}")
+    return imperial[index].reshape(units.shape)
+
+
+def total_inches(feet, inches):
+    return np.asarray(feet) * 12 + np.asarray(inches)
+
+
+def bmi(height, weight, unit_system=METRIC):
+    """BMI rounded to one decimal; 0 where height is not positive
+
+    height is total inches and weight pounds for imperial rows, metres and
+    kilograms for metric rows. unit_system may be one label or one per row.
+    """
+    height, weight, imperial = np.broadcast_arrays(
+        np.asarray(height, dtype=np.float64), np.asarray(weight, dtype=np.float64), is_imperial(unit_system))
+    shape = height.shape
+    height, weight, imperial = height.ravel(), weight.ravel(), imperial.ravel()
+    height_m = np.where(imperial, height * INCH_TO_M, height)
+    weight_kg = np.where(imperial, weight * LB_TO_KG, weight)
+    valid = height_m > 0
+
+    result = np.zeros(len(height_m))
+    raw = weight_kg[valid] / height_m[valid] ** 2
+    result[valid] = np.round(raw, 1)
+    # np.round scales by 10 first, and Python computes height ** 2 with pow(),
+    # either of which can tip a value sitting on a .x5 tie; such rows are redone
+    # exactly as calculate_bmi does
+    scaled = raw * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(valid)[near_tie]:
+        result[index] = round(float(weight_kg[index]) / (float(height_m[index]) ** 2), 1)
+    return result.reshape(shape)
+
+
+def bmi_category(bmi_values):
+    """Category codes into BMI_CATEGORY_LABELS (BMI >= 30 is obese), -1 for missing BMI"""
+    bmi_values = np.asarray(bmi_values, dtype=np.float64)
+    return np.where(bmi_values > 0, np.digitize(bmi_values, BMI_EDGES), -1)
+
+
+def bmi_category_label(bmi_value):
+    """Label for a single BMI, or '' when it is missing"""
+    code = int(bmi_category(bmi_value))
+    return BMI_CATEGORY_LABELS[code] if code >= 0 else ''
+
+
+def age_group(age):
+    """Age group codes: 18-25, 26-35, 36-50, 51-65, 65+ (right-inclusive edges)"""
+    return np.digitize(np.asarray(age), AGE_EDGES, right=True)
+
+
+def health_metrics(height, weight, age, unit_system=METRIC):
+    """BMI, BMI category and age group for a roster as a dict of arrays"""
+    bmi_values = bmi(height, weight, unit_system)
+    return {
+        'bmi': bmi_values,
+        'bmi_category': bmi_category(bmi_values),
+        'age_group': age_group(age),
+    }
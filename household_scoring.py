@@ -0,0 +1,130 @@
+"""Household-level cost scoring for family quotes
+
+Every member of every household goes through the cost model in a single
+batched call. Member costs are summed per household with bincount, and each
+plan's expected annual cost (premium plus out-of-pocket on the expected
+claims) is evaluated for all households at once. Scoring thousands of
+households is a handful of array operations.
+"""
+import numpy as np
+import pandas as pd
+
+from ml_models import FEATURE_NAMES, MODEL_MIN_AGE
+from state_pricing import COST_FACTORS, state_index
+
+# Share of claims above the deductible paid by the household, up to the out-of-pocket maximum
+COINSURANCE = 0.2
+
+# Member profile the risk index is measured against
+REFERENCE_MEMBER = {'age': 30, 'bmi': 25.0, 'smoker': 0, 'children': 0, 'region': 0, 'income_level': 3}
+
+# The cost model covers adults only, so a child is estimated as the youngest adult it
+# knows: a non-smoker of MODEL_MIN_AGE at the reference BMI, whatever the child's age
+CHILD_BMI = REFERENCE_MEMBER['bmi']
+
+
+def parse_dollars(value):
+    """'$12000' or 12000 -> 12000.0"""
+    if isinstance(value, str):
+        value = value.replace('$', '').replace(',', '')
+    return float(value)
+
+
+def household_members(households):
+    """Member table (one row per person) for households given as dicts
+
+    Each household has adult_ages and children_ages lists, optional
+    adult_bmis and adult_smokers lists (one per adult, falling back to the
+    household's bmi and smoker), and optional region (model code),
+    income_level and state shared by everyone. Adults carry the household's
+    number of children as the model's `children` feature. Children are
+    scored at MODEL_MIN_AGE and CHILD_BMI as non-smokers, and flagged in the
+    `child` column.
+    """
+    rows = []
+    for household_id, household in enumerate(households):
+        children_ages = list(household.get('children_ages', ()))
+        adult_ages = list(household.get('adult_ages', ()))
+        bmis = household.get('adult_bmis') or [household.get('bmi', REFERENCE_MEMBER['bmi'])] * len(adult_ages)
+        smokers = household.get('adult_smokers') or [household.get('smoker', 0)] * len(adult_ages)
+        region = household.get('region', REFERENCE_MEMBER['region'])
+        income_level = household.get('income_level', REFERENCE_MEMBER['income_level'])
+        state = state_index(household.get('state'))
+        for age, bmi, smoker in zip(adult_ages, bmis, smokers):
+            rows.append((household_id, age, bmi, int(smoker), len(children_ages), region, income_level, state, False))
+        for _ in children_ages:
+            rows.append((household_id, MODEL_MIN_AGE, CHILD_BMI, 0, 0, region, income_level, state, True))
+    return pd.DataFrame(rows, columns=('household',) + FEATURE_NAMES + ('state', 'child'))
+
+
+def plan_terms(plans):
+    """Annual premium, deductible and out-of-pocket maximum arrays for a plan list"""
+    premium = np.array([plan['monthly'] for plan in plans], dtype=np.float64) * 12
+    deductible = np.array([plan['deductible'] for plan in plans], dtype=np.float64)
+    oop_max = np.array([parse_dollars(plan['oop_max']) for plan in plans])
+    return premium, deductible, oop_max
+
+
+def out_of_pocket(expected_claims, deductible, oop_max):
+    """Household share of expected claims under each plan's terms, shape (households, plans)"""
+    claims = np.asarray(expected_claims, dtype=np.float64)[:, None]
+    return np.minimum(
+        oop_max,
+        np.minimum(claims, deductible) + COINSURANCE * np.maximum(claims - deductible, 0)
+    )
+
+
+def plan_costs(expected_claims, plans):
+    """Expected total annual cost of every plan for every household, shape (households, plans)"""
+    premium, deductible, oop_max = plan_terms(plans)
+    return premium + out_of_pocket(expected_claims, deductible, oop_max)
+
+
+def score_households(members, predict_cost, plans):
+    """Household summary and plan ranking from one batched cost model call
+
+    predict_cost maps a feature matrix (columns FEATURE_NAMES) to annual costs.
+    Member costs are priced for their state (a state_pricing index column),
+    while the risk index compares health against reference members before
+    that pricing.
+    Returns (summary, costs): summary has one row per household with members,
+    expected_cost, children_cost (the part estimated for members flagged as
+    children), peak_member_cost, risk_index (expected cost relative to the
+    same number of reference members) and best_plan; costs is the
+    households x plans DataFrame of expected total annual cost.
+    """
+    names = [plan['name'] for plan in plans]
+    households, index = np.unique(members['household'].to_numpy(), return_inverse=True)
+    if not len(households):
+        return (pd.DataFrame(columns=['members', 'expected_cost', 'children_cost', 'peak_member_cost',
+                                      'risk_index', 'best_plan']),
+                pd.DataFrame(columns=names, dtype=np.float64))
+
+    # The reference member rides along in the same batch
+    X = np.vstack([
+        members[list(FEATURE_NAMES)].to_numpy(dtype=np.float64),
+        [[REFERENCE_MEMBER[name] for name in FEATURE_NAMES]],
+    ])
+    predicted = np.asarray(predict_cost(X), dtype=np.float64)
+    member_costs, reference_cost = predicted[:-1], predicted[-1]
+
+    size = np.bincount(index, minlength=len(households))
+    unpriced = np.bincount(index, weights=member_costs, minlength=len(households))
+    if 'state' in members:
+        member_costs = member_costs * COST_FACTORS[members['state'].to_numpy()]
+    expected = np.bincount(index, weights=member_costs, minlength=len(households))
+    child = members['child'].to_numpy(dtype=bool) if 'child' in members else np.zeros(len(members), dtype=bool)
+    children_cost = np.bincount(index, weights=np.where(child, member_costs, 0.0), minlength=len(households))
+    peak = np.zeros(len(households))
+    np.maximum.at(peak, index, member_costs)
+
+    totals = plan_costs(expected, plans)
+    summary = pd.DataFrame({
+        'members': size,
+        'expected_cost': expected,
+        'children_cost': children_cost,
+        'peak_member_cost': peak,
+        'risk_index': unpriced / (size * reference_cost),
+        'best_plan': np.array(names, dtype=object)[np.argmin(totals, axis=1)],
+    }, index=pd.Index(households, name='household'))
+    return summary, pd.DataFrame(totals, index=summary.index, columns=names)
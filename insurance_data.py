@@ -0,0 +1,44 @@
+"""Loading of the insurance claims dataset behind the dashboard"""
+import os
+
+import numpy as np
+import pandas as pd
+
+INSURANCE_DATA_PATH = os.environ.get('MEDICOST_DATA', os.path.join('data', 'insurance.csv'))
+SAMPLE_SIZE = 1338
+
+
+def dataset_version(path=INSURANCE_DATA_PATH):
+    """Cheap identifier that changes whenever the dataset on disk changes"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"sample-{SAMPLE_SIZE}-42"
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def sample_insurance_frame(n=SAMPLE_SIZE, seed=42):
+    """Synthetic stand-in with the same columns as insurance.csv"""
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'age': rng.randint(18, 65, n),
+        'charges': rng.normal(13270, 5000, n),
+        'smoker': rng.choice(['yes', 'no'], n, p=[0.21, 0.79]),
+        'sex': rng.choice(['male', 'female'], n),
+        'bmi': rng.normal(30, 6, n),
+        'region': rng.choice(['northeast', 'southeast', 'southwest', 'northwest'], n)
+    })
+
+
+def load_insurance_frame(path=INSURANCE_DATA_PATH, chunksize=None):
+    """Read insurance.csv if present, falling back to the synthetic sample
+
+    With chunksize set, returns an iterator of DataFrames so multi-million-row
+    files can be aggregated without loading them whole.
+    """
+    if not os.path.exists(path):
+        frame = sample_insurance_frame()
+        return iter([frame]) if chunksize else frame
+    columns = ['age', 'sex', 'bmi', 'smoker', 'region', 'charges']
+    categorical = {'sex': 'category', 'smoker': 'category', 'region': 'category'}
+    return pd.read_csv(path, usecols=columns, dtype=categorical, chunksize=chunksize)
@@ -0,0 +1,462 @@
+"""Marketplace plan ingestion into a local, versioned cache
+
+    python -m marketplace sample dumps/ --states TX FL --plans 120   # synthetic API-shaped dumps
+    python -m marketplace ingest dumps/TX.json dumps/FL.json         # normalize dumps into the cache
+    python -m marketplace serve dumps/ --port 8765                   # stub of the plan search API
+    python -m marketplace fetch TX FL --url http://localhost:8765/api/v1
+    python -m marketplace list
+
+Plans come from marketplace plan search responses (healthcare.gov Marketplace
+API shape: {"plans": [...], "total": n}), either as JSON dump files or
+fetched from the API. Each plan is normalized into the catalog schema used by
+INSURANCE_COMPANIES (name, monthly, deductible, copay, oop_max, network,
+rating, features, plan_type, metal_tier, benefits, category) plus its id and
+state. Each state and year is stored as one JSON file in the cache
+directory. index.json records its ETag, content version and fetch time.
+Fetches send the stored ETag and keep the cache on 304 Not Modified. The
+app only ever reads the cache, so no request waits on the network.
+"""
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from plan_catalog import STATE_CODES
+
+MARKETPLACE_CACHE_DIR = os.environ.get('MEDICOST_MARKETPLACE_DIR', os.path.join('data', 'marketplace'))
+MARKETPLACE_API_URL = os.environ.get('MEDICOST_MARKETPLACE_URL', 'https://marketplace.api.healthcare.gov/api/v1')
+PLAN_YEAR = 2025
+
+INDEX_NAME = 'index.json'
+# Cache layout version, bumped whenever the normalized plan schema changes
+CACHE_FORMAT = 1
+
+# Marketplace metal level -> catalog metal tier and plan category
+METAL_TIERS = {
+    'catastrophic': 'Bronze', 'bronze': 'Bronze', 'expanded bronze': 'Bronze',
+    'silver': 'Silver', 'gold': 'Gold', 'platinum': 'Platinum',
+}
+TIER_CATEGORIES = {
+    'Bronze': 'budget_friendly', 'Silver': 'budget_friendly', 'Gold': 'comprehensive', 'Platinum': 'comprehensive',
+}
+
+# Network breadth wording by plan type, in the style of the catalog's network names
+NETWORK_NAMES = {
+    'PPO': 'Regional PPO', 'POS': 'Regional POS', 'EPO': 'Local EPO', 'HMO': 'Local HMO', 'HDHP': 'Regional HDHP',
+}
+
+# Keyword in a covered benefit's name -> advanced form benefit
+BENEFIT_KEYWORDS = (
+    ('dental', 'Dental'), ('vision', 'Vision'), ('eye', 'Vision'), ('mental', 'Mental Health'),
+    ('behavioral', 'Mental Health'), ('maternity', 'Maternity'), ('delivery', 'Maternity'),
+    ('prenatal', 'Maternity'), ('telehealth', 'Telemedicine'), ('wellness', 'Wellness Programs'),
+    ('preventive', 'Wellness Programs'), ('acupuncture', 'Alternative Medicine'),
+    ('chiropractic', 'Alternative Medicine'),
+)
+
+PRIMARY_CARE_BENEFIT = 'primary care visit'
+
+STATE_NAMES = {code: name for name, code in STATE_CODES.items()}
+
+
+def _in_network_amount(entries, default=0.0):
+    """Lowest in-network individual amount from a deductibles or moops list"""
+    amounts = [entry.get('amount', 0.0) for entry in entries or ()
+               if entry.get('individual', True) and entry.get('network_tier', 'In-Network') == 'In-Network']
+    return float(min(amounts)) if amounts else default
+
+
+def _primary_care_copay(benefits):
+    for benefit in benefits or ():
+        if benefit.get('name', '').lower().startswith(PRIMARY_CARE_BENEFIT):
+            for sharing in benefit.get('cost_sharings') or ():
+                if sharing.get('network_tier', 'In-Network') == 'In-Network':
+                    return float(sharing.get('copay_amount') or 0.0)
+    return 0.0
+
+
+def normalize_plan(raw, year=PLAN_YEAR):
+    """Catalog-schema dict for one marketplace plan"""
+    plan_type = (raw.get('type') or '').upper()
+    tier = METAL_TIERS.get((raw.get('metal_level') or '').lower(), 'Bronze')
+    covered = [benefit['name'] for benefit in raw.get('benefits') or () if benefit.get('covered', True)]
+    benefits = []
+    for name in covered:
+        lowered = name.lower()
+        for keyword, benefit in BENEFIT_KEYWORDS:
+            if keyword in lowered and benefit not in benefits:
+                benefits.append(benefit)
+    features = [name for name in covered if not name.lower().startswith(PRIMARY_CARE_BENEFIT)][:3]
+    if raw.get('hsa_eligible'):
+        features = (['HSA eligible'] + features)[:3]
+    issuer = (raw.get('issuer') or {}).get('name', '')
+    rating = (raw.get('quality_rating') or {}).get('global_rating') or 0
+
+    return {
+        'id': raw['id'],
+        'name': f"{issuer} {raw['name']}".strip(),
+        'issuer': issuer,
+        'state': raw.get('state', ''),
+        'year': year,
+        'monthly': round(float(raw.get('premium', 0.0))),
+        'deductible': round(_in_network_amount(raw.get('deductibles'))),
+        'coverage': f"{raw.get('metal_level', tier)} {plan_type}".strip(),
+        'network': NETWORK_NAMES.get(plan_type, 'Regional Network'),
+        'rating': float(rating),
+        'features': features,
+        'best_for': f"{tier} tier {plan_type or 'plan'} shoppers in {STATE_NAMES.get(raw.get('state', ''), 'this state')}",
+        'copay': f"${_primary_care_copay(raw.get('benefits')):.0f}",
+        'oop_max': f"${_in_network_amount(raw.get('moops')):.0f}",
+        'plan_type': plan_type,
+        'metal_tier': tier,
+        'benefits': benefits,
+        'category': TIER_CATEGORIES[tier],
+    }
+
+
+def normalize_dump(payload, year=PLAN_YEAR):
+    """Normalized plans from a plan search response or a bare list of plans"""
+    raw_plans = payload.get('plans', []) if isinstance(payload, dict) else payload
+    return [normalize_plan(raw, year) for raw in raw_plans]
+
+
+def dataset_key(state, year=PLAN_YEAR):
+    return f"{state.upper()}-{year}"
+
+
+def content_version(plans):
+    """Hash of the normalized plans, so refetching unchanged data is a no-op"""
+    encoded = json.dumps(plans, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+
+def _write_json(path, data):
+    """Write then rename, so readers never see a half-written file"""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+class MarketplaceCache:
+    """Normalized marketplace plans on disk, one file per state and plan year"""
+
+    def __init__(self, directory=MARKETPLACE_CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._memo = (None, [])
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_NAME)
+
+    def index(self):
+        """{'format': CACHE_FORMAT, 'datasets': {key: metadata}}; empty when nothing is cached"""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {'format': CACHE_FORMAT, 'datasets': {}}
+        if index.get('format') != CACHE_FORMAT:
+            return {'format': CACHE_FORMAT, 'datasets': {}}
+        return index
+
+    def version(self):
+        """Cheap identifier that changes whenever the cache is written"""
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return 'empty'
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def metadata(self, key):
+        return self.index()['datasets'].get(key)
+
+    def store(self, key, plans, etag=None, source=None):
+        """Save one dataset; returns True when its content changed"""
+        version = content_version(plans)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            index = self.index()
+            previous = index['datasets'].get(key)
+            changed = previous is None or previous['version'] != version
+            if changed:
+                _write_json(os.path.join(self.directory, f"{key}.json"), plans)
+            index['datasets'][key] = {
+                'version': version,
+                'etag': etag,
+                'source': source,
+                'plans': len(plans),
+                'fetched_at': time.time(),
+            }
+            _write_json(self.index_path, index)
+        return changed
+
+    def touch(self, key):
+        """Record a fetch that found the dataset unchanged"""
+        with self._lock:
+            index = self.index()
+            if key in index['datasets']:
+                index['datasets'][key]['fetched_at'] = time.time()
+                _write_json(self.index_path, index)
+
+    def load(self, key):
+        with open(os.path.join(self.directory, f"{key}.json"), encoding='utf-8') as f:
+            return json.load(f)
+
+    def plans(self, state=None):
+        """Every cached plan, or one state's; read from disk once per cache version"""
+        version = self.version()
+        memo_version, plans = self._memo
+        if memo_version != version:
+            plans = []
+            for key in sorted(self.index()['datasets']):
+                try:
+                    plans.extend(self.load(key))
+                except (OSError, ValueError):
+                    continue
+            self._memo = (version, plans)
+        if state is None:
+            return plans
+        return [plan for plan in plans if plan.get('state') == state]
+
+
+def ingest_dump(cache, path, year=PLAN_YEAR):
+    """Normalize one dump file into the cache; the state comes from the plans or the file name"""
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    plans = normalize_dump(payload, year)
+    state = plans[0]['state'] if plans and plans[0]['state'] else os.path.splitext(os.path.basename(path))[0]
+    key = dataset_key(state, year)
+    return key, len(plans), cache.store(key, plans, source=os.path.abspath(path))
+
+
+def search_request(state, year=PLAN_YEAR, offset=0):
+    """Plan search request body for a whole state's individual market"""
+    return {'market': 'Individual', 'year': year, 'place': {'state': state}, 'offset': offset}
+
+
+def search_endpoint(url=MARKETPLACE_API_URL, api_key=None):
+    endpoint = f"{url.rstrip('/')}/plans/search"
+    return f"{endpoint}?apikey={api_key}" if api_key else endpoint
+
+
+def fetch_state(cache, state, year=PLAN_YEAR, url=MARKETPLACE_API_URL, api_key=None, timeout=30):
+    """Fetch one state's plans into the cache; returns 'updated', 'unchanged' or 'not-modified'
+
+    The cached ETag goes out as If-None-Match on the first page. Further
+    pages follow the response's total.
+    """
+    key = dataset_key(state, year)
+    metadata = cache.metadata(key)
+    endpoint = search_endpoint(url, api_key)
+
+    raw_plans, etag, total = [], None, None
+    while total is None or len(raw_plans) < total:
+        request = urllib.request.Request(
+            endpoint, data=json.dumps(search_request(state, year, len(raw_plans))).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST')
+        if not raw_plans and metadata and metadata.get('etag'):
+            request.add_header('If-None-Match', metadata['etag'])
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = json.load(response)
+                etag = etag or response.headers.get('ETag')
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                cache.touch(key)
+                return 'not-modified'
+            raise
+        page = payload.get('plans', [])
+        raw_plans.extend(page)
+        total = payload.get('total', len(raw_plans))
+        if not page:
+            break
+
+    changed = cache.store(key, normalize_dump(raw_plans, year), etag=etag, source=endpoint.split('?')[0])
+    return 'updated' if changed else 'unchanged'
+
+
+def sample_dump(state, n=100, year=PLAN_YEAR, seed=None):
+    """Synthetic plan search response for one state, shaped like the Marketplace API's"""
+    rng = np.random.default_rng(seed if seed is not None else sum(map(ord, state)))
+    issuers = ['Ambetter', 'Blue Cross', 'Oscar', 'Molina', 'Cigna', 'UnitedHealthcare', 'Aetna', 'Wellpoint']
+    metal_levels = ['Catastrophic', 'Bronze', 'Expanded Bronze', 'Silver', 'Gold', 'Platinum']
+    extra_benefits = ['Routine Dental Services (Adult)', 'Routine Eye Exam (Adult)', 'Mental/Behavioral Health Outpatient Services',
+                      'Delivery and All Inpatient Services for Maternity Care', 'Preventive Care/Screening/Immunization',
+                      'Acupuncture', 'Chiropractic Care', 'Telehealth']
+    plans = []
+    for i in range(n):
+        level = metal_levels[rng.integers(len(metal_levels))]
+        richness = metal_levels.index(level)
+        deductible = int(max(0, 9000 - richness * 1500 + rng.integers(-500, 500)))
+        benefits = [{'name': 'Primary Care Visit to Treat an Injury or Illness', 'covered': True,
+                     'cost_sharings': [{'network_tier': 'In-Network', 'copay_amount': float(60 - richness * 8),
+                                        'display_string': f"${60 - richness * 8}"}]}]
+        benefits += [{'name': name, 'covered': True} for name in rng.choice(extra_benefits, 3, replace=False)]
+        plans.append({
+            'id': f"{year % 100:02d}{i:05d}{state}{rng.integers(1000, 9999)}",
+            'name': f"{level} {['HMO', 'PPO', 'EPO', 'POS'][i % 4]} {i % 7 + 1}",
+            'issuer': {'name': issuers[i % len(issuers)]},
+            'state': state,
+            'type': ['HMO', 'PPO', 'EPO', 'POS'][i % 4],
+            'metal_level': level,
+            'premium': round(float(250 + richness * 90 + rng.normal(0, 40)), 2),
+            'deductibles': [{'amount': deductible, 'individual': True, 'network_tier': 'In-Network'}],
+            'moops': [{'amount': min(9450, deductible + int(rng.integers(1000, 4000))), 'individual': True,
+                       'network_tier': 'In-Network'}],
+            'benefits': benefits,
+            'quality_rating': {'global_rating': int(rng.integers(1, 6))},
+            'hsa_eligible': level == 'Bronze' and i % 3 == 0,
+        })
+    return {'plans': plans, 'total': len(plans)}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """POST {prefix}/plans/search answered from {directory}/{state}.json, with ETags and paging
+
+    latency delays every response; with fail_every = n, every n-th request
+    gets a 503 so clients' retries can be exercised.
+    """
+
+    directory = '.'
+    page_size = 10
+    latency = 0.0
+    fail_every = 0
+    requests = None
+
+    def do_POST(self):
+        if not self.path.split('?')[0].endswith('/plans/search'):
+            self.send_error(404)
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        count = next(self.requests)
+        if self.fail_every and count % self.fail_every == 0:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        state = (body.get('place') or {}).get('state', '')
+        path = os.path.join(self.directory, f"{state}.json")
+        if not state or not os.path.exists(path):
+            self.send_error(404, f"No plans for state {state!r}")
+            return
+        with open(path, 'rb') as f:
+            raw = f.read()
+        etag = '"%s"' % hashlib.blake2b(raw, digest_size=8).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        plans = json.loads(raw).get('plans', [])
+        offset = int(body.get('offset', 0))
+        payload = json.dumps({'plans': plans[offset:offset + self.page_size], 'total': len(plans)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections from concurrent clients
+    request_queue_size = 128
+
+
+def start_stub_server(directory, host='127.0.0.1', port=0, page_size=10, latency=0.0, fail_every=0):
+    """Serve dump files as a local plan search API on a background thread; returns (server, base url)"""
+    handler = type('StubHandler', (_StubHandler,), {
+        'directory': directory, 'page_size': page_size, 'latency': latency, 'fail_every': fail_every,
+        'requests': itertools.count(1),
+    })
+    server = _StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/api/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cache', default=MARKETPLACE_CACHE_DIR, help='cache directory')
+    parser.add_argument('--year', type=int, default=PLAN_YEAR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sample = commands.add_parser('sample', help='write synthetic dumps')
+    sample.add_argument('directory')
+    sample.add_argument('--states', nargs='+', default=sorted(STATE_NAMES))
+    sample.add_argument('--plans', type=int, default=100, help='plans per state')
+
+    ingest = commands.add_parser('ingest', help='normalize dump files into the cache')
+    ingest.add_argument('dumps', nargs='+')
+
+    serve = commands.add_parser('serve', help='serve dump files as a stub plan search API')
+    serve.add_argument('directory')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help='seconds to delay each response')
+    serve.add_argument('--fail-every', type=int, default=0, metavar='N', help='answer every N-th request with a 503')
+
+    fetch = commands.add_parser('fetch', help='fetch states from the plan search API into the cache')
+    fetch.add_argument('states', nargs='+')
+    fetch.add_argument('--url', default=MARKETPLACE_API_URL)
+    fetch.add_argument('--api-key', default=os.environ.get('MARKETPLACE_API_KEY'))
+
+    commands.add_parser('list', help='show cached datasets')
+    args = parser.parse_args(argv)
+
+    cache = MarketplaceCache(args.cache)
+    if args.command == 'sample':
+        os.makedirs(args.directory, exist_ok=True)
+        for state in args.states:
+            _write_json(os.path.join(args.directory, f"{state}.json"), sample_dump(state, args.plans, args.year))
+        print(f"Wrote {len(args.states)} dumps to {args.directory}")
+    elif args.command == 'ingest':
+        for pattern in args.dumps:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                key, count, changed = ingest_dump(cache, path, args.year)
+                print(f"{key}: {count} plans {'stored' if changed else 'unchanged'}")
+    elif args.command == 'serve':
+        server, url = start_stub_server(args.directory, args.host, args.port, latency=args.latency,
+                                        fail_every=args.fail_every)
+        print(f"Serving {args.directory} at {url}/plans/search (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == 'fetch':
+        failed = 0
+        for state in args.states:
+            try:
+                print(f"{state}: {fetch_state(cache, state, args.year, args.url, args.api_key)}")
+            except (urllib.error.URLError, OSError, ValueError) as error:
+                print(f"{state}: failed ({error})")
+                failed += 1
+        return 1 if failed else 0
+    else:
+        for key, metadata in sorted(cache.index()['datasets'].items()):
+            fetched = time.strftime('%Y-%m-%d %H:%M', time.localtime(metadata['fetched_at']))
+            print(f"{key}: {metadata['plans']} plans, version {metadata['version']}, "
+                  f"etag {metadata['etag']}, fetched {fetched}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Concurrent refresh of every state's marketplace plans
+
+    python -m marketplace_refresh                                  # all 50 states from MEDICOST_MARKETPLACE_URL
+    python -m marketplace_refresh --states TX FL --concurrency 4
+    python -m marketplace_refresh --stub dumps/ --fail-every 7     # against a local stub that drops requests
+
+One aiohttp session, and so one connection pool, is shared by every state.
+At most `concurrency` requests are in flight at a time, so keep-alive
+connections are reused instead of opening one per page. Pages of a state
+are still fetched in order because each page's offset follows the last.
+Timeouts, connection errors and 429/5xx responses are retried with
+exponential backoff and jitter, honouring Retry-After. Each state is written
+to the cache as soon as its last page arrives, so an interrupted refresh
+keeps what it already fetched. ETags and 304 handling match
+marketplace.fetch_state.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+import aiohttp
+
+from marketplace import (MARKETPLACE_API_URL, MARKETPLACE_CACHE_DIR, PLAN_YEAR, MarketplaceCache, dataset_key,
+                         normalize_dump, search_endpoint, search_request, start_stub_server)
+from plan_catalog import STATE_CODES
+
+# Requests in flight at once, across all states; also the connection pool size
+CONCURRENCY = 8
+
+# Attempts per request after the first, and the backoff between them in seconds
+RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+REQUEST_TIMEOUT = 30
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RefreshError(Exception):
+    """A request that still failed after every retry"""
+
+
+def backoff(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based)"""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    # Full jitter, so states that failed together do not retry together
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _post(session, limit, endpoint, body, headers, retries):
+    """(status, payload, etag) for one search request, retrying transient failures"""
+    for attempt in range(retries + 1):
+        retry_after = None
+        try:
+            async with limit:
+                async with session.post(endpoint, json=body, headers=headers) as response:
+                    if response.status == 304:
+                        return 304, None, response.headers.get('ETag')
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return response.status, await response.json(), response.headers.get('ETag')
+                    retry_after = _retry_after(response)
+                    error = f"HTTP {response.status}"
+        except aiohttp.ClientResponseError as exc:
+            raise RefreshError(f"HTTP {exc.status}: {exc.message}") from exc
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            error = str(exc) or type(exc).__name__
+        if attempt < retries:
+            await asyncio.sleep(backoff(attempt, retry_after))
+    raise RefreshError(f"{error} after {retries + 1} attempts")
+
+
+async def refresh_state(session, limit, cache, state, year=PLAN_YEAR, endpoint=None, retries=RETRIES):
+    """Fetch one state's plans into the cache; returns 'updated', 'unchanged' or 'not-modified'"""
+    endpoint = endpoint or search_endpoint()
+    key = dataset_key(state, year)
+    metadata = await asyncio.to_thread(cache.metadata, key)
+
+    raw_plans, etag, total = [], None, None
+    while total is None or len(raw_plans) < total:
+        headers = {}
+        if not raw_plans and metadata and metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        status, payload, page_etag = await _post(session, limit, endpoint, search_request(state, year, len(raw_plans)),
+                                                 headers, retries)
+        if status == 304:
+            await asyncio.to_thread(cache.touch, key)
+            return 'not-modified'
+        etag = etag or page_etag
+        page = payload.get('plans', [])
+        raw_plans.extend(page)
+        total = payload.get('total', len(raw_plans))
+        if not page:
+            break
+
+    # Written off the event loop so other states keep downloading meanwhile
+    changed = await asyncio.to_thread(cache.store, key, normalize_dump(raw_plans, year), etag,
+                                      endpoint.split('?')[0])
+    return 'updated' if changed else 'unchanged'
+
+
+async def refresh_states(cache, states, year=PLAN_YEAR, url=MARKETPLACE_API_URL, api_key=None,
+                         concurrency=CONCURRENCY, retries=RETRIES, timeout=REQUEST_TIMEOUT, on_done=None):
+    """{state: status} for every state; a state that failed maps to 'error: ...'
+
+    on_done(state, status) is called as each state finishes.
+    """
+    endpoint = search_endpoint(url, api_key)
+    limit = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    results = {}
+
+    async def one(session, state):
+        try:
+            status = await refresh_state(session, limit, cache, state, year, endpoint, retries)
+        except (RefreshError, ValueError, OSError) as exc:
+            status = f"error: {exc}"
+        results[state] = status
+        if on_done:
+            on_done(state, status)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        await asyncio.gather(*(one(session, state) for state in states))
+    return {state: results[state] for state in states}
+
+
+def refresh(cache, states=None, **kwargs):
+    """Blocking refresh_states(); defaults to every state"""
+    states = list(states or STATE_CODES.values())
+    return asyncio.run(refresh_states(cache, states, **kwargs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--states', nargs='+', metavar='STATE', help='postal codes (default: all 50)')
+    parser.add_argument('--url', default=MARKETPLACE_API_URL)
+    parser.add_argument('--api-key')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='requests in flight at once')
+    parser.add_argument('--retries', type=int, default=RETRIES, help='retries per request')
+    parser.add_argument('--cache', default=MARKETPLACE_CACHE_DIR, help='cache directory')
+    parser.add_argument('--year', type=int, default=PLAN_YEAR)
+    parser.add_argument('--stub', metavar='DIR', help='serve dumps from DIR locally and refresh from that')
+    parser.add_argument('--latency', type=float, default=0.0, help='stub response delay in seconds')
+    parser.add_argument('--fail-every', type=int, default=0, metavar='N', help='stub answers every N-th request with a 503')
+    args = parser.parse_args(argv)
+
+    states = [state.upper() for state in args.states] if args.states else list(STATE_CODES.values())
+    url, server = args.url, None
+    if args.stub:
+        server, url = start_stub_server(args.stub, latency=args.latency, fail_every=args.fail_every)
+
+    def report(state, status):
+        print(f"{state}: {status}", flush=True)
+
+    start = time.perf_counter()
+    try:
+        results = refresh(MarketplaceCache(args.cache), states, year=args.year, url=url, api_key=args.api_key,
+                          concurrency=args.concurrency, retries=args.retries, on_done=report)
+    finally:
+        if server:
+            server.shutdown()
+    failed = sum(status.startswith('error') for status in results.values())
+    print(f"{len(results) - failed}/{len(results)} states refreshed in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Training of the plan recommendation and cost prediction models
+
+scikit-learn is imported only when training; serving reads the exported
+artifact through model_runtime instead.
+"""
+import numpy as np
+
+# Class index -> plan category, as used for INSURANCE_COMPANIES
+PLAN_CATEGORIES = ('budget_friendly', 'comprehensive', 'family', 'senior')
+
+# Feature columns shared by both models
+FEATURE_NAMES = ('age', 'bmi', 'smoker', 'children', 'region', 'income_level')
+
+# Region codes the models were trained with, for the region labels used in the forms
+MODEL_REGION_CODES = {'Northeast': 0, 'Southeast': 1, 'Midwest': 2, 'West': 3,
+                      'Southwest': 2, 'Northwest': 3, 'South': 1}
+
+# Youngest age in the training data; the models have not seen children
+MODEL_MIN_AGE = 18
+
+# Quantiles of annual cost predicted next to the expected cost, and their output names
+COST_QUANTILES = (0.1, 0.5, 0.9)
+COST_QUANTILE_LABELS = ('low', 'median', 'high')
+
+# Share of the training data held out to calibrate the quantile interval
+CALIBRATION_FRACTION = 0.25
+
+
+def training_data(seed=42, n_samples=2000):
+    """Synthetic profiles with their plan category and annual cost targets"""
+    # Same stream as seeding the global generator, without touching the global state
+    rng = np.random.RandomState(seed)
+    
+    # Generate synthetic training data
+    ages = rng.randint(MODEL_MIN_AGE, 80, n_samples)
+    bmis = rng.normal(27, 5, n_samples)
+    smokers = rng.choice([0, 1], n_samples, p=[0.8, 0.2])
+    children = rng.randint(0, 5, n_samples)
+    regions = rng.randint(0, 4, n_samples)
+    income_levels = rng.randint(1, 5, n_samples)
+    
+    # Create feature matrix
+    X = np.column_stack([ages, bmis, smokers, children, regions, income_levels])
+    
+    # Create targets for classification
+    def determine_category(row):
+        age, bmi, smoker, kids, region, income = row
+        if age >= 65:
+            return 3  # senior
+        elif kids >= 2:
+            return 2  # family
+        elif income <= 2 or (age < 30 and bmi < 25):
+            return 0  # budget_friendly
+        else:
+            return 1  # comprehensive
+    
+    y_category = np.array([determine_category(row) for row in X])
+    
+    # Create cost targets for regression
+    base_costs = ages * 50 + bmis * 30 + smokers * 2000 + children * 500 + rng.normal(0, 500, n_samples)
+    y_cost = np.clip(base_costs, 1000, 15000)
+    return X, y_category, y_cost
+
+
+def train_recommendation_models():
+    """Create ML models for insurance recommendation and cost prediction"""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+
+    X, y_category, y_cost = training_data()
+    
+    # Train classification model
+    clf_model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
+    clf_model.fit(X, y_category)
+    
+    # Train regression model for cost prediction
+    reg_model = GradientBoostingRegressor(n_estimators=100, random_state=42, max_depth=5)
+    reg_model.fit(X, y_cost)
+    
+    return clf_model, reg_model, list(PLAN_CATEGORIES)
+
+
+def train_cost_quantile_models(quantiles=COST_QUANTILES):
+    """Quantile gradient boosting regressors on the cost model's data, and their conformal margin
+
+    The models are fitted on all but CALIBRATION_FRACTION of the data. On the
+    rest, the margin is the amount by which the outer quantiles must be
+    widened so that the share of costs between them matches the nominal
+    coverage (split conformalized quantile regression). Without it the
+    boosted quantiles are too narrow on new profiles.
+    """
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    X, _, y_cost = training_data()
+    order = np.random.RandomState(42).permutation(len(X))
+    n_calibration = int(len(X) * CALIBRATION_FRACTION)
+    fit, calibration = order[n_calibration:], order[:n_calibration]
+    models = [
+        GradientBoostingRegressor(loss='quantile', alpha=quantile, n_estimators=100, random_state=42,
+                                  max_depth=3).fit(X[fit], y_cost[fit])
+        for quantile in quantiles
+    ]
+
+    low, high = models[0].predict(X[calibration]), models[-1].predict(X[calibration])
+    errors = np.maximum(low - y_cost[calibration], y_cost[calibration] - high)
+    coverage = min(1.0, (quantiles[-1] - quantiles[0]) * (1 + 1 / n_calibration))
+    margin = float(np.quantile(errors, coverage, method='higher'))
+    return models, margin
@@ -0,0 +1,219 @@
+"""Per-feature attributions for tree ensemble predictions
+
+    python -m model_attributions                          # cost drivers of a sample profile, with timing
+    python -m model_attributions models/compact --age 58 --smoker
+
+Saabas path attribution: a tree's prediction is its root value plus the
+change in node value at every split on the way to the leaf, and each change
+is credited to the feature the split tested. Summed over the trees, the
+contributions add up exactly to the prediction minus the bias (the ensemble's
+value at its roots, i.e. the training average). Rows walk every tree in
+lockstep for max_depth steps, as in TreeEnsemble.apply. Leaves point at
+themselves, so the steps after a leaf add nothing. One profile through 100
+trees is a few dozen vector operations.
+
+Interior node values are needed. model_export and model_compress keep them
+(compressed ones quantized like the leaves); an artifact compressed with
+--leaves-only has none and is refused, as rebuilding them without the
+training sample counts skews the split between features.
+
+AttributionCache memoizes results per quantized profile (QUANTA), so a
+returning profile costs a dict lookup.
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from ml_models import FEATURE_NAMES
+from model_runtime import BLOCK_ROWS, TreeEnsemble, load_models
+
+# Step each feature is rounded to before attributing, so nearby profiles share a cache entry
+QUANTA = {'age': 1, 'bmi': 0.5, 'smoker': 1, 'children': 1, 'region': 1, 'income_level': 1}
+
+# Wording of each feature when shown as a cost driver
+FEATURE_LABELS = {
+    'age': 'Age',
+    'bmi': 'BMI',
+    'smoker': 'Smoking',
+    'children': 'Children',
+    'region': 'Region',
+    'income_level': 'Income',
+}
+
+CACHE_ENTRIES = 4096
+
+# bias: value before any split; contributions: per feature (and per class for classifiers)
+Attribution = namedtuple('Attribution', 'bias contributions feature_names')
+
+
+def node_values(ensemble):
+    """Decoded value of every node"""
+    if not ensemble.interior_values:
+        raise ValueError("Ensemble stores only leaf values; compress it without --leaves-only for attributions")
+    return np.array(ensemble.node_values(np.arange(len(ensemble.feature))), dtype=np.float64)
+
+
+class TreeAttributions:
+    """Path attributions for one TreeEnsemble
+
+    transform, when given, maps raw feature rows to the ensemble's inputs.
+    """
+
+    def __init__(self, ensemble, transform=None):
+        if not isinstance(ensemble, TreeEnsemble):
+            raise TypeError(f"Attributions need a tree ensemble, got {type(ensemble).__name__}")
+        if ensemble.tree_outputs is not None:
+            raise TypeError("Attributions of multi-output ensembles are not supported")
+        self.ensemble = ensemble
+        self.transform = transform
+        self.values = node_values(ensemble)
+        # Regressors predict base + scale * sum of tree values, classifiers the mean over trees
+        if ensemble.kind == 'regressor':
+            self.weight = ensemble.scale
+            self.bias = ensemble.base + self.weight * self.values[ensemble.roots].sum(axis=0)
+        else:
+            self.weight = 1.0 / ensemble.n_trees
+            self.bias = self.weight * self.values[ensemble.roots].sum(axis=0)
+
+    def _block(self, X):
+        ensemble = self.ensemble
+        rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(rows) * n_features)[:, None]
+        children = ensemble.children.ravel()
+        node = np.broadcast_to(ensemble.roots, (rows, ensemble.n_trees))
+        outputs = self.values.shape[1:]
+        contributions = np.zeros((rows * n_features,) + outputs)
+        for _ in range(ensemble.max_depth):
+            feature = ensemble.feature.take(node)
+            go_right = flat_X.take(row_offsets + feature) > ensemble.node_thresholds(node)
+            child = children.take(np.multiply(node, 2, dtype=np.intp) + go_right)
+            delta = (self.values[child] - self.values[node]).reshape((-1,) + outputs)
+            slots = (row_offsets + feature).ravel()
+            if outputs:
+                for output in range(outputs[0]):
+                    contributions[:, output] += np.bincount(slots, weights=delta[:, output],
+                                                            minlength=len(contributions))
+            else:
+                contributions += np.bincount(slots, weights=delta, minlength=len(contributions))
+            node = child
+        return self.weight * contributions.reshape((rows, n_features) + outputs)
+
+    def explain(self, X):
+        """Contributions, shape (rows, features) or (rows, features, classes)
+
+        bias + contributions.sum(axis=1) equals the ensemble's prediction.
+        """
+        if self.transform is not None:
+            X = self.transform(X)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.ensemble.n_features:
+            raise ValueError(f"Expected {self.ensemble.n_features} features, got {X.shape[1]}")
+        if len(X) <= BLOCK_ROWS:
+            return self._block(X)
+        return np.concatenate([self._block(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+
+def graph_attributions(graph):
+    """TreeAttributions for a runtime Graph ending in a tree ensemble
+
+    Earlier nodes must be column-wise transforms (such as a scaler), so each
+    input feature keeps its identity.
+    """
+    return TreeAttributions(graph.nodes[-1], transform=lambda X: graph.transform(X, -1))
+
+
+def quantize(row, feature_names=FEATURE_NAMES):
+    return tuple(float(np.round(value / QUANTA.get(name, 1)) * QUANTA.get(name, 1))
+                 for name, value in zip(feature_names, row))
+
+
+class AttributionCache:
+    """Attributions for single profiles, memoized per quantized profile in a bounded LRU"""
+
+    def __init__(self, graph, feature_names=None, max_entries=CACHE_ENTRIES):
+        self.attributions = graph_attributions(graph)
+        self.feature_names = tuple(feature_names or graph.feature_names or FEATURE_NAMES)
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def explain(self, row):
+        """Attribution for one feature row (in feature_names order)"""
+        key = quantize(row, self.feature_names)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+        result = Attribution(self.attributions.bias, self.attributions.explain([key])[0], self.feature_names)
+        with self._lock:
+            self.misses += 1
+            self._results[key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+
+def drivers(attribution, scale=1.0, output=None, limit=None):
+    """[(label, contribution)] sorted by size, scaled (e.g. by a state pricing factor)"""
+    contributions = attribution.contributions if output is None else attribution.contributions[:, output]
+    order = np.argsort(-np.abs(contributions), kind='stable')[:limit]
+    return [(FEATURE_LABELS.get(attribution.feature_names[i], attribution.feature_names[i]),
+             float(contributions[i]) * scale) for i in order]
+
+
+def main(argv=None):
+    from model_export import MODEL_ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('artifact', nargs='?', default=MODEL_ARTIFACT_DIR)
+    parser.add_argument('--age', type=float, default=45)
+    parser.add_argument('--bmi', type=float, default=31.0)
+    parser.add_argument('--smoker', action='store_true')
+    parser.add_argument('--children', type=int, default=1)
+    parser.add_argument('--batch', type=int, default=1000, help='rows for the batch timing and additivity check')
+    args = parser.parse_args(argv)
+
+    models = load_models(args.artifact)
+    cost = models['cost']
+    row = [args.age, args.bmi, int(args.smoker), args.children, 0, 3]
+
+    start = time.perf_counter()
+    cache = AttributionCache(cost)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    attribution = cache.explain(row)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    cache.explain(row)
+    cached = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(18, 80, args.batch), rng.normal(27, 5, args.batch),
+                         rng.integers(0, 2, args.batch), rng.integers(0, 5, args.batch),
+                         rng.integers(0, 4, args.batch), rng.integers(1, 5, args.batch)])
+    start = time.perf_counter()
+    batch = cache.attributions.explain(X)
+    per_batch = time.perf_counter() - start
+    error = np.abs(cache.attributions.bias + batch.sum(axis=1) - cost.predict(X)).max()
+
+    print(f"setup {built * 1000:.1f} ms, first profile {first * 1000:.2f} ms, cached {cached * 1e6:.0f} us, "
+          f"{args.batch:,} rows {per_batch * 1000:.1f} ms (max additivity error ${error:.2f})")
+    print(f"  average member  ${attribution.bias:,.0f}")
+    for label, value in drivers(attribution):
+        print(f"  {label:<15} {'+' if value >= 0 else '-'}${abs(value):,.0f}")
+    print(f"  predicted       ${float(cost.predict([quantize(row)])[0]):,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Quantized, deduplicated tree ensemble artifacts
+
+    python -m model_compress models/compiled models/compact               # 16-bit leaves
+    python -m model_compress models/compiled models/compact --leaf-bits 8
+    python -m model_compress models/compiled models/compact --leaves-only
+
+Thresholds are replaced by an index into a table of the distinct float32
+thresholds. Each is rounded down, so splits on float32 inputs (which is what
+the runtime compares) are unchanged. Node values are quantized linearly to
+8 or 16 bits. Identical subtrees, within and across trees, are then stored
+once, and node indices use the narrowest integer type that fits.
+
+Prediction only reads leaf values, but cost drivers (model_attributions)
+need the interior ones, so they are quantized along with the leaves. An
+interior value is an average over the leaves below it, so it widens the
+quantization range little if at all. --leaves-only zeroes them instead, for
+a smaller artifact that serves predictions without drivers. Held-out
+metrics are recomputed for the compressed models.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from model_evaluation import attach_metrics
+from model_runtime import Graph, TreeEnsemble, load_models, save_models
+
+
+def _index_dtype(size):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.int64
+
+
+def quantize_thresholds(thresholds):
+    """Codebook of float32 thresholds rounded down, and each node's index into it
+
+    For a float32 input x, x <= t holds exactly when x <= the largest float32
+    not above t, so the rounding never changes which way a row goes.
+    """
+    rounded = thresholds.astype(np.float32)
+    above = rounded.astype(np.float64) > thresholds
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    table, index = np.unique(rounded, return_inverse=True)
+    return index.astype(_index_dtype(len(table))), table
+
+
+def quantize_values(values, bits):
+    """Linear quantization to unsigned integers: values ~ offset + step * q"""
+    dtype = {8: np.uint8, 16: np.uint16}[bits]
+    levels = np.iinfo(dtype).max
+    low, high = float(values.min()), float(values.max())
+    step = (high - low) / levels if high > low else 1.0
+    quantized = np.rint((values - low) / step).astype(dtype)
+    return quantized, step, low
+
+
+def deduplicate(feature, threshold, children, value, roots, leaf):
+    """Share identical subtrees; returns compacted arrays with leaves looping to themselves
+
+    Children always come after their parent in each tree, so walking nodes in
+    reverse sees every subtree before the node that points at it.
+    """
+    canonical = np.empty(len(feature), dtype=np.int64)
+    seen = {}
+    kept = []
+    for node in range(len(feature) - 1, -1, -1):
+        if leaf[node]:
+            key = ('leaf', value[node].tobytes())
+        else:
+            key = (int(feature[node]), int(threshold[node]), value[node].tobytes(),
+                   int(canonical[children[node, 0]]), int(canonical[children[node, 1]]))
+        if key not in seen:
+            seen[key] = len(kept)
+            kept.append(node)
+        canonical[node] = seen[key]
+
+    kept = np.array(kept, dtype=np.int64)
+    new_ids = np.arange(len(kept))
+    new_children = canonical[children[kept]]
+    new_children[leaf[kept]] = new_ids[leaf[kept], None]
+    index_dtype = _index_dtype(len(kept))
+    return (feature[kept], threshold[kept], new_children.astype(index_dtype), value[kept],
+            canonical[roots].astype(index_dtype))
+
+
+def compress_ensemble(ensemble, leaf_bits=16, dedupe=True, leaves_only=False):
+    """Quantized (and optionally deduplicated) copy of an uncompressed TreeEnsemble"""
+    if ensemble.threshold_values is not None or ensemble.value_step is not None:
+        raise ValueError("Ensemble is already compressed")
+    nodes = np.arange(len(ensemble.feature))
+    leaf = ensemble.children[:, 0] == nodes
+    threshold, threshold_values = quantize_thresholds(ensemble.threshold)
+
+    value = ensemble.value
+    if leaves_only:
+        # Zeroed interior values neither widen the quantization range nor stop
+        # otherwise identical subtrees from merging
+        value = np.where(leaf.reshape((-1,) + (1,) * (value.ndim - 1)), value, 0.0)
+    value, step, offset = quantize_values(value, leaf_bits)
+
+    feature = ensemble.feature.astype(_index_dtype(ensemble.n_features))
+    children, roots = ensemble.children, ensemble.roots
+    if dedupe:
+        feature, threshold, children, value, roots = deduplicate(
+            feature, threshold, children, value, roots, leaf)
+    else:
+        index_dtype = _index_dtype(len(nodes))
+        children, roots = children.astype(index_dtype), roots.astype(index_dtype)
+
+    return TreeEnsemble(
+        ensemble.kind, feature, threshold, children, value, roots, ensemble.max_depth,
+        ensemble.n_features, base=ensemble.base, scale=ensemble.scale, classes=ensemble.classes,
+        labels=ensemble.labels, threshold_values=threshold_values, value_step=step, value_offset=offset,
+        tree_outputs=ensemble.tree_outputs, interior_values=not leaves_only
+    )
+
+
+def compress_models(models, leaf_bits=16, dedupe=True, leaves_only=False):
+    """Copy of a {name: Graph} mapping with every tree ensemble compressed"""
+    compressed = {}
+    for name, graph in models.items():
+        nodes = [compress_ensemble(node, leaf_bits, dedupe, leaves_only) if isinstance(node, TreeEnsemble) else node
+                 for node in graph.nodes]
+        compressed[name] = Graph(nodes, graph.feature_names)
+    return compressed
+
+
+def compare(original, compressed, X):
+    """Size and prediction deltas between two versions of the same graph"""
+    report = {
+        'bytes_before': original.nbytes,
+        'bytes_after': compressed.nbytes,
+        'size_ratio': compressed.nbytes / original.nbytes,
+    }
+    final = original.nodes[-1]
+    if getattr(final, 'kind', None) == 'classifier':
+        before, after = original.predict_proba(X), compressed.predict_proba(X)
+        report['max_abs_proba_delta'] = float(np.abs(before - after).max())
+        report['label_agreement'] = float(np.mean(before.argmax(axis=1) == after.argmax(axis=1)))
+    else:
+        before, after = original.predict(X), compressed.predict(X)
+        delta = after - before
+        report['max_abs_delta'] = float(np.abs(delta).max())
+        report['rmse_delta'] = float(np.sqrt(np.mean(delta ** 2)))
+    return report
+
+
+def sample_features(rows=20_000, seed=0):
+    """Profiles spread like the recommendation models' training data"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(18, 80, rows), np.round(rng.normal(27, 5, rows), 1), rng.integers(0, 2, rows),
+        rng.integers(0, 5, rows), rng.integers(0, 4, rows), rng.integers(1, 5, rows),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='exported artifact to compress')
+    parser.add_argument('target', help='directory for the compressed artifact')
+    parser.add_argument('--leaf-bits', type=int, choices=(8, 16), default=16)
+    parser.add_argument('--no-dedupe', action='store_true', help='skip subtree deduplication')
+    parser.add_argument('--leaves-only', action='store_true',
+                        help='drop interior node values (smaller, but no cost drivers)')
+    args = parser.parse_args(argv)
+
+    models = load_models(args.source, mmap_mode=None)
+    compressed = attach_metrics(compress_models(models, args.leaf_bits, dedupe=not args.no_dedupe,
+                                                leaves_only=args.leaves_only))
+    save_models(compressed, args.target)
+
+    X = sample_features()
+    for name, graph in models.items():
+        if not any(isinstance(node, TreeEnsemble) for node in graph.nodes):
+            continue
+        report = compare(graph, compressed[name], X)
+        deltas = ', '.join(f"{key} {value:.6g}" for key, value in report.items()
+                           if key not in ('bytes_before', 'bytes_after', 'size_ratio'))
+        print(f"{name}: {report['bytes_before']:,} -> {report['bytes_after']:,} bytes "
+              f"({report['size_ratio']:.1%}); {deltas}")
+    print(f"Saved {args.target}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
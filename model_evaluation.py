@@ -0,0 +1,99 @@
+"""Held-out metrics for the recommendation models, stored with the artifact
+
+    python -m model_evaluation                       # evaluate models/compiled and record the metrics
+    python -m model_evaluation models/compact --no-store
+
+The models are trained on synthetic profiles (ml_models.training_data). The
+held-out set is a fresh draw from the same generator with a seed the models
+never saw. The exported graphs are scored, not the scikit-learn estimators,
+so the numbers describe what serving evaluates, compressed artifacts
+included. Metrics are written into the artifact manifest when the artifact
+is produced, and pages read them from there instead of hard-coding them.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from ml_models import COST_QUANTILES, training_data
+from model_runtime import load_models, store_metrics
+
+HOLDOUT_SEED = 2024
+HOLDOUT_SAMPLES = 2000
+
+
+def holdout_data():
+    """(X, plan categories, annual costs) the models were not trained on"""
+    return training_data(HOLDOUT_SEED, HOLDOUT_SAMPLES)
+
+
+def regression_metrics(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    errors = y_true - np.asarray(y_pred, dtype=np.float64)
+    total = np.square(y_true - y_true.mean()).sum()
+    return {
+        'r2': float(1 - np.square(errors).sum() / total) if total else 0.0,
+        'rmse': float(np.sqrt(np.mean(np.square(errors)))),
+        'mae': float(np.mean(np.abs(errors))),
+        'samples': len(y_true),
+    }
+
+
+def classification_metrics(y_true, y_pred):
+    return {'accuracy': float(np.mean(np.asarray(y_true) == np.asarray(y_pred))), 'samples': len(y_true)}
+
+
+def interval_metrics(y_true, quantiles):
+    """Coverage of the outer quantiles, against its nominal value, and the median's errors"""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    low, high = quantiles[:, 0], quantiles[:, -1]
+    metrics = regression_metrics(y_true, quantiles[:, quantiles.shape[1] // 2])
+    metrics.update({
+        'coverage': float(np.mean((y_true >= low) & (y_true <= high))),
+        'nominal_coverage': COST_QUANTILES[-1] - COST_QUANTILES[0],
+        'mean_width': float(np.mean(high - low)),
+    })
+    return metrics
+
+
+def evaluate_models(models):
+    """{model: metrics} for the recommendation models among a {name: Graph} mapping"""
+    X, categories, costs = holdout_data()
+    metrics = {}
+    if 'plan_type' in models:
+        metrics['plan_type'] = classification_metrics(categories, models['plan_type'].predict(X))
+    if 'cost' in models:
+        metrics['cost'] = regression_metrics(costs, models['cost'].predict(X))
+    if 'cost_quantiles' in models:
+        metrics['cost_quantiles'] = interval_metrics(costs, models['cost_quantiles'].predict(X))
+    return metrics
+
+
+def attach_metrics(models):
+    """Set each recommendation graph's metrics before the artifact is saved; returns models"""
+    for name, values in evaluate_models(models).items():
+        models[name].metrics = values
+    return models
+
+
+def main(argv=None):
+    from model_export import MODEL_ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('artifact', nargs='?', default=MODEL_ARTIFACT_DIR)
+    parser.add_argument('--no-store', action='store_true', help='print the metrics without recording them')
+    args = parser.parse_args(argv)
+
+    models = load_models(args.artifact)
+    metrics = evaluate_models(models)
+    print(f"{HOLDOUT_SAMPLES:,} held-out profiles (seed {HOLDOUT_SEED})")
+    for name, values in metrics.items():
+        print(f"  {name:<15} " + ', '.join(f"{key} {value:.4g}" for key, value in values.items() if key != 'samples'))
+    if not args.no_store:
+        store_metrics(args.artifact, metrics)
+        print(f"Recorded in {args.artifact}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
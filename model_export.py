@@ -0,0 +1,201 @@
+"""Conversion of fitted scikit-learn models into model_runtime artifacts
+
+    python -m model_export                         # recommendation models -> models/compiled
+    python -m model_export out/ --saved models/    # also the pickled Ridge model and scaler
+    python -m model_export --leaf-bits 8           # quantized, deduplicated trees (model_compress)
+
+The cost quantile regressors are exported together as one multi-output
+ensemble, so a cost interval costs a single pass over the trees. Their
+conformal margin is folded into the outer outputs' base values. Held-out
+metrics (model_evaluation) are recorded with the recommendation models.
+
+Only the fitted attributes (tree_, coef_, mean_, ...) are read, so this
+module does not import scikit-learn itself and serving processes load the
+result with NumPy alone.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from ml_models import COST_QUANTILE_LABELS, FEATURE_NAMES
+from model_evaluation import attach_metrics
+from model_runtime import Graph, LinearRegressor, StandardScaler, TreeEnsemble, save_models
+
+# Where the app keeps the exported recommendation models
+MODEL_ARTIFACT_DIR = os.environ.get('MEDICOST_MODEL_DIR', os.path.join('models', 'compiled'))
+
+# Models show_recommendations evaluates; an artifact missing any of them is exported again
+RECOMMENDATION_MODELS = ('plan_type', 'cost', 'cost_quantiles')
+
+
+def _flatten_trees(trees):
+    """Concatenate tree_ structures into node arrays with leaves looping to themselves"""
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        n_nodes = tree.node_count
+        nodes = np.arange(n_nodes)
+        leaf = tree.children_left == -1
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([
+            np.where(leaf, nodes, tree.children_left),
+            np.where(leaf, nodes, tree.children_right),
+        ]) + offset)
+        values.append(tree.value[:, 0, :])
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'children': np.concatenate(children).astype(np.int32),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': max_depth,
+    }
+
+
+def export_forest_classifier(model, labels=None):
+    """RandomForestClassifier -> TreeEnsemble with per-node class fractions"""
+    arrays = _flatten_trees(estimator.tree_ for estimator in model.estimators_)
+    value = arrays['value']
+    totals = value.sum(axis=1, keepdims=True)
+    arrays['value'] = value / np.where(totals == 0, 1, totals)
+    return TreeEnsemble('classifier', n_features=model.n_features_in_, classes=model.classes_,
+                        labels=labels, **arrays)
+
+
+def export_gradient_boosting_regressor(model):
+    """GradientBoostingRegressor -> TreeEnsemble predicting init + learning_rate * sum(leaves)"""
+    arrays = _flatten_trees(stage[0].tree_ for stage in model.estimators_)
+    arrays['value'] = arrays['value'][:, 0]
+    if model.init_ == 'zero':
+        base = 0.0
+    else:
+        base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+    return TreeEnsemble('regressor', n_features=model.n_features_in_, base=base,
+                        scale=model.learning_rate, **arrays)
+
+
+def export_gradient_boosting_regressors(models, labels=None, offsets=None):
+    """GradientBoostingRegressors on the same features -> one TreeEnsemble with an output per model
+
+    offsets, one per model, are added to the models' predictions.
+    """
+    ensembles = [export_gradient_boosting_regressor(model) for model in models]
+    if len({ensemble.scale for ensemble in ensembles}) > 1:
+        raise ValueError("Regressors exported together must share a learning rate")
+    offsets = offsets or [0.0] * len(ensembles)
+    starts = np.cumsum([0] + [len(ensemble.feature) for ensemble in ensembles])
+    return TreeEnsemble(
+        'regressor',
+        feature=np.concatenate([ensemble.feature for ensemble in ensembles]),
+        threshold=np.concatenate([ensemble.threshold for ensemble in ensembles]),
+        children=np.concatenate([ensemble.children + start for ensemble, start in zip(ensembles, starts)]),
+        value=np.concatenate([ensemble.value for ensemble in ensembles]),
+        roots=np.concatenate([ensemble.roots + start for ensemble, start in zip(ensembles, starts)]),
+        tree_outputs=np.repeat(np.arange(len(ensembles), dtype=np.int32),
+                               [ensemble.n_trees for ensemble in ensembles]),
+        max_depth=max(ensemble.max_depth for ensemble in ensembles),
+        n_features=ensembles[0].n_features,
+        base=[ensemble.base + offset for ensemble, offset in zip(ensembles, offsets)],
+        scale=ensembles[0].scale,
+        labels=labels,
+    )
+
+
+def export_standard_scaler(model):
+    return StandardScaler(model.mean_, model.scale_)
+
+
+def export_linear_model(model):
+    """LinearRegression, Ridge or Lasso with a single target"""
+    return LinearRegressor(np.ravel(model.coef_), float(np.ravel(model.intercept_)[0]))
+
+
+# Exporters by estimator class name, so scikit-learn need not be imported to dispatch
+EXPORTERS = {
+    'StandardScaler': export_standard_scaler,
+    'LinearRegression': export_linear_model,
+    'Ridge': export_linear_model,
+    'Lasso': export_linear_model,
+    'RandomForestClassifier': export_forest_classifier,
+    'GradientBoostingRegressor': export_gradient_boosting_regressor,
+}
+
+
+def export_estimator(model):
+    """Graph for a supported estimator or a Pipeline of supported steps"""
+    if type(model).__name__ == 'Pipeline':
+        nodes = [node for _, step in model.steps for node in export_estimator(step).nodes]
+        return Graph(nodes, getattr(model, 'feature_names_in_', None))
+    exporter = EXPORTERS.get(type(model).__name__)
+    if exporter is None:
+        raise TypeError(f"Cannot export {type(model).__name__}")
+    return Graph([exporter(model)], getattr(model, 'feature_names_in_', None))
+
+
+def recommendation_graphs(clf_model, reg_model, categories, quantile_models=None, quantile_margin=0.0):
+    """Graphs for the plan classifier, cost regressor and cost quantiles used by show_recommendations
+
+    quantile_margin widens the lowest and highest quantile (see
+    ml_models.train_cost_quantile_models). Each graph carries its held-out
+    metrics.
+    """
+    graphs = {
+        'plan_type': Graph([export_forest_classifier(clf_model, labels=categories)], FEATURE_NAMES),
+        'cost': Graph([export_gradient_boosting_regressor(reg_model)], FEATURE_NAMES),
+    }
+    if quantile_models:
+        offsets = [0.0] * len(quantile_models)
+        offsets[0], offsets[-1] = -quantile_margin, quantile_margin
+        graphs['cost_quantiles'] = Graph(
+            [export_gradient_boosting_regressors(quantile_models, COST_QUANTILE_LABELS, offsets)], FEATURE_NAMES)
+    return attach_metrics(graphs)
+
+
+def export_recommendation_models(clf_model, reg_model, categories, directory=MODEL_ARTIFACT_DIR,
+                                 quantile_models=None, quantile_margin=0.0):
+    save_models(recommendation_graphs(clf_model, reg_model, categories, quantile_models, quantile_margin),
+                directory)
+    return directory
+
+
+def export_saved_models(source_dir):
+    """Graphs for the notebook's pickled artifacts found in source_dir"""
+    import joblib
+
+    graphs = {}
+    for name, filename in (('charges_ridge', 'best_model_Ridge.pkl'), ('scaler', 'scaler.pkl')):
+        path = os.path.join(source_dir, filename)
+        if os.path.exists(path):
+            graphs[name] = export_estimator(joblib.load(path))
+    return graphs
+
+
+def main(argv=None):
+    from ml_models import train_cost_quantile_models, train_recommendation_models
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', nargs='?', default=MODEL_ARTIFACT_DIR, help='artifact directory to write')
+    parser.add_argument('--saved', metavar='DIR', help='also export best_model_Ridge.pkl and scaler.pkl from DIR')
+    parser.add_argument('--leaf-bits', type=int, choices=(8, 16), help='compress tree ensembles (see model_compress)')
+    args = parser.parse_args(argv)
+
+    graphs = recommendation_graphs(*train_recommendation_models(), *train_cost_quantile_models())
+    if args.saved:
+        graphs.update(export_saved_models(args.saved))
+    if args.leaf_bits:
+        from model_compress import compress_models
+        graphs = compress_models(graphs, args.leaf_bits)
+    save_models(graphs, args.directory)
+    print(f"Exported {', '.join(graphs)} to {args.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
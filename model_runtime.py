@@ -0,0 +1,366 @@
+"""NumPy-only inference for exported models
+
+An artifact is a directory holding manifest.json and one .npy file per
+array. Each model in the manifest is a graph of nodes applied in order
+(e.g. a scaler feeding a linear model); a node records its type, scalar
+attributes and the files of its arrays, so any runtime that can read .npy
+files can evaluate it. A model may also carry held-out metrics (see
+model_evaluation), stored in the manifest so they can be read without
+loading any arrays. This module needs nothing but NumPy.
+
+Every tree of an ensemble is flattened into shared node arrays, with leaves
+looping back to themselves, so a batch is evaluated by stepping all rows
+through all trees at once for max_depth steps. Loading with mmap maps the
+files read-only, so every process serving the same artifact shares a single
+copy of the weights through the OS page cache.
+"""
+import json
+import os
+
+import numpy as np
+
+ARTIFACT_FORMAT = 2
+MANIFEST_NAME = 'manifest.json'
+
+# Rows evaluated per step; keeps the (rows x trees) node matrix cache-sized
+BLOCK_ROWS = 1024
+
+
+class StandardScaler:
+    """(X - mean) / scale, column-wise"""
+
+    TYPE = 'standard_scaler'
+    ARRAYS = ('mean', 'scale')
+
+    def __init__(self, mean, scale):
+        self.mean = np.asarray(mean)
+        self.scale = np.asarray(scale)
+
+    @property
+    def n_features(self):
+        return len(self.mean)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def metadata(self):
+        return {'type': self.TYPE}
+
+
+class LinearRegressor:
+    """X @ coef + intercept (linear regression, ridge, lasso)"""
+
+    TYPE = 'linear_regressor'
+    ARRAYS = ('coef',)
+
+    def __init__(self, coef, intercept=0.0):
+        self.coef = np.asarray(coef)
+        self.intercept = float(intercept)
+
+    @property
+    def n_features(self):
+        return len(self.coef)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef + self.intercept
+
+    def metadata(self):
+        return {'type': self.TYPE, 'intercept': self.intercept}
+
+
+class TreeEnsemble:
+    """Flattened random forest classifier or gradient boosted regressor
+
+    feature, threshold and children (left, right) describe every node of
+    every tree, roots holds the first node of each tree and value the
+    per-node output (class fractions for classifiers, raw leaf values for
+    regressors). Regressors predict base + scale * sum of leaf values.
+
+    A multi-output regressor concatenates several boosted models (such as
+    one per quantile) so every tree is walked in the same pass. tree_outputs
+    gives each tree's output column, in non-decreasing order, base holds one
+    value per output and labels names the outputs.
+
+    Compressed ensembles (see model_compress) store threshold as an index
+    into threshold_values and value as integers decoded as
+    value_offset + value_step * value. interior_values is False when only
+    leaf values were kept: enough to predict, not to attribute (see
+    model_attributions). Artifacts that do not record it have them unless
+    they are compressed.
+    """
+
+    TYPE = 'tree_ensemble'
+    ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+    OPTIONAL_ARRAYS = ('threshold_values', 'tree_outputs')
+
+    def __init__(self, kind, feature, threshold, children, value, roots, max_depth,
+                 n_features, base=0.0, scale=1.0, classes=None, labels=None,
+                 threshold_values=None, value_step=None, value_offset=0.0, tree_outputs=None,
+                 interior_values=None):
+        if kind not in ('classifier', 'regressor'):
+            raise ValueError(f"Unknown ensemble kind: {kind}")
+        self.kind = kind
+        # asarray drops the memmap subclass (and its per-operation overhead) without copying
+        self.feature = np.asarray(feature)
+        self.threshold = np.asarray(threshold)
+        self.children = np.asarray(children)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.tree_outputs = None if tree_outputs is None else np.asarray(tree_outputs)
+        self.base = float(base) if self.tree_outputs is None else np.asarray(base, dtype=np.float64)
+        self.scale = float(scale)
+        self.classes = None if classes is None else np.asarray(classes)
+        self.labels = None if labels is None else list(labels)
+        self.threshold_values = None if threshold_values is None else np.asarray(threshold_values)
+        self.value_step = None if value_step is None else float(value_step)
+        self.value_offset = float(value_offset)
+        # Compressed artifacts written before interior values were kept have only leaves
+        self.interior_values = self.value_step is None if interior_values is None else bool(interior_values)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_outputs(self):
+        return 1 if self.tree_outputs is None else len(self.base)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in node_arrays(self).values())
+
+    def node_thresholds(self, nodes):
+        thresholds = self.threshold.take(nodes)
+        if self.threshold_values is not None:
+            thresholds = self.threshold_values.take(thresholds)
+        return thresholds
+
+    def node_values(self, nodes):
+        values = self.value[nodes]
+        if self.value_step is not None:
+            values = self.value_offset + self.value_step * values
+        return values
+
+    def _check_input(self, X):
+        # Trees are fitted on float32 inputs; comparing the same values keeps splits identical
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = self._check_input(X)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * self.n_features)[:, None]
+        children = self.children.ravel()
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = flat_X.take(row_offsets + self.feature.take(node)) > self.node_thresholds(node)
+            # intp arithmetic, children may be stored as uint16
+            node = children.take(np.multiply(node, 2, dtype=np.intp) + go_right)
+        return node
+
+    def _tree_sum(self, leaf_values, start=0.0):
+        """Sum over the tree axis in tree order, matching scikit-learn's accumulation"""
+        shape = list(leaf_values.shape)
+        shape[1] = 1
+        stacked = np.concatenate([np.full(shape, start), leaf_values], axis=1)
+        return np.cumsum(stacked, axis=1)[:, -1]
+
+    def _in_blocks(self, func, X):
+        X = self._check_input(X)
+        if len(X) <= BLOCK_ROWS:
+            return func(X)
+        return np.concatenate([func(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+    def _proba_block(self, X):
+        return self._tree_sum(self.node_values(self.apply(X))) / self.n_trees
+
+    def _regression_block(self, X):
+        leaf_values = self.scale * self.node_values(self.apply(X))
+        if self.tree_outputs is None:
+            return self._tree_sum(leaf_values, self.base)
+        bounds = np.searchsorted(self.tree_outputs, np.arange(self.n_outputs + 1))
+        return np.column_stack([self._tree_sum(leaf_values[:, start:end], base)
+                                for start, end, base in zip(bounds[:-1], bounds[1:], self.base)])
+
+    def predict_proba(self, X):
+        if self.kind != 'classifier':
+            raise TypeError("predict_proba is only available for classifiers")
+        return self._in_blocks(self._proba_block, X)
+
+    def predict(self, X):
+        """Predictions, shape (n_samples,) or (n_samples, n_outputs) for multi-output regressors"""
+        if self.kind == 'classifier':
+            return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+        return self._in_blocks(self._regression_block, X)
+
+    def metadata(self):
+        """JSON-serializable attributes stored next to the arrays"""
+        return {
+            'type': self.TYPE,
+            'kind': self.kind,
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'base': self.base if self.tree_outputs is None else self.base.tolist(),
+            'scale': self.scale,
+            'classes': None if self.classes is None else self.classes.tolist(),
+            'labels': self.labels,
+            'value_step': self.value_step,
+            'value_offset': self.value_offset,
+            'interior_values': self.interior_values,
+        }
+
+
+def node_arrays(node):
+    """Arrays a node stores, including optional ones that are set"""
+    names = node.ARRAYS + tuple(name for name in getattr(node, 'OPTIONAL_ARRAYS', ())
+                                if getattr(node, name) is not None)
+    return {name: getattr(node, name) for name in names}
+
+
+NODE_TYPES = {node.TYPE: node for node in (StandardScaler, LinearRegressor, TreeEnsemble)}
+
+
+class Graph:
+    """Nodes applied in order: transforms followed by one final estimator"""
+
+    def __init__(self, nodes, feature_names=None, metrics=None):
+        self.nodes = list(nodes)
+        self.feature_names = None if feature_names is None else list(feature_names)
+        self.metrics = metrics
+
+    @property
+    def n_features(self):
+        return self.nodes[0].n_features
+
+    @property
+    def labels(self):
+        return getattr(self.nodes[-1], 'labels', None)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for node in self.nodes for array in node_arrays(node).values())
+
+    def transform(self, X, steps=None):
+        for node in self.nodes[:steps]:
+            X = node.transform(X)
+        return X
+
+    def predict(self, X):
+        return self.nodes[-1].predict(self.transform(X, -1))
+
+    def predict_proba(self, X):
+        return self.nodes[-1].predict_proba(self.transform(X, -1))
+
+
+def evaluate(models, X, requests):
+    """Run several (model, method) requests over X, the in-process counterpart of ModelServer.evaluate"""
+    X = np.asarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return [getattr(models[name], method)(X) for name, method in requests]
+
+
+def save_models(models, directory):
+    """Write named graphs (or single nodes) as one artifact directory
+
+    The manifest is written last, so a half-written artifact is never picked up.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {'format': ARTIFACT_FORMAT, 'models': {}}
+    for name, model in models.items():
+        graph = model if isinstance(model, Graph) else Graph([model])
+        entries = []
+        for index, node in enumerate(graph.nodes):
+            entry = node.metadata()
+            entry['arrays'] = {}
+            for array_name, array in node_arrays(node).items():
+                filename = f"{name}.{index}.{array_name}.npy"
+                np.save(os.path.join(directory, filename), np.ascontiguousarray(array))
+                entry['arrays'][array_name] = filename
+            entries.append(entry)
+        manifest['models'][name] = {'feature_names': graph.feature_names, 'nodes': entries}
+        if graph.metrics:
+            manifest['models'][name]['metrics'] = graph.metrics
+    _write_manifest(directory, manifest)
+
+
+def _read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def artifact_exists(directory, names=()):
+    """Whether directory holds an artifact, with every model in names if given"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return False
+    if not names:
+        return True
+    return set(names) <= set(_read_manifest(directory)['models'])
+
+
+def artifact_version(directory):
+    """Cheap identifier that changes whenever the artifact's manifest is rewritten, None if missing"""
+    try:
+        stat = os.stat(os.path.join(directory, MANIFEST_NAME))
+    except OSError:
+        return None
+    return f"{os.path.abspath(directory)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def artifact_metrics(directory):
+    """{model: metrics} from the manifest alone, for models that have them"""
+    return {name: entry['metrics'] for name, entry in _read_manifest(directory)['models'].items()
+            if entry.get('metrics')}
+
+
+def store_metrics(directory, metrics):
+    """Record {model: metrics} in an existing artifact's manifest"""
+    manifest = _read_manifest(directory)
+    for name, values in metrics.items():
+        manifest['models'][name]['metrics'] = values
+    _write_manifest(directory, manifest)
+
+
+def _load_node(directory, entry, mmap_mode):
+    node_type = NODE_TYPES.get(entry.get('type'))
+    if node_type is None:
+        raise ValueError(f"Unknown node type: {entry.get('type')}")
+    arrays = {
+        array_name: np.load(os.path.join(directory, filename), mmap_mode=mmap_mode)
+        for array_name, filename in entry['arrays'].items()
+    }
+    attributes = {key: value for key, value in entry.items() if key not in ('type', 'arrays')}
+    return node_type(**attributes, **arrays)
+
+
+def load_models(directory, mmap_mode='r'):
+    """Read every graph of an artifact; arrays are memory-mapped unless mmap_mode is None"""
+    manifest = _read_manifest(directory)
+    version = manifest.get('format')
+    if version not in (1, ARTIFACT_FORMAT):
+        raise ValueError(f"Unsupported artifact format: {version}")
+    models = {}
+    for name, entry in manifest['models'].items():
+        # Format 1 stored a single tree ensemble per model
+        entries = [entry] if version == 1 else entry['nodes']
+        models[name] = Graph([_load_node(directory, node, mmap_mode) for node in entries],
+                             entry.get('feature_names'), entry.get('metrics'))
+    return models
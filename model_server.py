@@ -0,0 +1,137 @@
+"""Multi-process model serving over memory-mapped artifacts
+
+    python -m model_server --workers 4 --rows 200000     # throughput check
+
+Worker processes map the exported artifact read-only (see model_runtime), so
+the ensemble weights are resident once in the page cache however many
+workers, or Streamlit replicas, evaluate against them. Batches are split
+across the workers, which run on separate cores without sharing a GIL.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_runtime import evaluate, load_models
+
+# Rows below which a batch is not worth splitting across workers
+MIN_CHUNK_ROWS = 2048
+
+# Seconds warm_up waits for every worker to start before giving up
+WARM_UP_TIMEOUT = 120
+
+# Models loaded by each worker process, and the barrier warm_up holds them on
+_worker_models = None
+_warm_up_barrier = None
+
+
+def _load_worker(directory, barrier):
+    global _worker_models, _warm_up_barrier
+    _worker_models = load_models(directory, mmap_mode='r')
+    _warm_up_barrier = barrier
+
+
+def worker_models():
+    """Models mapped by the current worker process, for functions run through submit()"""
+    return _worker_models
+
+
+def _evaluate(X, requests):
+    return evaluate(_worker_models, X, requests)
+
+
+def _wait_for_workers():
+    _warm_up_barrier.wait(WARM_UP_TIMEOUT)
+    return os.getpid()
+
+
+class ModelServer:
+    """Pool of worker processes evaluating models from one artifact directory"""
+
+    def __init__(self, directory, workers=None):
+        self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        # The parent maps the same files for metadata such as class labels
+        self.models = load_models(directory, mmap_mode='r')
+        # Spawned workers start clean instead of inheriting the server's threads and locks
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(self.workers)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_load_worker, initargs=(directory, barrier))
+
+    def evaluate(self, X, requests):
+        """Run several (model, method) requests over X in one round trip per worker
+
+        Returns one array per request, e.g.
+        evaluate(X, [('plan_type', 'predict_proba'), ('cost', 'predict')]).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_chunks = max(1, min(self.workers, len(X) // MIN_CHUNK_ROWS))
+        futures = [self._pool.submit(_evaluate, chunk, requests) for chunk in np.array_split(X, n_chunks)]
+        parts = [future.result() for future in futures]
+        return [np.concatenate([part[i] for part in parts]) for i in range(len(requests))]
+
+    def submit(self, func, *args):
+        """Run a module-level function in a worker; it can call worker_models()"""
+        return self._pool.submit(func, *args)
+
+    def predict(self, name, X):
+        return self.evaluate(X, [(name, 'predict')])[0]
+
+    def predict_proba(self, name, X):
+        return self.evaluate(X, [(name, 'predict_proba')])[0]
+
+    def warm_up(self):
+        """Start every worker now rather than on the first request
+
+        The pool only spawns a process when no worker is idle, so each task
+        waits on a barrier until all of them are running; a fast worker cannot
+        take a second task and leave the others unstarted.
+        """
+        futures = [self._pool.submit(_wait_for_workers) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    from model_export import MODEL_ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=MODEL_ARTIFACT_DIR, help='exported model artifact')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--rows', type=int, default=200_000, help='rows in the benchmark batch')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.integers(18, 80, args.rows), rng.normal(27, 5, args.rows), rng.integers(0, 2, args.rows),
+        rng.integers(0, 5, args.rows), rng.integers(0, 4, args.rows), rng.integers(1, 5, args.rows),
+    ])
+    requests = [('plan_type', 'predict_proba'), ('cost', 'predict')]
+    with ModelServer(args.directory, args.workers) as server:
+        server.warm_up()
+        start = time.perf_counter()
+        server.evaluate(X, requests)
+        elapsed = time.perf_counter() - start
+    print(f"{args.rows:,} rows on {server.workers} workers: {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    # Go through the module name so spawned workers can unpickle the job functions
+    from model_server import main as module_main
+    sys.exit(module_main())
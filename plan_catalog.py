@@ -0,0 +1,230 @@
+"""Insurance plan catalog and state-to-region mapping shared by the app and batch tools"""
+
+# Enhanced Insurance Companies Database
+INSURANCE_COMPANIES = {
+    'budget_friendly': [
+        {
+            'name': 'Ambetter Health',
+            'monthly': 185,
+            'deductible': 5800,
+            'coverage': 'Essential',
+            'network': 'Regional+',
+            'rating': 4.2,
+            'features': ['Telehealth included', 'Generic drug coverage', 'Preventive care'],
+            'best_for': 'Young adults, healthy individuals',
+            'copay': '$35',
+            'oop_max': '$8700',
+            'plan_type': 'HDHP',
+            'metal_tier': 'Bronze',
+            'benefits': ['Telemedicine']
+        },
+        {
+            'name': 'Oscar Health',
+            'monthly': 225,
+            'deductible': 4500,
+            'coverage': 'Digital First',
+            'network': 'Modern Network',
+            'rating': 4.4,
+            'features': ['Award-winning app', 'Virtual care', 'Transparent pricing'],
+            'best_for': 'Tech-savvy, urban professionals',
+            'copay': '$30',
+            'oop_max': '$8000',
+            'plan_type': 'EPO',
+            'metal_tier': 'Silver',
+            'benefits': ['Telemedicine', 'Mental Health']
+        },
+        {
+            'name': 'Molina Healthcare',
+            'monthly': 195,
+            'deductible': 5200,
+            'coverage': 'Community Care',
+            'network': 'Community Based',
+            'rating': 4.1,
+            'features': ['Community clinics', 'Medicaid expertise', 'Multi-language support'],
+            'best_for': 'Community-focused, diverse populations',
+            'copay': '$40',
+            'oop_max': '$9100',
+            'plan_type': 'HMO',
+            'metal_tier': 'Bronze',
+            'benefits': ['Vision']
+        }
+    ],
+    'comprehensive': [
+        {
+            'name': 'Blue Cross Blue Shield',
+            'monthly': 385,
+            'deductible': 2200,
+            'coverage': 'Comprehensive Plus',
+            'network': 'National Network',
+            'rating': 4.6,
+            'features': ['Largest network', 'Nationwide coverage', 'Specialist access'],
+            'best_for': 'Frequent travelers, comprehensive needs',
+            'copay': '$25',
+            'oop_max': '$6000',
+            'plan_type': 'PPO',
+            'metal_tier': 'Gold',
+            'benefits': ['Dental', 'Vision', 'Mental Health', 'Maternity', 'Telemedicine']
+        },
+        {
+            'name': 'Aetna CVS Health',
+            'monthly': 420,
+            'deductible': 1800,
+            'coverage': 'Premium Care',
+            'network': 'Premium Network',
+            'rating': 4.5,
+            'features': ['Wellness programs', 'Chronic care management', 'Premium providers'],
+            'best_for': 'Health-conscious, chronic conditions',
+            'copay': '$20',
+            'oop_max': '$5500',
+            'plan_type': 'PPO',
+            'metal_tier': 'Platinum',
+            'benefits': ['Vision', 'Mental Health', 'Wellness Programs', 'Telemedicine']
+        },
+        {
+            'name': 'Cigna HealthSpring',
+            'monthly': 365,
+            'deductible': 2500,
+            'coverage': 'Complete Care',
+            'network': 'Global Network',
+            'rating': 4.3,
+            'features': ['International coverage', 'Mental health focus', 'Integrated care'],
+            'best_for': 'International needs, mental health priority',
+            'copay': '$30',
+            'oop_max': '$6500',
+            'plan_type': 'POS',
+            'metal_tier': 'Gold',
+            'benefits': ['Mental Health', 'Telemedicine', 'Alternative Medicine', 'International Coverage']
+        }
+    ],
+    'family': [
+        {
+            'name': 'Kaiser Permanente',
+            'monthly': 780,
+            'deductible': 3200,
+            'coverage': 'Family Complete',
+            'network': 'Integrated HMO',
+            'rating': 4.7,
+            'features': ['Own hospitals', 'Coordinated care', 'Family wellness'],
+            'best_for': 'Families wanting integrated care',
+            'copay': '$20',
+            'oop_max': '$12000',
+            'plan_type': 'HMO',
+            'metal_tier': 'Gold',
+            'benefits': ['Vision', 'Mental Health', 'Maternity', 'Wellness Programs']
+        },
+        {
+            'name': 'UnitedHealthcare',
+            'monthly': 850,
+            'deductible': 2800,
+            'coverage': 'Family Choice Plus',
+            'network': 'Extensive PPO',
+            'rating': 4.4,
+            'features': ['Flexible networks', 'Pediatric specialists', 'Family discounts'],
+            'best_for': 'Large families, flexibility priority',
+            'copay': '$25',
+            'oop_max': '$14000',
+            'plan_type': 'PPO',
+            'metal_tier': 'Silver',
+            'benefits': ['Dental', 'Vision', 'Maternity', 'Telemedicine']
+        },
+        {
+            'name': 'Anthem BlueCross',
+            'monthly': 920,
+            'deductible': 2200,
+            'coverage': 'Family Premium',
+            'network': 'Premium PPO',
+            'rating': 4.5,
+            'features': ['Premium providers', 'Maternity care', 'Child wellness'],
+            'best_for': 'Premium family care, growing families',
+            'copay': '$15',
+            'oop_max': '$10000',
+            'plan_type': 'PPO',
+            'metal_tier': 'Platinum',
+            'benefits': ['Dental', 'Vision', 'Mental Health', 'Maternity', 'Wellness Programs']
+        }
+    ],
+    'senior': [
+        {
+            'name': 'Humana Medicare Advantage',
+            'monthly': 125,
+            'deductible': 1200,
+            'coverage': 'Senior Plus',
+            'network': 'Medicare Network',
+            'rating': 4.6,
+            'features': ['Medicare expertise', 'Senior benefits', 'Prescription included'],
+            'best_for': '65+ Medicare-eligible seniors',
+            'copay': '$10',
+            'oop_max': '$3500',
+            'plan_type': 'HMO',
+            'metal_tier': 'Silver',
+            'benefits': ['Dental', 'Vision', 'Wellness Programs']
+        },
+        {
+            'name': 'Aetna Medicare',
+            'monthly': 145,
+            'deductible': 1000,
+            'coverage': 'Senior Complete',
+            'network': 'Medicare Plus',
+            'rating': 4.4,
+            'features': ['Chronic condition support', 'Wellness programs', 'Coordinated care'],
+            'best_for': 'Seniors with chronic conditions',
+            'copay': '$15',
+            'oop_max': '$3000',
+            'plan_type': 'PPO',
+            'metal_tier': 'Gold',
+            'benefits': ['Vision', 'Wellness Programs', 'Telemedicine']
+        },
+        {
+            'name': 'Wellcare Medicare',
+            'monthly': 95,
+            'deductible': 1500,
+            'coverage': 'Essential Senior',
+            'network': 'Value Network',
+            'rating': 4.2,
+            'features': ['Budget-friendly', 'Essential coverage', 'Prescription focus'],
+            'best_for': 'Budget-conscious seniors',
+            'copay': '$20',
+            'oop_max': '$4000',
+            'plan_type': 'HMO',
+            'metal_tier': 'Bronze',
+            'benefits': ['Vision']
+        }
+    ]
+}
+
+# US States and their regions
+STATE_REGIONS = {
+    'Alabama': 'Southeast', 'Alaska': 'Northwest', 'Arizona': 'Southwest', 'Arkansas': 'South',
+    'California': 'West', 'Colorado': 'West', 'Connecticut': 'Northeast', 'Delaware': 'Northeast',
+    'Florida': 'Southeast', 'Georgia': 'Southeast', 'Hawaii': 'West', 'Idaho': 'Northwest',
+    'Illinois': 'Midwest', 'Indiana': 'Midwest', 'Iowa': 'Midwest', 'Kansas': 'Midwest',
+    'Kentucky': 'South', 'Louisiana': 'South', 'Maine': 'Northeast', 'Maryland': 'Northeast',
+    'Massachusetts': 'Northeast', 'Michigan': 'Midwest', 'Minnesota': 'Midwest', 'Mississippi': 'South',
+    'Missouri': 'Midwest', 'Montana': 'Northwest', 'Nebraska': 'Midwest', 'Nevada': 'West',
+    'New Hampshire': 'Northeast', 'New Jersey': 'Northeast', 'New Mexico': 'Southwest', 'New York': 'Northeast',
+    'North Carolina': 'Southeast', 'North Dakota': 'Midwest', 'Ohio': 'Midwest', 'Oklahoma': 'South',
+    'Oregon': 'Northwest', 'Pennsylvania': 'Northeast', 'Rhode Island': 'Northeast', 'South Carolina': 'Southeast',
+    'South Dakota': 'Midwest', 'Tennessee': 'South', 'Texas': 'South', 'Utah': 'West',
+    'Vermont': 'Northeast', 'Virginia': 'Southeast', 'Washington': 'Northwest', 'West Virginia': 'Southeast',
+    'Wisconsin': 'Midwest', 'Wyoming': 'West'
+}
+
+# US state postal codes, as used by marketplace plan data
+STATE_CODES = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA', 'Colorado': 'CO',
+    'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
+    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA',
+    'Maine': 'ME', 'Maryland': 'MD', 'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN',
+    'Mississippi': 'MS', 'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
+    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC',
+    'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
+    'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX',
+    'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
+    'Wisconsin': 'WI', 'Wyoming': 'WY'
+}
+
+
+def all_plans():
+    """Every plan in the catalog as one list, each tagged with its category"""
+    return [dict(plan, category=category)
+            for category, plans in INSURANCE_COMPANIES.items() for plan in plans]
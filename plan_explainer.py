@@ -0,0 +1,319 @@
+"""Plain-language explanations of plan recommendations from a language model
+
+    python -m plan_explainer "why not a cheaper plan?"          # offline stub model
+    MEDICOST_LLM=openai python -m plan_explainer --age 58 --smoker
+
+The model never sees the dataset. The page already has every number an
+explanation needs: the profile, the cost model's prediction, the average
+charges of similar people from the aggregate cube, and the ranked plans with
+their expected annual cost. Those become a small facts dict, rounded so that
+near-identical profiles share it. The facts and the user's question are
+rendered into a fixed prompt. Responses are cached under a hash of the facts,
+the normalized question, the model and PROMPT_VERSION. A repeated question
+costs a dict lookup and streams back instantly.
+
+Models (MEDICOST_LLM, default 'openai' when OPENAI_API_KEY is set, else 'stub'):
+    stub    offline template answer built from the facts, for tests and demos
+    openai  chat completions streamed through the openai package
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Bumped whenever the prompt or the facts change, so old cached answers are not reused
+PROMPT_VERSION = 3
+
+LLM_BACKEND = os.environ.get('MEDICOST_LLM', 'openai' if os.environ.get('OPENAI_API_KEY') else 'stub')
+LLM_MODEL = os.environ.get('MEDICOST_LLM_MODEL', 'gpt-4o-mini')
+
+# Cached answers kept per process
+CACHE_ENTRIES = 512
+
+DEFAULT_QUESTION = 'Why are these plans a good fit for me?'
+
+SYSTEM_PROMPT = (
+    "You are a health insurance advisor. Explain the recommended plans to the user in plain language, "
+    "in at most three short paragraphs. Use only the facts given; do not invent prices, benefits or plans. "
+    "Quote dollar amounts as given. If the question cannot be answered from the facts, say so."
+)
+
+# Reply to a general question that could not be answered; never cached
+UNANSWERED = "I don't have an answer to that yet. Please check with the insurer or Healthcare.gov."
+
+QUESTION_PROMPT = (
+    "You are a health insurance advisor. Answer the user's general insurance question in at most two short "
+    "paragraphs. Prefer the reference answers when they apply and do not contradict them. Answers are reused "
+    "for other people's similar questions, so answer in general terms and never repeat personal, medical or "
+    f"financial details from the question. If you cannot answer, reply with exactly: {UNANSWERED}"
+)
+
+# Openings of replies that decline rather than answer
+REFUSAL_PATTERN = re.compile(r"\s*(i'?m sorry|sorry|i (do not|don't|cannot|can't|am unable|'m unable))", re.IGNORECASE)
+
+# Rounding applied to facts before they are cached on, so nearby profiles share answers
+COST_ROUNDING = 100
+BMI_ROUNDING = 1
+
+
+class ExplanationError(Exception):
+    """The language model could not produce an explanation"""
+
+
+def _round(value, step):
+    return int(round(float(value) / step) * step)
+
+
+def profile_facts(profile, category, expected_cost, plans, plan_costs, cohort_cost=None, cost_drivers=()):
+    """Facts an explanation may use, normalized for caching
+
+    profile is the user's profile, category the recommended plan category,
+    expected_cost the predicted annual medical cost, plans the recommended
+    plans with plan_costs their expected total annual cost, cohort_cost
+    the average charges of similar people in the dataset, and cost_drivers
+    (label, dollars) pairs from model_attributions.
+    """
+    facts = {
+        'age': int(profile.get('age', 30)),
+        'bmi': _round(profile.get('bmi', 25), BMI_ROUNDING),
+        'smoker': bool(profile.get('smoker', 0)),
+        'children': int(profile.get('children', 0)),
+        'state': profile.get('state') or 'unknown',
+        'income_level': int(profile.get('income_level', 3)),
+        'category': category.replace('_', ' '),
+        'expected_medical_cost': _round(expected_cost, COST_ROUNDING),
+        'plans': [
+            {
+                'name': plan['name'],
+                'monthly_premium': int(plan['monthly']),
+                'deductible': int(plan['deductible']),
+                'out_of_pocket_max': plan['oop_max'],
+                'rating': float(plan['rating']),
+                'network': plan['network'],
+                'features': list(plan['features']),
+                'expected_annual_total': _round(cost, COST_ROUNDING),
+            }
+            for plan, cost in zip(plans, plan_costs)
+        ],
+    }
+    if cost_drivers:
+        facts['cost_drivers'] = {label.lower(): _round(value, COST_ROUNDING) for label, value in cost_drivers}
+    if cohort_cost is not None and cohort_cost == cohort_cost:
+        facts['similar_people_average_cost'] = _round(cohort_cost, COST_ROUNDING)
+    return facts
+
+
+def normalize_question(question):
+    return re.sub(r'\s+', ' ', (question or '').strip().lower()) or DEFAULT_QUESTION.lower()
+
+
+def build_messages(facts, question):
+    """Chat messages for one explanation: fixed instructions, then the facts and the question"""
+    return [
+        {'role': 'system', 'content': SYSTEM_PROMPT},
+        {'role': 'user', 'content': f"Facts:\n{json.dumps(facts, indent=1)}\n\nQuestion: {question or DEFAULT_QUESTION}"},
+    ]
+
+
+def question_messages(question, references=()):
+    """Chat messages for a general question, with (question, answer) references from the FAQ cache"""
+    references = [{'question': q, 'answer': a} for q, a in references]
+    return [
+        {'role': 'system', 'content': QUESTION_PROMPT},
+        {'role': 'user', 'content': f"References:\n{json.dumps(references, indent=1)}\n\nQuestion: {question}"},
+    ]
+
+
+def cache_key(facts, question, model):
+    payload = json.dumps([PROMPT_VERSION, model, facts, normalize_question(question)], sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class StubModel:
+    """Offline stand-in that answers from the facts with a fixed template
+
+    delay sleeps between streamed words, to mimic a remote model.
+    """
+
+    name = 'stub'
+    # Template answers are not worth remembering
+    offline = True
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def answer(self, messages):
+        content = messages[-1]['content']
+        if content.startswith('References:'):
+            references = json.loads(content.split('References:\n', 1)[1].rsplit('\n\nQuestion:', 1)[0])
+            if not references:
+                return UNANSWERED
+            return f"The closest question we have answered is \"{references[0]['question']}\": {references[0]['answer']}"
+        facts = json.loads(messages[-1]['content'].split('Facts:\n', 1)[1].rsplit('\n\nQuestion:', 1)[0])
+        who = f"a {facts['age']}-year-old {'smoker' if facts['smoker'] else 'non-smoker'}"
+        if facts['state'] != 'unknown':
+            who += f" in {facts['state']}"
+        text = (f"For {who}, we expect about ${facts['expected_medical_cost']:,} in medical costs a year, "
+                f"which points to {facts['category']} plans.")
+        if 'similar_people_average_cost' in facts:
+            comparison = 'above' if facts['expected_medical_cost'] > facts['similar_people_average_cost'] else 'at or below'
+            text += (f" That is {comparison} the ${facts['similar_people_average_cost']:,} average for people "
+                     f"with a similar profile.")
+        raised = [(label, value) for label, value in facts.get('cost_drivers', {}).items() if value > 0]
+        if raised:
+            label, value = max(raised, key=lambda item: item[1])
+            text += f" The biggest factor raising it is {label} (+${value:,})."
+        for plan in facts['plans']:
+            text += (f"\n\n{plan['name']} costs ${plan['monthly_premium']}/month with a ${plan['deductible']:,} "
+                     f"deductible, about ${plan['expected_annual_total']:,} a year in all. "
+                     f"It is rated {plan['rating']}/5 and includes {', '.join(plan['features']).lower()}.")
+        return text
+
+    def stream(self, messages):
+        for word in re.findall(r'\S+\s*', self.answer(messages)):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word
+
+
+class OpenAIModel:
+    """Chat completions through the openai package (imported only when this model is used)"""
+
+    def __init__(self, model=LLM_MODEL, api_key=None, timeout=30):
+        try:
+            from openai import OpenAI, OpenAIError
+        except ImportError as exc:
+            raise ExplanationError("The openai package is not installed") from exc
+        self.name = f"openai:{model}"
+        self.model = model
+        try:
+            self.client = OpenAI(api_key=api_key or os.environ.get('OPENAI_API_KEY'), timeout=timeout)
+        except OpenAIError as exc:
+            raise ExplanationError(str(exc)) from exc
+
+    def stream(self, messages):
+        response = self.client.chat.completions.create(model=self.model, messages=messages, temperature=0,
+                                                       stream=True)
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+MODELS = {
+    'stub': StubModel,
+    'openai': OpenAIModel,
+}
+
+
+def make_model(backend=LLM_BACKEND, **kwargs):
+    if backend not in MODELS:
+        raise ValueError(f"Unknown language model backend: {backend}")
+    return MODELS[backend](**kwargs)
+
+
+class Explainer:
+    """Streams explanations, caching complete answers in a bounded LRU"""
+
+    def __init__(self, model=None, max_entries=CACHE_ENTRIES):
+        self.model = model if model is not None else make_model()
+        self.max_entries = max_entries
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def cached(self, facts, question=None):
+        """The cached answer for these facts and question, or None"""
+        key = cache_key(facts, question, self.model.name)
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is not None:
+                self._answers.move_to_end(key)
+            return answer
+
+    def _store(self, key, answer):
+        with self._lock:
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def stream(self, facts, question=None):
+        """Yield the answer in chunks; a cached answer comes back as a single chunk
+
+        Only answers streamed to the end are cached, so an interrupted or
+        failed response is asked again next time.
+        """
+        answer = self.cached(facts, question)
+        if answer is not None:
+            self.hits += 1
+            yield answer
+            return
+        self.misses += 1
+        chunks = []
+        for chunk in self._generate(build_messages(facts, question)):
+            chunks.append(chunk)
+            yield chunk
+        self._store(cache_key(facts, question, self.model.name), ''.join(chunks))
+
+    def explain(self, facts, question=None):
+        return ''.join(self.stream(facts, question))
+
+    def ask(self, question, references=()):
+        """Stream an answer to a general question; faq_cache does the caching for these"""
+        return self._generate(question_messages(question, references))
+
+    def reusable(self, answer):
+        """Whether an answer from ask() may be cached for other people's questions
+
+        Only a real model's answers qualify; the offline stub, UNANSWERED and
+        refusals are shown once and forgotten.
+        """
+        answer = (answer or '').strip()
+        return (not getattr(self.model, 'offline', False) and bool(answer) and answer != UNANSWERED
+                and not REFUSAL_PATTERN.match(answer))
+
+    def _generate(self, messages):
+        try:
+            yield from self.model.stream(messages)
+        except ExplanationError:
+            raise
+        except Exception as exc:
+            raise ExplanationError(f"{self.model.name} failed: {exc}") from exc
+
+
+def main(argv=None):
+    from plan_catalog import all_plans
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('question', nargs='?', default=DEFAULT_QUESTION)
+    parser.add_argument('--backend', default=LLM_BACKEND, choices=sorted(MODELS))
+    parser.add_argument('--age', type=int, default=35)
+    parser.add_argument('--smoker', action='store_true')
+    parser.add_argument('--state', default='Texas')
+    args = parser.parse_args(argv)
+
+    plans = [plan for plan in all_plans() if plan['category'] == 'comprehensive'][:3]
+    profile = {'age': args.age, 'smoker': int(args.smoker), 'state': args.state}
+    expected = 4_000 + 2_000 * args.smoker + 60 * args.age
+    facts = profile_facts(profile, 'comprehensive', expected, plans,
+                          [plan['monthly'] * 12 + 0.3 * plan['deductible'] for plan in plans])
+    try:
+        explainer = Explainer(make_model(args.backend))
+        for attempt in ('first', 'cached'):
+            start = time.perf_counter()
+            answer = explainer.explain(facts, args.question)
+            print(f"[{attempt} answer in {(time.perf_counter() - start) * 1000:.1f} ms]")
+    except ExplanationError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    print(answer)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
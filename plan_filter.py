@@ -0,0 +1,218 @@
+"""Constraint filtering over an indexed plan catalog
+
+    python -m plan_filter --plans 100000          # filter latency on a synthetic catalog
+
+Every categorical attribute value (plan type, metal tier and up, network size
+and up, out-of-network coverage, copay bucket, each benefit) gets a bitset
+over the catalog: one bit per plan, packed into uint64 words. A query ANDs
+the bitsets of its constraints, unpacks the survivors once and only then
+checks the premium, deductible and out-of-pocket limits on them. Everything
+before that is word-level work over len(catalog) / 64 words.
+
+Constraints are a dict with any of:
+    plan_type       'PPO', 'HMO', 'EPO', 'HDHP' or 'POS'
+    coverage_level  minimum metal tier ('Bronze' < 'Silver' < 'Gold' < 'Platinum')
+    network_size    minimum network breadth ('Local', 'Regional', 'National', 'International')
+    out_of_network  True to require out-of-network coverage
+    copay           'Low Copays', 'Moderate Copays' or 'High Copays OK'
+    benefits        benefits that must all be included
+    max_premium, max_deductible, max_oop   dollar limits (monthly premium, annual deductible, out-of-pocket maximum)
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from plan_ranking import PlanTable, sample_catalog
+
+PLAN_TYPES = ('PPO', 'HMO', 'EPO', 'HDHP', 'POS')
+METAL_TIERS = ('Bronze', 'Silver', 'Gold', 'Platinum')
+BENEFITS = ('Dental', 'Vision', 'Mental Health', 'Maternity', 'Wellness Programs',
+            'Telemedicine', 'Alternative Medicine', 'International Coverage')
+
+# Network size -> minimum plan_ranking network breadth
+NETWORK_SIZES = {'Local': 0.0, 'Regional': 0.5, 'National': 0.9, 'International': 1.0}
+
+# Plan types that pay for out-of-network care
+OUT_OF_NETWORK_TYPES = ('PPO', 'POS')
+
+# Copay preference -> highest acceptable copay in dollars
+COPAY_LIMITS = {'Low Copays': 20, 'Moderate Copays': 35, 'High Copays OK': float('inf')}
+
+# Profile field -> constraint, for the advanced form
+PROFILE_CONSTRAINTS = {
+    'plan_type': 'plan_type',
+    'coverage_level': 'coverage_level',
+    'network_size': 'network_size',
+    'out_of_network': 'out_of_network',
+    'copay_preference': 'copay',
+    'required_benefits': 'benefits',
+    'max_premium': 'max_premium',
+    'max_deductible': 'max_deductible',
+    'max_oop': 'max_oop',
+}
+
+# Constraint name -> wording for plans that miss it; benefit constraints read as the benefit itself
+CONSTRAINT_LABELS = {
+    'plan_type': 'plan type',
+    'coverage_level': 'coverage level',
+    'network_size': 'network size',
+    'out_of_network': 'out-of-network coverage',
+    'copay': 'copays',
+    'max_premium': 'premium',
+    'max_deductible': 'deductible',
+    'max_oop': 'out-of-pocket maximum',
+}
+
+
+def describe(violations):
+    """'premium, deductible and Dental' for a list of violated constraint names"""
+    labels = [CONSTRAINT_LABELS.get(name, name.split(':', 1)[-1]) for name in violations]
+    return ' and '.join(filter(None, [', '.join(labels[:-1]), labels[-1]])) if labels else ''
+
+
+def pack(mask):
+    """Bool mask -> uint64 words, bit i of the catalog at word i // 64, bit i % 64"""
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def unpack(words, size):
+    """Positions of the set bits among the first size
+
+    Only non-zero words are expanded, so a selective query costs little more
+    than one scan of the words.
+    """
+    occupied = np.flatnonzero(words)
+    # Unpacked bits are 0/1 bytes; reading them as bool takes NumPy's fast nonzero path
+    bits = np.flatnonzero(np.unpackbits(words[occupied].view(np.uint8), bitorder='little').view(bool))
+    positions = occupied[bits // 64] * 64 + bits % 64
+    return positions[positions < size]
+
+
+class PlanIndex:
+    """Bitsets over a PlanTable for constraint queries"""
+
+    def __init__(self, table):
+        self.table = table
+        plans = table.plans
+        plan_types = np.array([plan.get('plan_type', '') for plan in plans], dtype=object)
+        tiers = np.array([METAL_TIERS.index(plan['metal_tier']) if plan.get('metal_tier') in METAL_TIERS else -1
+                          for plan in plans])
+
+        self.bitsets = {}
+        for plan_type in PLAN_TYPES:
+            self.bitsets['plan_type', plan_type] = pack(plan_types == plan_type)
+        for rank, tier in enumerate(METAL_TIERS):
+            self.bitsets['coverage_level', tier] = pack(tiers >= rank)
+        for size, breadth in NETWORK_SIZES.items():
+            self.bitsets['network_size', size] = pack(table.network >= breadth)
+        self.bitsets['out_of_network', True] = pack(np.isin(plan_types, OUT_OF_NETWORK_TYPES))
+        for preference, limit in COPAY_LIMITS.items():
+            self.bitsets['copay', preference] = pack(table.copay <= limit)
+        for benefit in BENEFITS:
+            self.bitsets['benefits', benefit] = pack(np.array([benefit in plan.get('benefits', ()) for plan in plans],
+                                                              dtype=bool))
+        self.attributes = {name for name, _ in self.bitsets}
+        self.everything = pack(np.ones(len(table), dtype=bool))
+        self.nothing = np.zeros_like(self.everything)
+
+        self.limits = {
+            'max_premium': table.monthly,
+            'max_deductible': table.deductible,
+            'max_oop': table.oop_max,
+        }
+
+    def __len__(self):
+        return len(self.table)
+
+    def _split(self, constraints):
+        """Active constraints as (name, bitset) pairs and (name, values, limit) triples"""
+        bitsets, limits = [], []
+        for name, value in constraints.items():
+            if value is None or value is False or (name == 'benefits' and not value):
+                continue
+            if name in self.limits:
+                limits.append((name, self.limits[name], value))
+            elif name == 'benefits':
+                for benefit in value:
+                    bitsets.append((f'benefit:{benefit}', self.bitsets.get(('benefits', benefit), self.nothing)))
+            elif name in self.attributes:
+                bitsets.append((name, self.bitsets.get((name, value), self.nothing)))
+            else:
+                raise ValueError(f"Unknown plan constraint: {name}")
+        return bitsets, limits
+
+    def match(self, constraints):
+        """Catalog indices of the plans meeting every constraint, in catalog order
+
+        The bitsets narrow the catalog first; the dollar limits are then
+        checked on the surviving plans only.
+        """
+        bitsets, limits = self._split(constraints)
+        words = self.everything.copy()
+        for _, bits in bitsets:
+            np.bitwise_and(words, bits, out=words)
+        candidates = unpack(words, len(self))
+        for _, values, limit in limits:
+            candidates = candidates[values[candidates] <= limit]
+        return candidates
+
+    def mask(self, constraints):
+        """Bool mask of the plans meeting every constraint, for rank_plans(mask=)"""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.match(constraints)] = True
+        return mask
+
+    def miss_counts(self, constraints):
+        """Number of constraints each plan fails, for picking the closest plans when too few match"""
+        bitsets, limits = self._split(constraints)
+        misses = np.zeros(len(self), dtype=np.intp)
+        for _, bits in bitsets:
+            misses += 1 - np.unpackbits(bits.view(np.uint8), count=len(self), bitorder='little')
+        for _, values, limit in limits:
+            misses += values > limit
+        return misses
+
+    def violations(self, constraints, index):
+        """Names of the constraints plan `index` fails"""
+        bitsets, limits = self._split(constraints)
+        word, bit = divmod(int(index), 64)
+        return ([name for name, bits in bitsets if not (int(bits[word]) >> bit) & 1] +
+                [name for name, values, limit in limits if values[index] > limit])
+
+
+def constraints_from_profile(profile):
+    """Constraint dict from the advanced form's profile fields"""
+    return {constraint: profile.get(field) for field, constraint in PROFILE_CONSTRAINTS.items()
+            if profile.get(field) is not None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=100_000, help='synthetic catalog size')
+    parser.add_argument('--queries', type=int, default=1_000, help='queries to time')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = PlanIndex(PlanTable(sample_catalog(args.plans)))
+    built = time.perf_counter() - start
+
+    constraints = {'plan_type': 'PPO', 'coverage_level': 'Silver', 'network_size': 'Regional',
+                   'copay': 'Moderate Copays', 'benefits': ('Dental', 'Vision'),
+                   'max_premium': 600, 'max_deductible': 4000, 'max_oop': 9000}
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        matches = index.match(constraints)
+    per_query = (time.perf_counter() - start) / args.queries
+
+    print(f"{args.plans:,} plans: index built in {built:.2f}s, "
+          f"{per_query * 1e6:.0f} us per query, {len(matches):,} matches")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
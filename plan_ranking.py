@@ -0,0 +1,267 @@
+"""Top-k plan ranking with weighted, pluggable criteria
+
+    python -m plan_ranking --plans 20000 -k 5        # ranking latency on a synthetic catalog
+
+A catalog is turned into a PlanTable once: one array per plan attribute.
+Ranking a profile is then a few vector operations. Each criterion maps the
+table and a request context to a score in [0, 1] per plan, higher is better.
+The scores are combined with the request's weights. np.partition finds the
+k-th best score in linear time, so only the plans at or above it are sorted.
+
+Criteria (CRITERIA, extendable by passing criteria=):
+    cost      expected total annual cost (premium plus out-of-pocket on the expected claims)
+    rating    member rating out of 5
+    network   network breadth, from keywords in the network name
+    benefits  share of the requested benefits in the plan's features, else copay and feature count
+    fit       classifier probability of the plan's category, relative to the most likely one
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from household_scoring import out_of_pocket, parse_dollars, plan_terms
+from ml_models import PLAN_CATEGORIES
+
+# Network name keyword -> breadth score; the first keyword found wins
+NETWORK_BREADTH = (
+    ('global', 1.0), ('international', 1.0), ('national', 0.9), ('extensive', 0.8),
+    ('premium', 0.7), ('medicare', 0.6), ('modern', 0.6), ('regional', 0.5), ('integrated', 0.5),
+    ('value', 0.4), ('community', 0.3), ('local', 0.3),
+)
+DEFAULT_NETWORK_BREADTH = 0.5
+
+# Senior (Medicare) plans are only offered from this age
+MEDICARE_AGE = 65
+
+# Weights for the recommendations page: the classifier's category leads, cost and quality break ties
+RECOMMENDATION_WEIGHTS = {'fit': 0.4, 'cost': 0.3, 'rating': 0.15, 'network': 0.1, 'benefits': 0.05}
+
+# Switching form priorities -> criterion they add weight to
+PRIORITY_CRITERIA = {
+    'Lower Costs': 'cost',
+    'Better Coverage': 'benefits',
+    'Larger Network': 'network',
+    'Specific Doctors': 'network',
+    'Better Service': 'rating',
+    'Additional Benefits': 'benefits',
+}
+
+
+def network_breadth(network):
+    """Breadth score in [0, 1] for one network name"""
+    name = network.lower()
+    for keyword, score in NETWORK_BREADTH:
+        if keyword in name:
+            return score
+    return DEFAULT_NETWORK_BREADTH
+
+
+class PlanTable:
+    """Column arrays for a plan list, built once and shared by every ranking request"""
+
+    def __init__(self, plans, categories=PLAN_CATEGORIES):
+        self.plans = list(plans)
+        self.categories = tuple(categories)
+        self.names = np.array([plan['name'] for plan in self.plans], dtype=object)
+        self.premium, self.deductible, self.oop_max = plan_terms(self.plans)
+        self.monthly = self.premium / 12
+        self.rating = np.array([plan['rating'] for plan in self.plans], dtype=np.float64)
+        self.copay = np.array([parse_dollars(plan['copay']) for plan in self.plans])
+        self.feature_count = np.array([len(plan['features']) for plan in self.plans], dtype=np.float64)
+        # Marketplace plans are sold in one state; catalog plans have no state and are offered everywhere
+        self.state = np.array([plan.get('state', '') for plan in self.plans], dtype=object)
+        self.category = np.array([self.categories.index(plan['category']) if plan.get('category') in self.categories
+                                  else -1 for plan in self.plans], dtype=np.intp)
+
+        # Catalogs repeat a handful of network names, so each distinct name is scored once
+        networks, index = np.unique([plan['network'] for plan in self.plans], return_inverse=True)
+        self.network = np.array([network_breadth(name) for name in networks])[index]
+
+        self.features = pd.Series(['|'.join(plan['features']).lower() for plan in self.plans])
+
+    def __len__(self):
+        return len(self.plans)
+
+
+def _normalize(values, lower_is_better=False):
+    """Min-max scale to [0, 1]; a constant column scores 1 everywhere"""
+    if not len(values):
+        return values
+    low, high = values.min(), values.max()
+    if high <= low:
+        return np.ones(len(values))
+    scaled = (values - low) / (high - low)
+    return 1 - scaled if lower_is_better else scaled
+
+
+def cost_score(table, context):
+    claims = context.get('expected_claims', 0.0)
+    total = table.premium + out_of_pocket([claims], table.deductible, table.oop_max)[0]
+    return _normalize(total, lower_is_better=True)
+
+
+def rating_score(table, context):
+    return table.rating / 5.0
+
+
+def network_score(table, context):
+    return table.network
+
+
+def benefits_score(table, context):
+    wanted = [benefit.lower() for benefit in context.get('benefits', ())]
+    if wanted:
+        matched = sum(table.features.str.contains(benefit, regex=False).to_numpy(dtype=np.float64)
+                      for benefit in wanted)
+        return matched / len(wanted)
+    return 0.5 * _normalize(table.copay, lower_is_better=True) + 0.5 * _normalize(table.feature_count)
+
+
+def fit_score(table, context):
+    probs = context.get('category_probs') or {}
+    by_code = np.array([probs.get(category, 0.0) for category in table.categories] + [0.0])
+    # Relative to the most likely category, so a confident and a hesitant classifier rank alike
+    if by_code.max() > 0:
+        by_code /= by_code.max()
+    # Plans outside the known categories (code -1) pick up the trailing 0
+    return by_code[table.category]
+
+
+CRITERIA = {
+    'cost': cost_score,
+    'rating': rating_score,
+    'network': network_score,
+    'benefits': benefits_score,
+    'fit': fit_score,
+}
+
+
+def score_plans(table, weights, context=None, criteria=CRITERIA):
+    """Weighted score per plan in [0, 1] (weights are normalized to sum to 1)"""
+    context = context or {}
+    unknown = set(weights) - set(criteria)
+    if unknown:
+        raise ValueError(f"Unknown ranking criteria: {', '.join(sorted(unknown))}")
+    total_weight = sum(weight for weight in weights.values() if weight > 0)
+    if total_weight <= 0:
+        raise ValueError("At least one ranking weight must be positive")
+
+    scores = np.zeros(len(table))
+    for name, weight in weights.items():
+        if weight > 0:
+            scores += weight * criteria[name](table, context)
+    return scores / total_weight
+
+
+def top_k(scores, k, mask=None):
+    """Indices of the k highest scores, best first; ties keep catalog order
+
+    np.partition finds the k-th best score in linear time and only plans at or
+    above it are sorted.
+    Plans where mask is False are never returned.
+    """
+    candidates = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidate_scores = scores[candidates]
+    if k < len(candidates):
+        kth = -np.partition(-candidate_scores, k - 1)[k - 1]
+        above = np.flatnonzero(candidate_scores > kth)
+        # Candidates are in catalog order, so the first plans tied with the k-th best win the tie
+        tied = np.flatnonzero(candidate_scores == kth)[:k - len(above)]
+        keep = np.concatenate([above, tied])
+        candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+    order = np.lexsort((candidates, -candidate_scores))[:k]
+    return candidates[order]
+
+
+def rank_plans(table, weights, k=3, context=None, mask=None, criteria=CRITERIA):
+    """(indices, scores) of the top k plans in table, best first"""
+    scores = score_plans(table, weights, context, criteria)
+    best = top_k(scores, k, mask)
+    return best, scores[best]
+
+
+def eligible(table, age=None, state=None):
+    """Mask of plans a person of this age, living in this state (postal code), can enroll in
+
+    Unknown age or state does not restrict anything.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    if age is not None and 'senior' in table.categories:
+        mask &= (table.category != table.categories.index('senior')) | (age >= MEDICARE_AGE)
+    if state is not None:
+        mask &= (table.state == '') | (table.state == state)
+    return mask
+
+
+def priority_weights(priorities, base=None):
+    """Ranking weights for the switching form: cost, plus one unit per selected priority"""
+    weights = dict(base or {'cost': 1.0})
+    for priority in priorities:
+        criterion = PRIORITY_CRITERIA.get(priority)
+        if criterion:
+            weights[criterion] = weights.get(criterion, 0.0) + 1.0
+    return weights
+
+
+def sample_catalog(n, seed=0):
+    """Synthetic catalog of n plans shaped like INSURANCE_COMPANIES, for sizing"""
+    rng = np.random.default_rng(seed)
+    networks = [keyword.title() + ' Network' for keyword, _ in NETWORK_BREADTH]
+    benefits = ['Telehealth included', 'Preventive care', 'Maternity care', 'Mental health focus',
+                'Prescription included', 'Vision', 'Dental', 'Wellness programs']
+    plan_types = ('PPO', 'HMO', 'EPO', 'HDHP', 'POS')
+    metal_tiers = ('Bronze', 'Silver', 'Gold', 'Platinum')
+    extras = ['Dental', 'Vision', 'Mental Health', 'Maternity', 'Wellness Programs', 'Telemedicine']
+    plans = []
+    for i in range(n):
+        deductible = int(rng.integers(500, 7000))
+        plans.append({
+            'name': f'Plan {i}',
+            'category': PLAN_CATEGORIES[i % len(PLAN_CATEGORIES)],
+            'monthly': int(rng.integers(90, 1000)),
+            'deductible': deductible,
+            'network': networks[rng.integers(len(networks))],
+            'rating': round(float(rng.uniform(3.0, 5.0)), 1),
+            'features': list(rng.choice(benefits, 3, replace=False)),
+            'copay': f"${int(rng.integers(5, 50))}",
+            'oop_max': f"${deductible + int(rng.integers(1000, 8000))}",
+            'plan_type': plan_types[rng.integers(len(plan_types))],
+            'metal_tier': metal_tiers[rng.integers(len(metal_tiers))],
+            'benefits': list(rng.choice(extras, int(rng.integers(0, 5)), replace=False)),
+        })
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=20_000, help='synthetic catalog size')
+    parser.add_argument('-k', type=int, default=5, help='plans to return')
+    parser.add_argument('--requests', type=int, default=200, help='ranking requests to time')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = PlanTable(sample_catalog(args.plans))
+    built = time.perf_counter() - start
+
+    context = {'expected_claims': 9_000.0, 'category_probs': dict(zip(PLAN_CATEGORIES, (0.1, 0.6, 0.2, 0.1)))}
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        best, scores = rank_plans(table, RECOMMENDATION_WEIGHTS, args.k, context)
+    per_request = (time.perf_counter() - start) / args.requests
+
+    print(f"{args.plans:,} plans: table built in {built:.2f}s, {per_request * 1000:.2f} ms per ranking")
+    for index, score in zip(best, scores):
+        plan = table.plans[index]
+        print(f"  {score:.3f}  {plan['name']:<12} {plan['category']:<16} ${plan['monthly']}/mo  "
+              f"{plan['rating']}  {plan['network']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
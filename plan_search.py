@@ -0,0 +1,243 @@
+"""In-memory text search over plan names, features, networks and descriptions
+
+    python -m plan_search "blue cross"                 # search the catalog
+    python -m plan_search tele --plans 50000            # latency on a synthetic catalog
+
+Plan text fields are tokenized into an inverted index: token -> {plan slot:
+weight}, where the weight reflects which field the token came from (a name
+hit counts more than a description hit). The sorted vocabulary lets every
+query token also match as a prefix ("tele" finds "telehealth" and
+"telemedicine") with a binary search. A plan matches when every query token
+does. Plans are ranked by summed field weights times the token's inverse
+document frequency. Postings are compiled to arrays on first use, so a query
+is a few vectorized scatters into one score array and a partial top-k.
+
+sync() compares a fingerprint of each plan's text with the indexed one and
+only re-indexes plans that were added, changed or removed.
+"""
+import argparse
+import hashlib
+import math
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+from plan_ranking import top_k
+
+# Searchable fields and the weight of a token found in each
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'features': 2.0,
+    'benefits': 2.0,
+    'network': 1.5,
+    'coverage': 1.0,
+    'plan_type': 1.0,
+    'best_for': 1.0,
+}
+
+# Share of a token's weight earned when the query token is only a prefix of it
+PREFIX_WEIGHT = 0.5
+
+# Query tokens shorter than this only match whole tokens
+MIN_PREFIX = 2
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def plan_key(plan):
+    """Stable identity of a plan: its marketplace id when it has one, else its name"""
+    return plan.get('id', plan['name'])
+
+
+def plan_tokens(plan):
+    """{token: weight} for the searchable text of one plan"""
+    weights = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = plan.get(field)
+        if not value:
+            continue
+        text = ' '.join(value) if isinstance(value, (list, tuple)) else str(value)
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0.0), weight)
+    return weights
+
+
+def fingerprint(plan):
+    text = '\x1f'.join(str(plan.get(field, '')) for field in FIELD_WEIGHTS)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+class PlanSearch:
+    """Inverted index over plan text with prefix matching and incremental updates"""
+
+    def __init__(self, plans=()):
+        # Sessions share one index; sync() may run while another session searches
+        self._lock = threading.RLock()
+        self.version = None
+        self.postings = {}
+        self.plans = {}
+        self._tokens = {}
+        self._fingerprints = {}
+        # Each plan keeps the slot it was first indexed in; slots order ties and address score arrays
+        self._slots = {}
+        self._keys = []
+        self._compiled = {}
+        self._vocabulary = []
+        self._vocabulary_stale = False
+        self.sync(plans)
+
+    def __len__(self):
+        return len(self.plans)
+
+    def add(self, plan):
+        """Index one plan, replacing any plan with the same key"""
+        with self._lock:
+            key = plan_key(plan)
+            if key in self.plans:
+                self.remove(key)
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._keys)
+                self._keys.append(key)
+            tokens = plan_tokens(plan)
+            for token, weight in tokens.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = {}
+                    self._vocabulary_stale = True
+                posting[slot] = weight
+                self._compiled.pop(token, None)
+            self.plans[key] = plan
+            self._tokens[key] = tokens
+            self._fingerprints[key] = fingerprint(plan)
+
+    def remove(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            for token in self._tokens.pop(key, ()):
+                posting = self.postings[token]
+                del posting[slot]
+                self._compiled.pop(token, None)
+                if not posting:
+                    del self.postings[token]
+                    self._vocabulary_stale = True
+            self.plans.pop(key, None)
+            self._fingerprints.pop(key, None)
+
+    def sync(self, plans, version=None):
+        """Bring the index in line with a catalog; returns (added or changed, removed) counts
+
+        With a version, a catalog already synced under that version is skipped
+        without looking at its plans.
+        """
+        with self._lock:
+            if version is not None and version == self.version:
+                return 0, 0
+            counts = self._sync(plans)
+            self.version = version
+            return counts
+
+    def _sync(self, plans):
+        current = set()
+        changed = 0
+        for plan in plans:
+            key = plan_key(plan)
+            current.add(key)
+            if self._fingerprints.get(key) != fingerprint(plan):
+                self.add(plan)
+                changed += 1
+            else:
+                self.plans[key] = plan
+        removed = [key for key in self.plans if key not in current]
+        for key in removed:
+            self.remove(key)
+        return changed, len(removed)
+
+    def _posting_arrays(self, token):
+        """(slots, weights) arrays for one token, compiled on first use after a change"""
+        compiled = self._compiled.get(token)
+        if compiled is None:
+            posting = self.postings[token]
+            compiled = self._compiled[token] = (np.fromiter(posting.keys(), dtype=np.intp, count=len(posting)),
+                                                np.fromiter(posting.values(), dtype=np.float64, count=len(posting)))
+        return compiled
+
+    def _expand(self, token):
+        """(indexed token, weight factor) pairs a query token matches"""
+        if token in self.postings:
+            yield token, 1.0
+        if len(token) < MIN_PREFIX:
+            return
+        if self._vocabulary_stale:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_stale = False
+        start = bisect_left(self._vocabulary, token)
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(token):
+                break
+            if candidate != token:
+                yield candidate, PREFIX_WEIGHT
+
+    def search(self, query, k=10):
+        """[(plan, score)] for plans matching every query token, best first"""
+        tokens = tokenize(query)
+        with self._lock:
+            if not tokens or not self.plans:
+                return []
+            return self._search(tokens, k)
+
+    def _search(self, tokens, k):
+        total = len(self.plans)
+        scores = None
+        for token in dict.fromkeys(tokens):
+            token_scores = np.zeros(len(self._keys))
+            for indexed, factor in self._expand(token):
+                slots, weights = self._posting_arrays(indexed)
+                idf = math.log(1 + total / len(slots))
+                token_scores[slots] = np.maximum(token_scores[slots], weights * (factor * idf))
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = np.where((scores > 0) & (token_scores > 0), scores + token_scores, 0.0)
+        best = top_k(scores, k, mask=scores > 0)
+        return [(self.plans[self._keys[slot]], float(scores[slot])) for slot in best]
+
+
+def main(argv=None):
+    from plan_catalog import all_plans
+    from plan_ranking import sample_catalog
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('query')
+    parser.add_argument('-k', type=int, default=5, help='results to show')
+    parser.add_argument('--plans', type=int, help='search a synthetic catalog of this size instead')
+    args = parser.parse_args(argv)
+
+    plans = sample_catalog(args.plans) if args.plans else all_plans()
+    start = time.perf_counter()
+    index = PlanSearch(plans)
+    built = time.perf_counter() - start
+
+    repeats = 200
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = index.search(args.query, args.k)
+    per_query = (time.perf_counter() - start) / repeats
+
+    print(f"{len(index):,} plans, {len(index.postings):,} tokens: built in {built:.2f}s, "
+          f"{per_query * 1e6:.0f} us per query")
+    for plan, score in results:
+        print(f"  {score:6.2f}  {plan['name']}  ({plan['network']}; {', '.join(plan['features'])})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Lightweight per-stage timing for Streamlit reruns
+
+Stages are recorded into a process-wide ring buffer so the cost stays
+constant no matter how long the server runs. Set MEDICOST_PROFILING=0 to
+turn recording off.
+"""
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PROFILING_ENABLED = os.environ.get('MEDICOST_PROFILING', '1') != '0'
+RING_CAPACITY = int(os.environ.get('MEDICOST_PROFILING_CAPACITY', 10_000))
+
+
+class StageTimer:
+    """Ring buffer of (stage, start, duration) records shared by all sessions"""
+
+    def __init__(self, capacity=RING_CAPACITY, enabled=PROFILING_ENABLED):
+        self.enabled = enabled
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block, recording it even if it raises (e.g. st.rerun)"""
+        if not self.enabled:
+            yield
+            return
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            self._local.depth = depth
+            record = (name, start, duration, threading.get_ident(), depth)
+            with self._lock:
+                self._records.append(record)
+
+    def timed(self, name=None):
+        """Decorator form of stage(), named after the function by default"""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def records(self):
+        """Snapshot of the buffer, oldest first"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """Per-stage count and latency percentiles in milliseconds"""
+        durations = {}
+        for name, _, duration, _, _ in self.records():
+            durations.setdefault(name, []).append(duration / 1e6)
+        rows = []
+        for name, values in durations.items():
+            values.sort()
+            rows.append({
+                'stage': name,
+                'count': len(values),
+                'mean_ms': statistics.fmean(values),
+                'p50_ms': values[len(values) // 2],
+                'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max_ms': values[-1],
+                'total_ms': sum(values),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def export_json(self):
+        """Raw records as JSON lines for offline analysis"""
+        return '\n'.join(
+            json.dumps({'stage': name, 'start_ns': start, 'duration_ns': duration,
+                        'thread': thread, 'depth': depth})
+            for name, start, duration, thread, depth in self.records()
+        )
+
+    def export_chrome_trace(self):
+        """Records in Chrome trace event format (load in chrome://tracing or Perfetto)"""
+        events = [
+            {'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': duration / 1000,
+             'pid': os.getpid(), 'tid': thread}
+            for name, start, duration, thread, _ in self.records()
+        ]
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+
+# Process-wide timer used by the app
+TIMER = StageTimer()
+stage = TIMER.stage
+timed = TIMER.timed
@@ -0,0 +1,209 @@
+"""Compact per-session user profiles and an optional SQLite store for idle sessions"""
+import json
+import sqlite3
+import threading
+import time
+
+# Serialization format version, bumped whenever PROFILE_FIELDS changes order
+# or the encoding changes; format 1 (one slot per field, unset ones null) is still read
+PROFILE_FORMAT = 2
+
+# Every key the forms can write, in serialization order: (name, type)
+PROFILE_FIELDS = (
+    ('intent', str),
+    ('experience', str),
+    ('age', int),
+    ('gender', str),
+    ('smoker', int),
+    ('state', str),
+    ('region', str),
+    ('bmi', float),
+    ('children', int),
+    ('marital_status', str),
+    ('conditions', tuple),
+    ('income_range', str),
+    ('income_level', int),
+    ('max_monthly', int),
+    ('health_status', str),
+    ('family_size', str),
+    ('budget', str),
+    ('plan_type', str),
+    ('coverage_level', str),
+    ('advanced', bool),
+    ('current_provider', str),
+    ('current_premium', int),
+    ('switch_reason', tuple),
+    ('priorities', tuple),
+    ('num_adults', int),
+    ('num_children', int),
+    ('children_ages', tuple),
+    ('family_conditions', tuple),
+    ('family_budget', str),
+    ('family_priority', str),
+    ('prescription_tier', str),
+    ('network_size', str),
+    ('specific_providers', str),
+    ('out_of_network', bool),
+    ('max_premium', int),
+    ('max_deductible', int),
+    ('max_oop', int),
+    ('copay_preference', str),
+    ('required_benefits', tuple),
+    ('adult_ages', tuple),
+    ('adult_bmis', tuple),
+    ('adult_smokers', tuple),
+)
+
+FIELD_NAMES = tuple(name for name, _ in PROFILE_FIELDS)
+FIELD_TYPES = dict(PROFILE_FIELDS)
+
+
+class UserProfile:
+    """Typed, slot-based replacement for the free-form user_data dict
+
+    Supports the dict operations the pages rely on (get, [], in, update) so it
+    can sit in st.session_state.user_data unchanged. Unknown keys raise KeyError
+    instead of silently growing the session.
+    """
+    __slots__ = FIELD_NAMES
+
+    def __init__(self, data=None, **kwargs):
+        self.update(data, **kwargs)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in FIELD_TYPES:
+            raise KeyError(f"Unknown profile field: {key}")
+        if value is None:
+            self.__delitem__(key)
+            return
+        object.__setattr__(self, key, FIELD_TYPES[key](value))
+
+    def __delitem__(self, key):
+        try:
+            object.__delattr__(self, key)
+        except AttributeError:
+            pass
+
+    def __contains__(self, key):
+        return key in FIELD_TYPES and hasattr(self, key)
+
+    def __len__(self):
+        return sum(1 for name in FIELD_NAMES if hasattr(self, name))
+
+    def __iter__(self):
+        return (name for name in FIELD_NAMES if hasattr(self, name))
+
+    def __eq__(self, other):
+        if not isinstance(other, UserProfile):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"UserProfile({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in FIELD_TYPES else default
+
+    def update(self, data=None, **kwargs):
+        if data:
+            for key, value in dict(data).items():
+                self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def clear(self):
+        for name in FIELD_NAMES:
+            self.__delitem__(name)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self}
+
+    def to_bytes(self):
+        """Sparse JSON encoding: {field index: value} for the fields that are set"""
+        values = {index: getattr(self, name) for index, name in enumerate(FIELD_NAMES) if hasattr(self, name)}
+        return json.dumps([PROFILE_FORMAT, values], separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, payload):
+        values = json.loads(payload)
+        if not values or values[0] not in (1, PROFILE_FORMAT):
+            raise ValueError("Unsupported profile format")
+        if values[0] == 1:
+            values = dict(enumerate(values[1:]))
+        else:
+            values = {int(index): value for index, value in values[1].items()}
+        profile = cls()
+        for index, value in values.items():
+            if value is not None:
+                profile[FIELD_NAMES[index]] = value
+        return profile
+
+
+class SessionStore:
+    """SQLite-backed store that keeps serialized profiles for idle sessions
+
+    Use ':memory:' for a single process or a file path to share profiles
+    between replicas on one host. Sessions not saved for max_idle_seconds are
+    evicted on the next sweep.
+    """
+
+    def __init__(self, path=':memory:', max_idle_seconds=1800, sweep_interval=60):
+        self.max_idle_seconds = max_idle_seconds
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, touched REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched)")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def save(self, session_id, profile, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, touched) VALUES (?, ?, ?)",
+                (session_id, profile.to_bytes(), now)
+            )
+        if now - self._last_sweep >= self.sweep_interval:
+            self.evict_idle(now)
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return UserProfile.from_bytes(row[0])
+        except (ValueError, KeyError):
+            # Written by an incompatible version, treat as a fresh session
+            self.delete(session_id)
+            return None
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_idle(self, now=None):
+        """Drop abandoned sessions, returning how many were removed"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE touched < ?", (now - self.max_idle_seconds,)
+            )
+        return cursor.rowcount
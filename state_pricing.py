@@ -0,0 +1,78 @@
+"""State-level pricing factors for the cost model
+
+The cost model knows four regions. Forms collect the state, so each state
+gets its own entry in two compact arrays indexed by position in STATES:
+    COST_FACTORS   state cost index (average benchmark premium relative to
+                   the national average, rounded to 0.05), scaling the
+                   model's predicted annual cost
+    MODEL_REGIONS  model region code from the state's Census region, in
+                   place of the coarser form labels (Southwest, Northwest)
+One extra trailing slot holds the neutral entry for an unknown state.
+Pricing a batch is then one index lookup and one multiply per row.
+Rating areas within a state are not distinguished because the forms stop at
+the state.
+"""
+import numpy as np
+import pandas as pd
+
+from ml_models import MODEL_REGION_CODES
+from plan_catalog import STATE_CODES
+
+# Postal code -> cost index (national average = 1.0)
+STATE_COST_INDEX = {
+    'AL': 1.10, 'AK': 1.95, 'AZ': 0.95, 'AR': 0.90, 'CA': 1.00, 'CO': 0.80, 'CT': 1.30, 'DE': 1.25,
+    'FL': 1.05, 'GA': 0.95, 'HI': 1.05, 'ID': 0.95, 'IL': 1.00, 'IN': 0.95, 'IA': 1.05, 'KS': 1.10,
+    'KY': 1.00, 'LA': 1.25, 'ME': 1.10, 'MD': 0.75, 'MA': 0.95, 'MI': 0.85, 'MN': 0.75, 'MS': 1.20,
+    'MO': 1.05, 'MT': 1.20, 'NE': 1.35, 'NV': 0.80, 'NH': 0.80, 'NJ': 1.05, 'NM': 0.90, 'NY': 1.35,
+    'NC': 1.10, 'ND': 1.05, 'OH': 0.95, 'OK': 1.15, 'OR': 1.05, 'PA': 1.00, 'RI': 0.85, 'SC': 1.10,
+    'SD': 1.30, 'TN': 1.05, 'TX': 1.05, 'UT': 1.05, 'VT': 1.95, 'VA': 1.00, 'WA': 0.95, 'WV': 1.70,
+    'WI': 1.20, 'WY': 1.90,
+}
+
+# Census regions; the model's 'Southeast' code stands for the South
+CENSUS_REGIONS = {
+    'Northeast': ('CT', 'ME', 'MA', 'NH', 'RI', 'VT', 'NJ', 'NY', 'PA'),
+    'Midwest': ('IL', 'IN', 'MI', 'OH', 'WI', 'IA', 'KS', 'MN', 'MO', 'NE', 'ND', 'SD'),
+    'Southeast': ('DE', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV', 'AL', 'KY', 'MS', 'TN', 'AR', 'LA', 'OK', 'TX'),
+    'West': ('AZ', 'CO', 'ID', 'MT', 'NV', 'NM', 'UT', 'WY', 'AK', 'CA', 'HI', 'OR', 'WA'),
+}
+
+STATES = tuple(sorted(STATE_COST_INDEX))
+UNKNOWN_STATE = len(STATES)
+
+_STATE_REGIONS = {state: region for region, states in CENSUS_REGIONS.items() for state in states}
+COST_FACTORS = np.array([STATE_COST_INDEX[state] for state in STATES] + [1.0], dtype=np.float32)
+MODEL_REGIONS = np.array([MODEL_REGION_CODES[_STATE_REGIONS[state]] for state in STATES] + [0], dtype=np.int8)
+
+# Lowercased postal codes and state names -> position in STATES
+_LOOKUP = {state.lower(): i for i, state in enumerate(STATES)}
+_LOOKUP.update({name.lower(): _LOOKUP[code.lower()] for name, code in STATE_CODES.items()})
+
+
+def state_index(states):
+    """Positions in STATES for state names or postal codes (any case); unknown -> UNKNOWN_STATE
+
+    A single state gives an int, anything list-like an array.
+    """
+    if states is None or isinstance(states, str):
+        return _LOOKUP.get((states or '').strip().lower(), UNKNOWN_STATE)
+    lowered = pd.Series(states, dtype=object).astype(str).str.strip().str.lower()
+    return lowered.map(_LOOKUP).fillna(UNKNOWN_STATE).to_numpy(dtype=np.intp)
+
+
+def cost_factors(states):
+    return COST_FACTORS[state_index(states)]
+
+
+def model_regions(states, default=None):
+    """Model region codes for states; unknown states get default when given"""
+    index = state_index(states)
+    regions = MODEL_REGIONS[index]
+    if default is not None:
+        regions = np.where(index == UNKNOWN_STATE, default, regions)
+    return regions
+
+
+def adjust_costs(costs, states):
+    """Model costs priced for each row's state"""
+    return np.asarray(costs, dtype=np.float64) * cost_factors(states)
@@ -0,0 +1,46 @@
+"""Shared fixtures: the app's trained models and the sample insurance frame"""
+import os
+import sys
+
+import pytest
+
+# The app's modules sit flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def recommendation_models():
+    from ml_models import train_recommendation_models
+
+    return train_recommendation_models()
+
+
+@pytest.fixture(scope='session')
+def quantile_models():
+    from ml_models import train_cost_quantile_models
+
+    return train_cost_quantile_models()
+
+
+@pytest.fixture(scope='session')
+def feature_rows():
+    """Training-distribution rows plus edge profiles outside it"""
+    import numpy as np
+
+    from ml_models import training_data
+
+    X, _, _ = training_data(seed=7, n_samples=500)
+    edges = np.array([
+        [18, 15.0, 0, 0, 0, 1],
+        [64, 45.0, 1, 4, 3, 4],
+        [90, 60.0, 1, 10, 5, 6],
+        [0, 0.0, 0, 0, 0, 0],
+    ])
+    return np.vstack([X, edges])
+
+
+@pytest.fixture(scope='session')
+def insurance_frame():
+    from insurance_data import sample_insurance_frame
+
+    return sample_insurance_frame()
@@ -0,0 +1,105 @@
+"""Aggregate cube and dashboard index totals agree with a plain pandas groupby"""
+import numpy as np
+import pytest
+
+from aggregates import (AGE_GROUP_LABELS, BMI_BUCKET_LABELS, DIMENSIONS, AggregateCube, age_groups,
+                        bmi_buckets)
+from dashboard_query import DashboardIndex
+
+
+def labelled(df):
+    """The frame with the cube's BMI bucket and age group columns"""
+    return df.assign(bmi_bucket=np.array(BMI_BUCKET_LABELS)[bmi_buckets(df['bmi'].to_numpy())],
+                     age_group=np.array(AGE_GROUP_LABELS)[age_groups(df['age'].to_numpy())])
+
+
+@pytest.fixture(scope='module')
+def cube(insurance_frame):
+    return AggregateCube.from_frame(insurance_frame)
+
+
+def test_cells_match_groupby(cube, insurance_frame):
+    expected = labelled(insurance_frame).groupby(list(DIMENSIONS))['charges'].agg(['count', 'sum'])
+    for key, row in expected.iterrows():
+        filters = dict(zip(DIMENSIONS, key))
+        counts, sums = cube.rollup(**filters)
+        assert int(counts) == row['count']
+        assert float(sums) == pytest.approx(row['sum'])
+    assert cube.counts.sum() == len(insurance_frame)
+    assert cube.sums.sum() == pytest.approx(insurance_frame['charges'].sum())
+
+
+@pytest.mark.parametrize('dim', DIMENSIONS)
+def test_group_means_match_groupby(cube, insurance_frame, dim):
+    expected = labelled(insurance_frame).groupby(dim)['charges'].mean()
+    means = cube.group_means(dim)
+    for label, value in expected.items():
+        assert means[label] == pytest.approx(value)
+
+
+def test_filtered_mean_matches_pandas(cube, insurance_frame):
+    rows = insurance_frame[(insurance_frame['smoker'] == 'yes')
+                           & insurance_frame['region'].isin(['southeast', 'southwest'])]
+    assert cube.total(smoker='yes', region=['southeast', 'southwest']) == len(rows)
+    assert cube.mean_charges(smoker='yes', region=['southeast', 'southwest']) == pytest.approx(rows['charges'].mean())
+
+
+def test_chunks_and_merge_match_one_pass(cube, insurance_frame):
+    chunked = AggregateCube.from_chunks(insurance_frame.iloc[start:start + 200]
+                                        for start in range(0, len(insurance_frame), 200))
+    np.testing.assert_array_equal(chunked.counts, cube.counts)
+    np.testing.assert_allclose(chunked.sums, cube.sums)
+
+    half = len(insurance_frame) // 2
+    merged = AggregateCube.from_frame(insurance_frame.iloc[:half]).merge(
+        AggregateCube.from_frame(insurance_frame.iloc[half:]))
+    np.testing.assert_array_equal(merged.counts, cube.counts)
+    assert (merged.age_min, merged.age_max) == (cube.age_min, cube.age_max)
+
+
+def dashboard_indexes(df):
+    """A compacted index and one holding half its rows as pending appends"""
+    half = len(df) // 2
+    pending = DashboardIndex.from_frame(df.iloc[:half])
+    pending.append(df.iloc[half:])
+    return DashboardIndex.from_frame(df), pending
+
+
+@pytest.mark.parametrize('filters, age_range', [
+    ({}, (0, 255)),
+    ({'smoker': 'yes'}, (30, 50)),
+    ({'sex': 'female', 'region': ['northeast', 'northwest']}, (18, 40)),
+    ({'bmi_class': 'obese', 'smoker': 'no'}, (45, 64)),
+])
+def test_dashboard_query_matches_pandas(insurance_frame, filters, age_range):
+    df = insurance_frame.assign(bmi_class=np.array(BMI_BUCKET_LABELS)[bmi_buckets(insurance_frame['bmi'].to_numpy())])
+    mask = df['age'].between(*age_range)
+    for dim, wanted in filters.items():
+        mask &= df[dim].isin([wanted] if isinstance(wanted, str) else wanted)
+    rows = df[mask]
+    for index in dashboard_indexes(insurance_frame):
+        result = index.query(age_range=age_range, **filters)
+        assert result['count'] == len(rows)
+        assert result['total_charges'] == pytest.approx(rows['charges'].sum())
+
+
+def test_dashboard_group_by_matches_groupby(insurance_frame):
+    expected = insurance_frame.groupby('region')['charges'].agg(['count', 'mean'])
+    for index in dashboard_indexes(insurance_frame):
+        groups = index.query(group_by='region')['groups']
+        for region, row in expected.iterrows():
+            assert groups[region]['count'] == row['count']
+            assert groups[region]['mean_charges'] == pytest.approx(row['mean'])
+
+
+def test_dashboard_query_selecting_nothing(insurance_frame):
+    for index in dashboard_indexes(insurance_frame):
+        result = index.query(region=[], group_by='age_group')
+        assert result['count'] == 0
+        assert result['total_charges'] == 0.0
+        assert all(group['count'] == 0 for group in result['groups'].values())
+
+
+def test_unknown_filter_is_refused(insurance_frame):
+    with pytest.raises(ValueError, match='Unknown filter'):
+        DashboardIndex.from_frame(insurance_frame).query(plan='gold')
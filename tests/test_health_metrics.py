@@ -0,0 +1,46 @@
+"""Vectorized health metrics agree with the app's scalar calculate_bmi"""
+import numpy as np
+import pytest
+
+from health_metrics import IMPERIAL, METRIC, bmi, total_inches
+
+# Importing the app defines its functions without running the page
+app = pytest.importorskip('app')
+
+
+def test_imperial_grid_matches_calculate_bmi():
+    feet, inches, pounds = np.meshgrid(np.arange(4, 8), np.arange(0, 12), np.arange(80, 400, 0.5), indexing='ij')
+    heights = total_inches(feet, inches).ravel()
+    weights = pounds.ravel()
+    expected = [app.calculate_bmi(float(h), float(w), IMPERIAL) for h, w in zip(heights, weights)]
+    np.testing.assert_array_equal(bmi(heights, weights, IMPERIAL), expected)
+
+
+def test_metric_grid_matches_calculate_bmi():
+    metres, kilos = np.meshgrid(np.round(np.arange(1.2, 2.2, 0.01), 2), np.arange(30, 200, 0.5), indexing='ij')
+    heights, weights = metres.ravel(), kilos.ravel()
+    expected = [app.calculate_bmi(float(h), float(w), METRIC) for h, w in zip(heights, weights)]
+    np.testing.assert_array_equal(bmi(heights, weights, METRIC), expected)
+
+
+def test_rounding_ties_match_calculate_bmi():
+    # Weights placing BMI on or next to a .x5 boundary, where np.round and round() can disagree
+    heights = np.repeat(np.round(np.arange(1.5, 2.0, 0.01), 2), 40)
+    targets = np.tile(np.arange(20.05, 24.05, 0.1), len(heights) // 40)
+    weights = np.round(targets * heights ** 2, 6)
+    expected = [app.calculate_bmi(float(h), float(w), METRIC) for h, w in zip(heights, weights)]
+    np.testing.assert_array_equal(bmi(heights, weights, METRIC), expected)
+
+
+def test_mixed_units_and_missing_height():
+    heights = [70, 1.75, 0, -1.0]
+    weights = [180, 70, 150, 60]
+    units = [IMPERIAL, METRIC, IMPERIAL, METRIC]
+    expected = [app.calculate_bmi(h, w, u) for h, w, u in zip(heights, weights, units)]
+    np.testing.assert_array_equal(bmi(heights, weights, units), expected)
+    assert bmi(70, 180, IMPERIAL).shape == ()
+
+
+def test_unknown_unit_system_is_refused():
+    with pytest.raises(ValueError, match='Unknown unit system'):
+        bmi([1.8], [80], ['stone'])
@@ -0,0 +1,73 @@
+"""Fetching from the plan search stub: paging, ETags and 304 Not Modified"""
+import json
+
+import pytest
+
+from marketplace import (MarketplaceCache, dataset_key, fetch_state, normalize_dump, sample_dump,
+                         start_stub_server)
+
+
+def write_dump(directory, state, n, seed=None):
+    payload = sample_dump(state, n=n, seed=seed)
+    with open(directory / f"{state}.json", 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    return payload
+
+
+@pytest.fixture
+def stub(tmp_path):
+    dumps = tmp_path / 'dumps'
+    dumps.mkdir()
+    server, url = start_stub_server(str(dumps), page_size=7)
+    yield dumps, url
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_round_trip(stub, tmp_path):
+    dumps, url = stub
+    payload = write_dump(dumps, 'TX', 30)
+    cache = MarketplaceCache(str(tmp_path / 'cache'))
+
+    assert fetch_state(cache, 'TX', url=url) == 'updated'
+    key = dataset_key('TX')
+    # 30 plans over pages of 7, normalized as an ingested dump would be
+    assert cache.load(key) == normalize_dump(payload)
+    assert len(cache.plans('TX')) == 30
+    etag = cache.metadata(key)['etag']
+    assert etag
+
+    # Same file: the stored ETag goes out and the stub answers 304
+    fetched_at = cache.metadata(key)['fetched_at']
+    assert fetch_state(cache, 'TX', url=url) == 'not-modified'
+    assert cache.metadata(key)['etag'] == etag
+    assert cache.metadata(key)['fetched_at'] >= fetched_at
+    assert len(cache.plans('TX')) == 30
+
+    # A new file changes the ETag and replaces the cached plans
+    write_dump(dumps, 'TX', 12, seed=1)
+    assert fetch_state(cache, 'TX', url=url) == 'updated'
+    assert cache.metadata(key)['etag'] != etag
+    assert len(cache.plans('TX')) == 12
+
+
+def test_refetch_without_etag_is_unchanged(stub, tmp_path):
+    dumps, url = stub
+    write_dump(dumps, 'FL', 10)
+    cache = MarketplaceCache(str(tmp_path / 'cache'))
+    assert fetch_state(cache, 'FL', url=url) == 'updated'
+
+    # Content already cached under another ETag is fetched in full but not rewritten
+    key = dataset_key('FL')
+    cache.store(key, cache.load(key), etag=None)
+    assert fetch_state(cache, 'FL', url=url) == 'unchanged'
+    assert cache.metadata(key)['etag']
+
+
+def test_unknown_state_is_an_http_error(stub, tmp_path):
+    import urllib.error
+
+    _, url = stub
+    with pytest.raises(urllib.error.HTTPError) as error:
+        fetch_state(MarketplaceCache(str(tmp_path / 'cache')), 'ZZ', url=url)
+    assert error.value.code == 404
@@ -0,0 +1,72 @@
+"""Path attributions add up to the model's prediction"""
+import numpy as np
+import pytest
+
+from model_attributions import AttributionCache, TreeAttributions, graph_attributions, quantize
+from model_compress import compress_ensemble
+from model_export import export_forest_classifier, export_gradient_boosting_regressor
+from model_runtime import Graph, StandardScaler
+
+
+def test_regressor_bias_plus_contributions_is_prediction(recommendation_models, feature_rows):
+    _, reg_model, _ = recommendation_models
+    attributions = TreeAttributions(export_gradient_boosting_regressor(reg_model))
+    contributions = attributions.explain(feature_rows)
+    assert contributions.shape == feature_rows.shape
+    np.testing.assert_allclose(attributions.bias + contributions.sum(axis=1), reg_model.predict(feature_rows),
+                               rtol=1e-9)
+
+
+def test_bias_is_training_average(recommendation_models):
+    from ml_models import training_data
+
+    _, reg_model, _ = recommendation_models
+    _, _, y_cost = training_data()
+    attributions = TreeAttributions(export_gradient_boosting_regressor(reg_model))
+    assert attributions.bias == pytest.approx(y_cost.mean())
+
+
+def test_classifier_contributions_add_up_per_class(recommendation_models, feature_rows):
+    clf_model, _, categories = recommendation_models
+    attributions = TreeAttributions(export_forest_classifier(clf_model, labels=categories))
+    contributions = attributions.explain(feature_rows)
+    assert contributions.shape == feature_rows.shape + (len(categories),)
+    np.testing.assert_allclose(attributions.bias + contributions.sum(axis=1), clf_model.predict_proba(feature_rows),
+                               atol=1e-12)
+
+
+def test_graph_attributions_apply_the_transform(recommendation_models, feature_rows):
+    _, reg_model, _ = recommendation_models
+    # An identity scaler still routes rows through Graph.transform
+    n_features = reg_model.n_features_in_
+    graph = Graph([StandardScaler(np.zeros(n_features), np.ones(n_features)),
+                   export_gradient_boosting_regressor(reg_model)])
+    attributions = graph_attributions(graph)
+    np.testing.assert_allclose(attributions.bias + attributions.explain(feature_rows).sum(axis=1),
+                               graph.predict(feature_rows), rtol=1e-9)
+
+
+def test_compressed_ensemble_contributions_add_up(recommendation_models, feature_rows):
+    _, reg_model, _ = recommendation_models
+    ensemble = compress_ensemble(export_gradient_boosting_regressor(reg_model), leaf_bits=8)
+    attributions = TreeAttributions(ensemble)
+    np.testing.assert_allclose(attributions.bias + attributions.explain(feature_rows).sum(axis=1),
+                               ensemble.predict(feature_rows), rtol=1e-9)
+
+
+def test_leaves_only_ensemble_is_refused(recommendation_models):
+    _, reg_model, _ = recommendation_models
+    ensemble = compress_ensemble(export_gradient_boosting_regressor(reg_model), leaf_bits=8, leaves_only=True)
+    with pytest.raises(ValueError, match='leaves-only'):
+        TreeAttributions(ensemble)
+
+
+def test_cache_returns_the_quantized_profile_attribution(recommendation_models):
+    _, reg_model, _ = recommendation_models
+    graph = Graph([export_gradient_boosting_regressor(reg_model)])
+    cache = AttributionCache(graph)
+    row = [41.3, 27.8, 1, 2, 1, 3]
+    first = cache.explain(row)
+    assert cache.explain([41.4, 27.9, 1, 2, 1, 3]) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.bias + first.contributions.sum() == pytest.approx(graph.predict([quantize(row)])[0])
@@ -0,0 +1,62 @@
+"""Exported runtime models reproduce scikit-learn's predictions"""
+import numpy as np
+import pytest
+
+from model_export import (export_estimator, export_forest_classifier, export_gradient_boosting_regressor,
+                          export_gradient_boosting_regressors, recommendation_graphs)
+from model_runtime import evaluate, load_models, save_models
+
+
+def test_forest_classifier_matches_sklearn(recommendation_models, feature_rows):
+    clf_model, _, categories = recommendation_models
+    ensemble = export_forest_classifier(clf_model, labels=categories)
+    np.testing.assert_array_equal(ensemble.predict_proba(feature_rows), clf_model.predict_proba(feature_rows))
+    np.testing.assert_array_equal(ensemble.predict(feature_rows), clf_model.predict(feature_rows))
+
+
+def test_gradient_boosting_regressor_matches_sklearn(recommendation_models, feature_rows):
+    _, reg_model, _ = recommendation_models
+    ensemble = export_gradient_boosting_regressor(reg_model)
+    np.testing.assert_array_equal(ensemble.predict(feature_rows), reg_model.predict(feature_rows))
+
+
+def test_quantile_regressors_export_as_one_ensemble(quantile_models, feature_rows):
+    models, margin = quantile_models
+    offsets = [-margin, 0.0, margin]
+    ensemble = export_gradient_boosting_regressors(models, offsets=offsets)
+    expected = np.column_stack([model.predict(feature_rows) + offset for model, offset in zip(models, offsets)])
+    np.testing.assert_allclose(ensemble.predict(feature_rows), expected, rtol=1e-12)
+
+
+def test_pipeline_matches_sklearn(feature_rows):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    from ml_models import training_data
+
+    X, _, y_cost = training_data()
+    pipeline = make_pipeline(StandardScaler(), Ridge(alpha=1.0)).fit(X, y_cost)
+    graph = export_estimator(pipeline)
+    np.testing.assert_allclose(graph.predict(feature_rows), pipeline.predict(feature_rows), rtol=1e-9)
+
+
+def test_unsupported_estimator_is_refused():
+    from sklearn.svm import SVR
+
+    with pytest.raises(TypeError, match='SVR'):
+        export_estimator(SVR())
+
+
+def test_saved_artifact_matches_sklearn(recommendation_models, quantile_models, feature_rows, tmp_path):
+    clf_model, reg_model, categories = recommendation_models
+    models, margin = quantile_models
+    save_models(recommendation_graphs(clf_model, reg_model, categories, models, margin), tmp_path)
+
+    loaded = load_models(tmp_path, mmap_mode='r')
+    proba, cost, quantiles = evaluate(loaded, feature_rows, [('plan_type', 'predict_proba'), ('cost', 'predict'),
+                                                             ('cost_quantiles', 'predict')])
+    np.testing.assert_array_equal(proba, clf_model.predict_proba(feature_rows))
+    np.testing.assert_array_equal(cost, reg_model.predict(feature_rows))
+    np.testing.assert_allclose(quantiles[:, 1], models[1].predict(feature_rows), rtol=1e-12)
+    assert loaded['plan_type'].labels == categories